@@ -0,0 +1,171 @@
+"""
+Scaling action admission for IntelliScaleSim
+Every docker operation of a scaling action (starting a replica, stopping one,
+resizing, filling a warm pool) waits here for a token of a global token bucket
+and a slot under a concurrency cap, so groups crossing thresholds together
+cannot flood the docker daemon. Waiting actions are served by priority:
+scale-ups before scale-downs, the most under-provisioned groups first.
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Docker operations admitted per second, bucket size, and operations allowed in flight at once
+ACTION_RATE = float(os.environ.get('INTELLISCALESIM_ACTION_RATE', '4'))
+ACTION_BURST = float(os.environ.get('INTELLISCALESIM_ACTION_BURST', '8'))
+MAX_CONCURRENT_ACTIONS = int(os.environ.get('INTELLISCALESIM_MAX_CONCURRENT_ACTIONS', '6'))
+
+# Lower is served first; within a class, the more starved group goes first, then the older request
+ACTION_PRIORITIES = {"scale_up": 0, "resize": 1, "scale_down": 2, "warm_pool": 3}
+
+queued_actions = Gauge('intelliscalesim_admission_queued_actions', 'Scaling actions waiting for admission', ['action'])
+running_actions = Gauge('intelliscalesim_admission_running_actions', 'Admitted scaling actions still running')
+queue_wait_seconds = Histogram(
+    'intelliscalesim_admission_wait_seconds',
+    'Time a scaling action waited for admission',
+    ['action'],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+
+
+class Ticket:
+    """One scaling action waiting for (or holding) admission"""
+
+    __slots__ = ('replica_group', 'action', 'starvation', 'enqueued_at', 'admitted_at', 'key')
+
+    def __init__(self, replica_group: str, action: str, starvation: float, sequence: int):
+        self.replica_group = replica_group
+        self.action = action
+        self.starvation = starvation  # Missing fraction of the group's desired capacity, 0..1
+        self.enqueued_at = time.time()
+        self.admitted_at: Optional[float] = None
+        self.key = (ACTION_PRIORITIES.get(action, len(ACTION_PRIORITIES)), -starvation, sequence)
+
+    @property
+    def waited(self) -> float:
+        return (self.admitted_at or time.time()) - self.enqueued_at
+
+
+class ActionAdmission:
+    """Token bucket plus concurrency cap in front of the docker daemon, with a priority queue"""
+
+    def __init__(self, rate: float = ACTION_RATE, burst: float = ACTION_BURST, max_concurrent: int = MAX_CONCURRENT_ACTIONS):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self._tokens = burst
+        self._last_refill = time.time()
+        self._queue: List[Tuple[Tuple, Ticket]] = []
+        self._running: List[Ticket] = []
+        self._sequence = itertools.count()
+        self._admitted = 0
+        self._condition = threading.Condition()
+
+    def configure(self, rate: Optional[float] = None, burst: Optional[float] = None, max_concurrent: Optional[int] = None):
+        """Change the limits; waiting actions are re-checked right away"""
+        with self._condition:
+            self._refill(time.time())
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+                self._tokens = min(self._tokens, burst)
+            if max_concurrent is not None:
+                self.max_concurrent = max_concurrent
+            self._condition.notify_all()
+        logger.info(f"🚦 Scaling action admission: {self.rate}/s (burst {self.burst}), {self.max_concurrent} concurrent")
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, replica_group: str, action: str, starvation: float = 0.0) -> Ticket:
+        """Block until the action may run; the ticket must be handed back to release()"""
+        with self._condition:
+            ticket = Ticket(replica_group, action, starvation, next(self._sequence))
+            heapq.heappush(self._queue, (ticket.key, ticket))
+            queued_actions.labels(action=action).inc()
+            while True:
+                now = time.time()
+                self._refill(now)
+                if self._queue[0][1] is ticket and len(self._running) < self.max_concurrent and self._tokens >= 1:
+                    break
+                if self._queue[0][1] is ticket and len(self._running) < self.max_concurrent:
+                    # Only the bucket is empty: sleep until the next token
+                    self._condition.wait((1 - self._tokens) / self.rate if self.rate > 0 else None)
+                else:
+                    self._condition.wait()
+            heapq.heappop(self._queue)
+            self._tokens -= 1
+            self._running.append(ticket)
+            self._admitted += 1
+            ticket.admitted_at = now
+            queued_actions.labels(action=action).dec()
+            running_actions.set(len(self._running))
+            # The next ticket in line may be admissible too
+            self._condition.notify_all()
+        queue_wait_seconds.labels(action=action).observe(ticket.waited)
+        if ticket.waited >= 1:
+            logger.info(f"🚦 {action} of {replica_group} admitted after {ticket.waited:.2f}s in the queue")
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """The admitted action finished (successfully or not)"""
+        with self._condition:
+            if ticket in self._running:
+                self._running.remove(ticket)
+            running_actions.set(len(self._running))
+            self._condition.notify_all()
+
+    @contextmanager
+    def admitted(self, replica_group: str, action: str, starvation: float = 0.0):
+        """`with admission.admitted(...) as ticket:` runs the block under admission"""
+        ticket = self.acquire(replica_group, action, starvation)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self) -> Dict:
+        """Limits, free tokens, running actions and the queue in admission order"""
+        now = time.time()
+        with self._condition:
+            self._refill(now)
+            queue = [ticket for _, ticket in sorted(self._queue)]
+            running = list(self._running)
+            tokens = self._tokens
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "max_concurrent": self.max_concurrent,
+            "tokens": round(tokens, 2),
+            "admitted_total": self._admitted,
+            "running": [
+                {"replica_group": t.replica_group, "action": t.action, "running_seconds": round(now - t.admitted_at, 3)}
+                for t in running
+            ],
+            "queue": [
+                {
+                    "position": position,
+                    "replica_group": t.replica_group,
+                    "action": t.action,
+                    "starvation": round(t.starvation, 3),
+                    "waiting_seconds": round(now - t.enqueued_at, 3)
+                }
+                for position, t in enumerate(queue, 1)
+            ]
+        }
+
+
+# Global instance
+admission = ActionAdmission()
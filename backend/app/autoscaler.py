@@ -1,18 +1,130 @@
 """
 Autoscaling engine for IntelliScaleSim
-Monitors container metrics and automatically scales up/down based on CPU usage
+A single reconciliation loop: every tick it compares the desired replica count
+of each replica group (computed by the group's policy type) with the replicas
+actually running, and issues the runtime actions for all groups in one batch.
+Each group is evaluated on its own schedule (interval and cooldown), kept in a
+priority queue so only the groups that are due are touched.
 """
 
+import heapq
+import math
 import time
+import inspect
 import threading
-import subprocess
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+from prometheus_client import Counter, Gauge, Histogram
+
+from .metrics import ContainerSample
+from .storage import metrics_store
+from .host_sampler import host_sampler
+from .sampler import container_sampler, MAX_INTERVAL
+from .forecast import forecasts
+from .tracing import ScalingTrace
+from .traffic import traffic, latency_prober, TrafficStats
+from .proxy import proxies, STRATEGIES
+from .cgroups import cgroup_reader, CgroupStats
+from .placement import placer
+from .admission import admission
+from .schedules import compile_actions, scheduled_bounds, due_prescale, next_fire
+from . import runtime
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Labels that belong to the autoscaler and are never copied from an adopted container
+RESERVED_LABELS = {'managed_by', 'replica_group', 'autoscaled'}
+
+# Samples older than this are refreshed before a decision is made
+MAX_SAMPLE_AGE = 2 * MAX_INTERVAL
+
+# Upper bound on containers started in parallel in one tick
+MAX_PARALLEL_CREATES = 8
+
+# Target tracking ignores deviations from the target smaller than this fraction
+TARGET_TOLERANCE = 0.1
+
+WARM_POOL_MODES = ("stopped", "paused")
+
+# Load balancing strategies of the group proxy; "none" runs no proxy
+LOAD_BALANCERS = STRATEGIES + ("none",)
+
+# How a group combines resizing its replicas with changing their number (see VERTICAL SCALING)
+VERTICAL_MODES = ("off", "vertical_first", "horizontal_first", "vertical_only")
+# Replicas using less than this fraction of a limit (and not throttled) may be shrunk
+VERTICAL_SHRINK_UTILIZATION = 0.4
+# Without cgroup statistics, CPU use at this fraction of the limit counts as throttled
+CPU_SATURATION = 0.95
+
+# How long a new replica gets to answer its first health probe
+HEALTH_PROBE_TIMEOUT = 60
+HEALTH_PROBE_INTERVAL = 0.25
+
+# How often a draining replica's in-flight requests are checked, and how long a drained
+# replica gets to exit after SIGTERM
+DRAIN_POLL_INTERVAL = 0.25
+STOP_GRACE_SECONDS = 10
+
+# A change of scaling direction within this many seconds of the previous change counts as an oscillation
+OSCILLATION_WINDOW = 600
+
+tick_duration = Histogram(
+    'intelliscalesim_autoscaler_tick_duration_seconds',
+    'Duration of one reconciliation tick',
+    ['phase'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+scaling_decisions_total = Counter(
+    'intelliscalesim_autoscaler_decisions_total',
+    'Scaling decisions applied',
+    ['replica_group', 'direction']
+)
+scale_out_seconds = Histogram(
+    'intelliscalesim_autoscaler_scale_out_seconds',
+    'Time from a scale-up decision to the new replica running',
+    ['source'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+)
+oscillations_total = Counter(
+    'intelliscalesim_autoscaler_oscillations_total',
+    'Scaling direction reversals within the oscillation window',
+    ['replica_group']
+)
+reaction_seconds = Histogram(
+    'intelliscalesim_autoscaler_reaction_seconds',
+    'Time from the newest sample behind a scaling decision to the decision',
+    ['trigger'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 60, 120)
+)
+resizes_total = Counter(
+    'intelliscalesim_autoscaler_resizes_total',
+    'In-place changes of the replicas\' CPU or memory limit',
+    ['replica_group', 'resource', 'direction']
+)
+evaluation_lag_seconds = Histogram(
+    'intelliscalesim_autoscaler_evaluation_lag_seconds',
+    'How late a group evaluation ran after it came due',
+    ['trigger'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+scheduled_groups = Gauge('intelliscalesim_autoscaler_scheduled_groups', 'Replica groups in the evaluation schedule')
+drain_seconds = Histogram(
+    'intelliscalesim_autoscaler_drain_seconds',
+    'Time from taking a replica out of the load balancer to its last in-flight request finishing',
+    ['result'],
+    buckets=(0.01, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+)
+triggered_evaluations_total = Counter(
+    'intelliscalesim_autoscaler_triggered_evaluations_total',
+    'Group evaluations triggered by a threshold crossing',
+    ['replica_group']
+)
+
 
 class ScalingPolicy:
     """Defines scaling behavior for a container group"""
@@ -23,7 +135,36 @@ class ScalingPolicy:
         max_replicas: int = 5,
         cpu_scale_up_threshold: float = 70.0,
         cpu_scale_down_threshold: float = 30.0,
-        cooldown_seconds: int = 60
+        cooldown_seconds: int = 60,
+        evaluation_interval: Optional[int] = None,
+        drain_timeout_seconds: int = 30,
+        scale_to_zero_after_seconds: int = 300,
+        policy_type: str = "threshold",
+        memory_scale_up_threshold: Optional[float] = None,
+        memory_scale_down_threshold: Optional[float] = None,
+        lead_time_seconds: int = 60,
+        target_cpu_utilization: float = 50.0,
+        max_scale_up_step: Optional[int] = None,
+        max_scale_down_step: Optional[int] = None,
+        smoothing_window: int = 3,
+        smoothing: str = "mean",
+        scale_up_stabilization_seconds: int = 0,
+        scale_down_stabilization_seconds: int = 300,
+        target_rps_per_replica: Optional[float] = None,
+        target_p95_latency_ms: Optional[float] = None,
+        latency_probe_path: str = "/",
+        signal_combination: str = "max",
+        vertical_mode: str = "off",
+        min_cpu_quota: float = 0.25,
+        max_cpu_quota: float = 2.0,
+        min_mem_limit: str = "256m",
+        max_mem_limit: str = "2g",
+        cpu_throttle_threshold: float = 0.2,
+        memory_pressure_threshold: float = 10.0,
+        memory_usage_threshold: float = 90.0,
+        vertical_step: float = 1.5,
+        vertical_sustain_seconds: int = 60,
+        scheduled_actions: Optional[List[Dict]] = None
     ):
         self.name = name
         self.min_replicas = min_replicas
@@ -31,8 +172,47 @@ class ScalingPolicy:
         self.cpu_scale_up_threshold = cpu_scale_up_threshold
         self.cpu_scale_down_threshold = cpu_scale_down_threshold
         self.cooldown_seconds = cooldown_seconds
+        self.evaluation_interval = evaluation_interval  # Seconds between evaluations (None = the autoscaler's check_interval)
+        self.drain_timeout_seconds = drain_timeout_seconds  # Longest wait for a removed replica's in-flight requests
+        self.scale_to_zero_after_seconds = scale_to_zero_after_seconds  # Idle time before a group with min_replicas=0 drops to zero
+        self.policy_type = policy_type
+        self.memory_scale_up_threshold = memory_scale_up_threshold
+        self.memory_scale_down_threshold = memory_scale_down_threshold
+        self.lead_time_seconds = lead_time_seconds  # How far ahead the predictive policy looks
+        self.target_cpu_utilization = target_cpu_utilization  # Per-replica CPU the target-tracking policy aims for
+        self.max_scale_up_step = max_scale_up_step  # Most replicas added in one decision (None = unlimited)
+        self.max_scale_down_step = max_scale_down_step  # Most replicas removed in one decision (None = unlimited)
+        self.smoothing_window = smoothing_window  # Samples per replica the policy sees, reduced by `smoothing`
+        self.smoothing = smoothing  # "mean" or "max" over the window
+        self.scale_up_stabilization_seconds = scale_up_stabilization_seconds
+        self.scale_down_stabilization_seconds = scale_down_stabilization_seconds
+        self.target_rps_per_replica = target_rps_per_replica  # Requests/s each replica should serve (None = unused)
+        self.target_p95_latency_ms = target_p95_latency_ms  # p95 response time to stay under (None = unused)
+        self.latency_probe_path = latency_probe_path  # Path of the synthetic latency probes
+        self.signal_combination = signal_combination  # How CPU/memory, request-rate and latency recommendations combine
+        self.vertical_mode = vertical_mode  # One of VERTICAL_MODES
+        self.min_cpu_quota = min_cpu_quota  # Bounds of the per-replica CPU limit (cores)
+        self.max_cpu_quota = max_cpu_quota
+        self.min_mem_limit = min_mem_limit  # Bounds of the per-replica memory limit (docker syntax)
+        self.max_mem_limit = max_mem_limit
+        self.cpu_throttle_threshold = cpu_throttle_threshold  # Fraction of CFS periods throttled that calls for more CPU
+        self.memory_pressure_threshold = memory_pressure_threshold  # Memory PSI "some" avg10 % that calls for more memory
+        self.memory_usage_threshold = memory_usage_threshold  # Memory % of the limit that calls for more memory
+        self.vertical_step = vertical_step  # Factor a limit grows (or shrinks) by per resize
+        self.vertical_sustain_seconds = vertical_sustain_seconds  # How long pressure must last before a limit grows
+        self.scheduled_actions = scheduled_actions or []  # Cron-style bound changes and pre-scales (app.schedules)
         self.last_scale_time = 0
 
+    def to_dict(self) -> Dict:
+        """Settings of the policy (runtime state excluded)"""
+        return {key: value for key, value in vars(self).items() if key != 'last_scale_time'}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScalingPolicy":
+        """Rebuild a policy, ignoring settings this version does not know"""
+        known = inspect.signature(cls.__init__).parameters
+        return cls(**{key: value for key, value in data.items() if key in known})
+
 
 class ReplicaGroup:
     """Manages a group of container replicas"""
@@ -43,7 +223,12 @@ class ReplicaGroup:
         container_port: int,
         policy: ScalingPolicy,
         mem_limit: str = "512m",
-        cpu_quota: float = 0.5
+        cpu_quota: float = 0.5,
+        extra_labels: Optional[Dict[str, str]] = None,
+        warm_pool_size: int = 0,
+        warm_pool_mode: str = "stopped",
+        load_balancer: str = "round_robin",
+        placement: str = "none"
     ):
         self.name = name
         self.image = image
@@ -51,253 +236,1461 @@ class ReplicaGroup:
         self.policy = policy
         self.mem_limit = mem_limit
         self.cpu_quota = cpu_quota
+        self.extra_labels = extra_labels or {}  # Copied onto every new replica
         self.replicas: List[str] = []  # List of container IDs
         self.ports: List[int] = []  # List of assigned ports
+        self.enabled = True
+        self.next_index = 1
         self.created_at = datetime.now()
+        self.recommendations: deque = deque(maxlen=1000)  # (timestamp, desired) from the policy
+        self.last_direction = 0  # +1 / -1 of the last applied change
+        self.last_change_time = 0.0
+        self.oscillations = 0
+        # Pre-created replicas, created-but-stopped or paused: (container ID, host port)
+        self.warm_pool_size = warm_pool_size
+        self.warm_pool_mode = warm_pool_mode
+        self.warm_pool: List[Tuple[str, int]] = []
+        self.warm_pool_pending = 0
+        # Stable host port of the group's load balancer, kept across restarts
+        self.load_balancer = load_balancer
+        self.proxy_port: Optional[int] = None
+        # "cpuset" pins replicas to CPUs from the host topology (app.placement)
+        self.placement = placement
+        # Limit pressure conditions currently holding (e.g. "cpu_up") -> since when
+        self.vertical_pressure: Dict[str, float] = {}
+        # Scheduled action name -> the occurrence whose pre-scale was applied last
+        self.schedule_applied: Dict[str, float] = {}
+
+    def to_record(self) -> Dict:
+        """Row for the replica_groups table"""
+        return {
+            "name": self.name,
+            "image": self.image,
+            "container_port": self.container_port,
+            "mem_limit": self.mem_limit,
+            "cpu_quota": self.cpu_quota,
+            "extra_labels": self.extra_labels,
+            "policy": self.policy.to_dict(),
+            "enabled": self.enabled,
+            "next_index": self.next_index,
+            "warm_pool_size": self.warm_pool_size,
+            "warm_pool_mode": self.warm_pool_mode,
+            "replicas": [[cid, port] for cid, port in zip(self.replicas, self.ports)],
+            "warm_pool": [[cid, port] for cid, port in self.warm_pool],
+            "load_balancer": self.load_balancer,
+            "proxy_port": self.proxy_port,
+            "placement": self.placement,
+            "created_at": self.created_at.timestamp(),
+        }
+
+    @classmethod
+    def from_record(cls, row: Dict) -> "ReplicaGroup":
+        """Rebuild a group from its row; replicas and warm pool are re-adopted separately"""
+        group = cls(
+            name=row["name"],
+            image=row["image"],
+            container_port=row["container_port"],
+            policy=ScalingPolicy.from_dict(row.get("policy") or {"name": row["name"]}),
+            mem_limit=row.get("mem_limit") or "512m",
+            cpu_quota=row.get("cpu_quota") or 0.5,
+            extra_labels=row.get("extra_labels") or {},
+            warm_pool_size=row.get("warm_pool_size") or 0,
+            warm_pool_mode=row.get("warm_pool_mode") or "stopped",
+            load_balancer=row.get("load_balancer") or "round_robin",
+            placement=row.get("placement") or "none"
+        )
+        group.proxy_port = row.get("proxy_port")
+        group.enabled = row.get("enabled", True) is not False
+        group.next_index = row.get("next_index") or 1
+        if row.get("created_at"):
+            group.created_at = datetime.fromtimestamp(row["created_at"])
+        return group
+
+
+class GroupMetrics:
+    """Aggregated metrics of a replica group, as of its newest sample"""
+
+    __slots__ = ('avg_cpu', 'avg_mem', 'max_cpu', 'reporting', 'timestamp')
+
+    def __init__(self, avg_cpu: float = 0.0, avg_mem: float = 0.0, max_cpu: float = 0.0, reporting: int = 0, timestamp: Optional[float] = None):
+        self.avg_cpu = avg_cpu
+        self.avg_mem = avg_mem
+        self.max_cpu = max_cpu
+        self.reporting = reporting
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    @classmethod
+    def from_samples(cls, samples: List[ContainerSample]) -> "GroupMetrics":
+        if not samples:
+            return cls()
+        cpus = [s.cpu_percent for s in samples]
+        return cls(
+            avg_cpu=sum(cpus) / len(cpus),
+            avg_mem=sum(s.mem_percent for s in samples) / len(samples),
+            max_cpu=max(cpus),
+            reporting=len(samples),
+            timestamp=max(s.timestamp for s in samples)
+        )
+
+    @classmethod
+    def from_windows(cls, windows: List[List[ContainerSample]], smoothing: str = "mean") -> "GroupMetrics":
+        """Aggregate per-replica sample windows, each reduced to its mean or max first"""
+        windows = [w for w in windows if w]
+        if not windows:
+            return cls()
+        reduce = max if smoothing == "max" else (lambda values: sum(values) / len(values))
+        cpus = [reduce([s.cpu_percent for s in w]) for w in windows]
+        mems = [reduce([s.mem_percent for s in w]) for w in windows]
+        return cls(
+            avg_cpu=sum(cpus) / len(cpus),
+            avg_mem=sum(mems) / len(mems),
+            max_cpu=max(cpus),
+            reporting=len(windows),
+            timestamp=max(w[-1].timestamp for w in windows)
+        )
+
+
+# ===== POLICY TYPES =====
+# A policy type maps (group, metrics, current replica count) to (desired count, reason).
+# The controller applies the cooldown and step limits, then clamps the result to min/max.
+
+def threshold_policy(group: ReplicaGroup, metrics: GroupMetrics, current: int) -> Tuple[int, str]:
+    """Add or remove one replica when average CPU (or memory) crosses a threshold"""
+    policy = group.policy
+    if metrics.avg_cpu > policy.cpu_scale_up_threshold:
+        return current + 1, f"CPU {metrics.avg_cpu:.1f}% > {policy.cpu_scale_up_threshold}%"
+    mem_up = policy.memory_scale_up_threshold
+    if mem_up is not None and metrics.avg_mem > mem_up:
+        return current + 1, f"Memory {metrics.avg_mem:.1f}% > {mem_up}%"
+    mem_down = policy.memory_scale_down_threshold
+    if metrics.avg_cpu < policy.cpu_scale_down_threshold and (mem_down is None or metrics.avg_mem < mem_down):
+        return current - 1, f"CPU {metrics.avg_cpu:.1f}% < {policy.cpu_scale_down_threshold}%"
+    return current, "within thresholds"
+
+
+def fixed_policy(group: ReplicaGroup, metrics: GroupMetrics, current: int) -> Tuple[int, str]:
+    """Keep the replica count where it is; only min/max and lost replicas are reconciled"""
+    return current, "fixed replica count"
+
+
+def target_tracking_policy(group: ReplicaGroup, metrics: GroupMetrics, current: int) -> Tuple[int, str]:
+    """Size the group so per-replica CPU lands on the target: ceil(current * observed / target)"""
+    target = group.policy.target_cpu_utilization
+    ratio = metrics.avg_cpu / target
+    if abs(ratio - 1) <= TARGET_TOLERANCE:
+        return current, f"CPU {metrics.avg_cpu:.1f}% within {TARGET_TOLERANCE:.0%} of target {target}%"
+    desired = math.ceil(current * ratio)
+    return desired, f"CPU {metrics.avg_cpu:.1f}% vs target {target}% → {desired} replicas"
+
+
+def predictive_policy(group: ReplicaGroup, metrics: GroupMetrics, current: int) -> Tuple[int, str]:
+    """Scale out when the forecast CPU per replica at now + lead time crosses the threshold.
+
+    The forecast is of the group's total CPU load, so it is not skewed by the
+    replica count changing; otherwise behaves like the threshold policy.
+    """
+    policy = group.policy
+    forecaster = forecasts.observe(group.name, metrics.timestamp, metrics.avg_cpu * metrics.reporting)
+    predicted = forecaster.forecast(policy.lead_time_seconds)
+    if predicted is not None and current and forecaster.observations > 1:
+        predicted_cpu = predicted / current
+        if predicted_cpu > policy.cpu_scale_up_threshold and metrics.avg_cpu <= policy.cpu_scale_up_threshold:
+            return current + 1, f"Forecast CPU {predicted_cpu:.1f}% in {policy.lead_time_seconds}s > {policy.cpu_scale_up_threshold}%"
+    desired, reason = threshold_policy(group, metrics, current)
+    # Hold a scale-down while the forecast says the load comes back above the threshold
+    if 0 < desired < current and predicted is not None and predicted / desired > policy.cpu_scale_up_threshold:
+        return current, f"{reason}; kept, forecast CPU {predicted / desired:.1f}% after scale down"
+    return desired, reason
+
+
+POLICY_TYPES: Dict[str, Callable[[ReplicaGroup, GroupMetrics, int], Tuple[int, str]]] = {
+    "threshold": threshold_policy,
+    "fixed": fixed_policy,
+    "predictive": predictive_policy,
+    "target_tracking": target_tracking_policy,
+}
+
+
+def register_policy_type(name: str, policy_fn: Callable[[ReplicaGroup, GroupMetrics, int], Tuple[int, str]]):
+    """Make a new policy type available to ScalingPolicy.policy_type"""
+    POLICY_TYPES[name] = policy_fn
+
+
+# ===== REQUEST SIGNALS =====
+# Each signal the policy has a target for recommends a replica count of its own;
+# the recommendations (CPU/memory policy included) are merged by `signal_combination`.
+
+def request_rate_signal(group: ReplicaGroup, stats: TrafficStats, current: int) -> Optional[Tuple[int, str]]:
+    """Replicas needed to serve the observed request rate at the target rate per replica"""
+    target = group.policy.target_rps_per_replica
+    if target is None or stats.requests_per_replica is None:
+        return None
+    total = stats.requests_per_replica * current
+    if abs(stats.requests_per_replica / target - 1) <= TARGET_TOLERANCE:
+        return current, f"{stats.requests_per_replica:.1f} req/s per replica within {TARGET_TOLERANCE:.0%} of target {target}"
+    desired = max(1, math.ceil(total / target))
+    return desired, f"{stats.requests_per_replica:.1f} req/s per replica vs target {target} → {desired} replicas"
+
+
+def latency_signal(group: ReplicaGroup, stats: TrafficStats, current: int) -> Optional[Tuple[int, str]]:
+    """Scale in proportion to p95 latency over its target: ceil(current * observed / target)"""
+    target = group.policy.target_p95_latency_ms
+    if target is None or stats.p95_latency is None:
+        return None
+    observed = stats.p95_latency * 1000
+    if abs(observed / target - 1) <= TARGET_TOLERANCE:
+        return current, f"p95 {observed:.0f}ms within {TARGET_TOLERANCE:.0%} of target {target}ms"
+    desired = max(1, math.ceil(current * observed / target))
+    return desired, f"p95 {observed:.0f}ms ({stats.source}) vs target {target}ms → {desired} replicas"
+
+
+SIGNALS = (request_rate_signal, latency_signal)
+
+# "max" follows the signal asking for the most replicas, "min" scales out only when every signal agrees
+SIGNAL_COMBINATIONS: Dict[str, Callable[[List[int]], int]] = {
+    "max": max,
+    "min": min,
+}
+
+
+# ===== DECISION PIPELINE =====
+# Shared by the controller and the offline simulator (app.simulator), which passes its own clock.
+
+def scaling_thresholds(policy: ScalingPolicy) -> Tuple[float, float]:
+    """(scale up, scale down) per-replica CPU at which the policy reacts"""
+    if policy.policy_type == "target_tracking":
+        target = policy.target_cpu_utilization
+        return target * (1 + TARGET_TOLERANCE), target * (1 - TARGET_TOLERANCE)
+    return policy.cpu_scale_up_threshold, policy.cpu_scale_down_threshold
+
+
+def combine_recommendations(policy: ScalingPolicy, recommendations: List[Tuple[int, str]]) -> Tuple[int, str]:
+    """Merge the recommendations of the CPU/memory policy and the request signals"""
+    if len(recommendations) == 1:
+        return recommendations[0]
+    combine = SIGNAL_COMBINATIONS.get(policy.signal_combination, max)
+    desired = combine([count for count, _ in recommendations])
+    reasons = [reason for count, reason in recommendations if count == desired]
+    return desired, f"{'; '.join(reasons)} ({policy.signal_combination} of {len(recommendations)} signals)"
+
+
+def stabilize(group: ReplicaGroup, current: int, desired: int, reason: str, now: float) -> Tuple[int, str]:
+    """Take the most conservative recommendation within the stabilization window.
+
+    Scaling up uses the lowest recommendation of the scale-up window, scaling
+    down the highest of the scale-down window, so short bursts and dips are ignored.
+    """
+    policy = group.policy
+    group.recommendations.append((now, desired))
+    if desired > current and policy.scale_up_stabilization_seconds:
+        cutoff = now - policy.scale_up_stabilization_seconds
+        stabilized = max(current, min(d for t, d in group.recommendations if t >= cutoff))
+    elif desired < current and policy.scale_down_stabilization_seconds:
+        cutoff = now - policy.scale_down_stabilization_seconds
+        stabilized = min(current, max(d for t, d in group.recommendations if t >= cutoff))
+    else:
+        return desired, reason
+    if stabilized != desired:
+        reason = f"{reason}; stabilized to {stabilized}"
+    return stabilized, reason
+
+
+def replica_bounds(policy: ScalingPolicy, now: float) -> Tuple[int, int, List[str]]:
+    """min/max replicas in force at `now` and the scheduled actions they come from"""
+    if not policy.scheduled_actions:
+        return policy.min_replicas, policy.max_replicas, []
+    return scheduled_bounds(compile_actions(policy.scheduled_actions), now, policy.min_replicas, policy.max_replicas)
+
+
+def decide(group: ReplicaGroup, current: int, metrics: GroupMetrics, stats: Optional[TrafficStats] = None,
+           now: Optional[float] = None, idle_seconds: Optional[float] = None) -> Tuple[int, str]:
+    """Desired replica count of a group: policy and request signals, stabilization,
+    cooldown, step limits and the min/max clamp, in that order.
+
+    With min_replicas=0 the group keeps at least one replica until its load balancer
+    has seen no request for scale_to_zero_after_seconds (`idle_seconds`), then drops to zero.
+    It stays there until a request wakes it up through Autoscaler.activate() (or a scheduled
+    pre-scale fires).
+    """
+    policy = group.policy
+    now = time.time() if now is None else now
+    low, high, bound_sources = replica_bounds(policy, now)
+    if low == 0 and current and idle_seconds is not None and idle_seconds >= policy.scale_to_zero_after_seconds:
+        return 0, f"no requests for {idle_seconds:.0f}s; scaled to zero"
+
+    recommendations = []
+    horizontal = policy.vertical_mode != "vertical_only"
+    if metrics.reporting and horizontal:
+        policy_fn = POLICY_TYPES.get(policy.policy_type)
+        if policy_fn is None:
+            logger.error(f"Unknown policy type '{policy.policy_type}' for group {group.name}")
+        else:
+            recommendations.append(policy_fn(group, metrics, current))
+    if stats is not None and current and horizontal and policy.policy_type != "fixed":
+        recommendations.extend(r for r in (signal(group, stats, current) for signal in SIGNALS) if r is not None)
+
+    desired, reason = current, "no metrics"
+    if recommendations:
+        desired, reason = combine_recommendations(policy, recommendations)
+        desired, reason = stabilize(group, current, desired, reason, now)
+
+    # Policy-driven changes wait for the cooldown; min/max repairs do not
+    time_since_last_scale = now - policy.last_scale_time
+    if desired != current and time_since_last_scale < policy.cooldown_seconds:
+        cooldown_remaining = policy.cooldown_seconds - time_since_last_scale
+        logger.debug(f"Group {group.name} in cooldown ({cooldown_remaining:.0f}s remaining)")
+        desired = current
+
+    if policy.max_scale_up_step is not None and desired - current > policy.max_scale_up_step:
+        desired = current + policy.max_scale_up_step
+        reason = f"{reason}; limited to +{policy.max_scale_up_step}"
+    if policy.max_scale_down_step is not None and current - desired > policy.max_scale_down_step:
+        desired = current - policy.max_scale_down_step
+        reason = f"{reason}; limited to -{policy.max_scale_down_step}"
+
+    # A scheduled pre-scale overrides the policy (and its cooldown and step limits) once
+    if policy.scheduled_actions:
+        prescale = due_prescale(compile_actions(policy.scheduled_actions), now, group.schedule_applied)
+        if prescale is not None:
+            action, fired = prescale
+            group.schedule_applied[action.name] = fired
+            desired, reason = action.desired_replicas, f"scheduled action '{action.name}'"
+
+    floor = 0 if low == 0 and current == 0 else max(1, low)
+    clamped = max(floor, min(high, desired))
+    if clamped != desired:
+        reason = f"{reason}; clamped to [{floor}, {high}]"
+        if bound_sources:
+            reason = f"{reason} by scheduled action {', '.join(bound_sources)}"
+    return clamped, reason
+
+
+# ===== VERTICAL SCALING =====
+# Pressure on the replicas' limits (CFS throttling, memory pressure) resizes them in place
+# with `docker update`. When the horizontal policy and the limits both ask for a change in
+# the same tick, `vertical_mode` decides which one is applied:
+#   vertical_first    the resize; replicas are added once the limits are at their maximum
+#   horizontal_first  the replica change; limits grow only once the group is at max_replicas
+#   vertical_only     always the resize; the replica count is only held within [min, max]
+# A group gets one kind of action per tick, both kinds share the cooldown, and replica
+# counts outside [min, max] are always repaired first.
+
+class LimitPressure:
+    """Worst-case limit usage across the replicas of a group"""
+
+    __slots__ = ('throttled_ratio', 'memory_pressure', 'cpu_usage', 'mem_usage', 'reporting')
+
+    def __init__(self, throttled_ratio: Optional[float] = None, memory_pressure: Optional[float] = None,
+                 cpu_usage: float = 0.0, mem_usage: float = 0.0, reporting: int = 0):
+        self.throttled_ratio = throttled_ratio  # None without cgroup statistics
+        self.memory_pressure = memory_pressure  # None without memory PSI
+        self.cpu_usage = cpu_usage  # Fraction of the CPU limit in use
+        self.mem_usage = mem_usage  # Memory % of the limit
+        self.reporting = reporting
+
+    @classmethod
+    def from_replicas(cls, group: ReplicaGroup, samples: List[ContainerSample], stats: List[CgroupStats]) -> "LimitPressure":
+        ratios = [s.throttled_ratio for s in stats if s.throttled_ratio is not None]
+        pressures = [s.memory_pressure for s in stats if s.memory_pressure is not None]
+        return cls(
+            throttled_ratio=max(ratios) if ratios else None,
+            memory_pressure=max(pressures) if pressures else None,
+            cpu_usage=max((s.cpu_percent / (group.cpu_quota * 100) for s in samples), default=0.0),
+            mem_usage=max((s.mem_percent for s in samples), default=0.0),
+            reporting=len(samples)
+        )
+
+
+def vertical_recommendation(group: ReplicaGroup, pressure: LimitPressure, now: float) -> Tuple[Optional[float], Optional[str], str]:
+    """New (CPU quota, memory limit) of a group's replicas, None where unchanged, and the reason.
+
+    A limit grows by `vertical_step` after pressure lasted `vertical_sustain_seconds`,
+    and shrinks by the same factor after it was barely used for the scale-down
+    stabilization window.
+    """
+    policy = group.policy
+    if pressure.throttled_ratio is not None:
+        throttled = pressure.throttled_ratio >= policy.cpu_throttle_threshold
+        idle_cpu = pressure.throttled_ratio < policy.cpu_throttle_threshold / 4
+        cpu_detail = f"{pressure.throttled_ratio:.0%} of CPU periods throttled"
+    else:
+        throttled = pressure.cpu_usage >= CPU_SATURATION
+        idle_cpu = True
+        cpu_detail = f"CPU at {pressure.cpu_usage:.0%} of its limit"
+    memory_pressed = pressure.mem_usage >= policy.memory_usage_threshold or (
+        pressure.memory_pressure is not None and pressure.memory_pressure >= policy.memory_pressure_threshold)
+    conditions = {
+        "cpu_up": throttled,
+        "cpu_down": idle_cpu and pressure.cpu_usage < VERTICAL_SHRINK_UTILIZATION,
+        "mem_up": memory_pressed,
+        "mem_down": pressure.mem_usage < 100 * VERTICAL_SHRINK_UTILIZATION and not pressure.memory_pressure,
+    }
+    for key, holds in conditions.items():
+        if not holds:
+            group.vertical_pressure.pop(key, None)
+        elif pressure.reporting:
+            group.vertical_pressure.setdefault(key, now)
+
+    def sustained(key: str, seconds: float) -> bool:
+        return key in group.vertical_pressure and now - group.vertical_pressure[key] >= seconds
+
+    cpu, mem, reasons = None, None, []
+    if sustained("cpu_up", policy.vertical_sustain_seconds) and group.cpu_quota < policy.max_cpu_quota:
+        cpu = min(policy.max_cpu_quota, round(group.cpu_quota * policy.vertical_step, 2))
+        reasons.append(f"{cpu_detail} → {cpu} CPUs")
+    elif sustained("cpu_down", policy.scale_down_stabilization_seconds) and group.cpu_quota > policy.min_cpu_quota:
+        cpu = max(policy.min_cpu_quota, round(group.cpu_quota / policy.vertical_step, 2))
+        reasons.append(f"CPU at {pressure.cpu_usage:.0%} of its limit → {cpu} CPUs")
+
+    current_mem = runtime.parse_memory_limit(group.mem_limit)
+    mem_bounds = runtime.parse_memory_limit(policy.min_mem_limit), runtime.parse_memory_limit(policy.max_mem_limit)
+    if sustained("mem_up", policy.vertical_sustain_seconds) and current_mem < mem_bounds[1]:
+        mem = runtime.format_memory_limit(min(mem_bounds[1], current_mem * policy.vertical_step))
+        detail = f"memory PSI {pressure.memory_pressure}%" if pressure.memory_pressure else f"memory at {pressure.mem_usage:.0f}%"
+        reasons.append(f"{detail} → {mem}")
+    elif sustained("mem_down", policy.scale_down_stabilization_seconds) and current_mem > mem_bounds[0]:
+        mem = runtime.format_memory_limit(max(mem_bounds[0], current_mem / policy.vertical_step))
+        reasons.append(f"memory at {pressure.mem_usage:.0f}% of its limit → {mem}")
+    return cpu, mem, "; ".join(reasons)
+
+
+def vertical_precedence(group: ReplicaGroup, current: int, desired: int, cpu: Optional[float], mem: Optional[str],
+                        now: float) -> bool:
+    """Whether a recommended resize is applied instead of the horizontal decision made at `now`"""
+    policy = group.policy
+    low, high, _ = replica_bounds(policy, now)
+    if current < low or current > high:
+        return False
+    if policy.vertical_mode == "horizontal_first":
+        growing = (cpu is not None and cpu > group.cpu_quota) or (
+            mem is not None and runtime.parse_memory_limit(mem) > runtime.parse_memory_limit(group.mem_limit))
+        return desired == current and (not growing or current >= high)
+    return policy.vertical_mode in ("vertical_first", "vertical_only")
+
+
+class ScalingPlan:
+    """Runtime actions decided for one group in one tick"""
+
+    __slots__ = ('group', 'current', 'desired', 'reason', 'lost', 'to_remove', 'decided_at', 'observed_at', 'resize')
+
+    def __init__(self, group: ReplicaGroup, current: int, desired: int, reason: str, lost: List[str], observed_at: Optional[float] = None):
+        self.decided_at = time.time()
+        self.observed_at = observed_at if observed_at is not None else self.decided_at  # Newest sample behind the decision
+        self.group = group
+        self.current = current
+        self.desired = desired
+        self.reason = reason
+        self.lost = lost  # Replicas found dead this tick
+        self.to_remove: List[str] = []
+        self.resize: Optional[Tuple[Optional[float], Optional[str]]] = None  # (CPU quota, memory limit) to apply in place
 
 
 class Autoscaler:
     """Main autoscaling engine"""
-    
+
     def __init__(self, check_interval: int = 30):
         self.check_interval = check_interval
         self.replica_groups: Dict[str, ReplicaGroup] = {}
         self.scaling_events: List[Dict] = []
         self.running = False
         self.thread: Optional[threading.Thread] = None
-        
+        # Short container ID -> replica group name
+        self.replica_index: Dict[str, str] = {}
+        # Called with every scaling event, e.g. by the legacy engine facades
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.last_tick_duration = 0.0
+        # Refills warm pools in the background so ticks never wait for docker create
+        self._pool_executor = ThreadPoolExecutor(max_workers=2)
+        # Waits for the first health probe of new replicas
+        self._probe_executor = ThreadPoolExecutor(max_workers=4)
+        # Drains, stops and removes the replicas of scale-downs
+        self._drain_executor = ThreadPoolExecutor(max_workers=4)
+        # Groups whose persisted row is out of date
+        self._dirty: set = set()
+        # Evaluation schedule: a heap of (due time, group name, kind). The live entry of a group
+        # is the one matching `_next_due` ("sweep") or `_triggered` ("event"); others are skipped.
+        self._schedule: List[Tuple[float, str, str]] = []
+        self._next_due: Dict[str, float] = {}
+        # Groups with a threshold crossing since they were last evaluated -> when to evaluate them
+        self._triggered: Dict[str, float] = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.RLock()
+        # Serializes sweeps and triggered evaluations
+        self._tick_lock = threading.Lock()
+        container_sampler.threshold_source = self._thresholds_for
+        container_sampler.crossing_listeners.append(self._on_threshold_crossing)
+        latency_prober.target_source = self._probe_targets
+        proxies.activator = self.activate
+
     def start(self):
         """Start the autoscaling engine"""
         if self.running:
             logger.warning("Autoscaler already running")
             return
-        
+
         self.running = True
         self.thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.thread.start()
         logger.info(f"✓ Autoscaler started with {self.check_interval}s check interval")
-    
+
     def stop(self):
         """Stop the autoscaling engine"""
         self.running = False
+        self._wakeup.set()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info("Autoscaler stopped")
-    
+
     def register_replica_group(self, group: ReplicaGroup):
         """Register a new replica group for autoscaling"""
-        self.replica_groups[group.name] = group
+        with self._lock:
+            self.replica_groups[group.name] = group
+            self._sync_proxy(group.name)
+            self._schedule_group(group.name, time.time())
+        self._wakeup.set()
+        self.save_group(group)
         logger.info(f"✓ Registered replica group: {group.name}")
-        self._log_scaling_event(group.name, "registered", f"Replica group created with policy: min={group.policy.min_replicas}, max={group.policy.max_replicas}")
-    
+        self._log_scaling_event(group.name, "registered", f"Replica group created with policy: type={group.policy.policy_type}, min={group.policy.min_replicas}, max={group.policy.max_replicas}")
+
     def unregister_replica_group(self, name: str):
         """Unregister a replica group"""
-        if name in self.replica_groups:
-            del self.replica_groups[name]
-            logger.info(f"Unregistered replica group: {name}")
-            self._log_scaling_event(name, "unregistered", "Replica group removed")
-    
+        with self._lock:
+            group = self.replica_groups.pop(name, None)
+            if group is None:
+                return
+            for container_id in group.replicas:
+                self._forget_replica(container_id)
+            self._sync_proxy(name)
+            # Heap entries of the group become stale and are dropped when popped
+            self._next_due.pop(name, None)
+            self._triggered.pop(name, None)
+            pooled, group.warm_pool = group.warm_pool, []
+        if pooled:
+            runtime.remove_containers([container_id for container_id, _ in pooled])
+            for _, port in pooled:
+                runtime.release_port(port)
+        forecasts.drop(name)
+        metrics_store.delete_group(name)
+        logger.info(f"Unregistered replica group: {name}")
+        self._log_scaling_event(name, "unregistered", "Replica group removed")
+
     def add_replica_to_group(self, group_name: str, container_id: str, port: int):
         """Add a container to a replica group"""
-        if group_name in self.replica_groups:
-            self.replica_groups[group_name].replicas.append(container_id)
-            self.replica_groups[group_name].ports.append(port)
-            logger.info(f"✓ Added replica {container_id[:12]} (port {port}) to group {group_name}")
-    
+        with self._lock:
+            group = self.replica_groups.get(group_name)
+            if group is None:
+                return
+            group.replicas.append(container_id)
+            group.ports.append(port)
+            group.next_index = max(group.next_index, len(group.replicas) + 1)
+            self._index_replica(group_name, container_id)
+        self.save_group(group)
+        self._apply_placement()
+        logger.info(f"✓ Added replica {container_id[:12]} (port {port}) to group {group_name}")
+
+    def adopt_container(self, group_name: str, container_id: str, policy: ScalingPolicy) -> ReplicaGroup:
+        """Create a replica group around an already running container"""
+        info = runtime.inspect_container(container_id)
+        host_port, container_port = 0, 80
+        for port_spec, bindings in (info.get("NetworkSettings", {}).get("Ports") or {}).items():
+            if bindings:
+                container_port = int(port_spec.split('/')[0])
+                host_port = int(bindings[0]["HostPort"])
+                break
+        host_config = info.get("HostConfig", {})
+        labels = info.get("Config", {}).get("Labels") or {}
+        group = ReplicaGroup(
+            name=group_name,
+            image=info["Config"]["Image"],
+            container_port=container_port,
+            policy=policy,
+            mem_limit=f"{host_config['Memory']}b" if host_config.get("Memory") else "512m",
+            cpu_quota=host_config["NanoCpus"] / 1e9 if host_config.get("NanoCpus") else 0.5,
+            extra_labels={k: v for k, v in labels.items() if k not in RESERVED_LABELS}
+        )
+        self.register_replica_group(group)
+        self.add_replica_to_group(group_name, info["Id"], host_port)
+        return group
+
+    def scale_group(self, name: str, replicas: int, reason: str = "manual") -> bool:
+        """Scale a group to an explicit replica count right away (no cooldown)"""
+        return bool(self.scale_groups({name: (replicas, reason)}))
+
+    def scale_groups(self, targets: Dict[str, Tuple[int, str]]) -> List[str]:
+        """Scale several groups to explicit replica counts in one batch; returns the groups that changed"""
+        now = time.time()
+        plans = []
+        for name, (replicas, reason) in targets.items():
+            group = self.replica_groups.get(name)
+            if group is None:
+                continue
+            with self._lock:
+                current = len(group.replicas)
+            low, high, _ = replica_bounds(group.policy, now)
+            desired = max(low, min(high, replicas))
+            if desired != current:
+                plans.append(ScalingPlan(group, current, desired, reason, []))
+        if not plans:
+            return []
+        self._apply_plans(plans)
+        self._apply_placement()
+        self._flush_dirty()
+        return [plan.group.name for plan in plans]
+
+    def activate(self, group_name: str) -> bool:
+        """Start a replica of a group without any, for a request its load balancer is holding"""
+        group = self.replica_groups.get(group_name)
+        if group is None or not group.enabled:
+            return False
+        with self._tick_lock:
+            with self._lock:
+                if group.replicas:
+                    return True
+            logger.info(f"⚡ Activating '{group_name}' for an incoming request")
+            desired = max(1, replica_bounds(group.policy, time.time())[0])
+            self._apply_plans([ScalingPlan(group, 0, desired, "request received while scaled to zero", [])])
+            self._apply_placement()
+            self._flush_dirty()
+        return bool(group.replicas)
+
+    def save_group(self, group: ReplicaGroup):
+        """Persist a group now, e.g. after its policy was changed"""
+        with self._lock:
+            self._dirty.discard(group.name)
+            record = group.to_record()
+        metrics_store.save_groups([record])
+
+    def _mark_dirty(self, group: ReplicaGroup):
+        self._dirty.add(group.name)
+
+    def _flush_dirty(self):
+        """Persist every group changed since the last flush in one transaction"""
+        with self._lock:
+            names, self._dirty = self._dirty, set()
+            records = [self.replica_groups[name].to_record() for name in names if name in self.replica_groups]
+        metrics_store.save_groups(records)
+
+    def restore(self) -> Dict:
+        """Rebuild the persisted replica groups after a restart without touching their containers.
+
+        One label-filtered listing finds every replica group container; running ones are
+        re-adopted as replicas (with their ports), stopped or paused ones that were in a
+        warm pool go back to it. Labelled containers of groups that were never persisted
+        get a group with the default policy.
+        """
+        started = time.time()
+        rows = metrics_store.load_groups()
+        listing = runtime.list_group_containers()
+        if listing is None:
+            logger.error("Could not restore replica groups: docker is not reachable")
+            return {"groups": 0, "replicas": 0, "seconds": round(time.time() - started, 3)}
+        by_id = {c["id"][:12]: c for c in listing}
+
+        # Persisted members without the label (e.g. adopted containers) need one extra lookup
+        missing = [cid for row in rows for cid, _ in (row.get("replicas") or []) if cid[:12] not in by_id]
+        extra_states = (runtime.container_states(missing) or {}) if missing else {}
+
+        def state_of(container_id: str) -> Optional[str]:
+            entry = by_id.get(container_id[:12])
+            return entry["state"] if entry else extra_states.get(container_id[:12])
+
+        groups: Dict[str, ReplicaGroup] = {}
+        for row in rows:
+            group = ReplicaGroup.from_record(row)
+            for container_id, port in row.get("replicas") or []:
+                if state_of(container_id) == 'running':
+                    group.replicas.append(container_id)
+                    group.ports.append(port)
+            for container_id, port in row.get("warm_pool") or []:
+                if state_of(container_id) in ('created', 'exited', 'paused'):
+                    group.warm_pool.append((container_id, port))
+                    runtime.hold_port(port)
+            groups[group.name] = group
+
+        known = {cid[:12] for g in groups.values() for cid in g.replicas + [c for c, _ in g.warm_pool]}
+        for entry in listing:
+            if entry["state"] != 'running' or entry["id"][:12] in known or not entry["replica_group"]:
+                continue
+            group = groups.get(entry["replica_group"])
+            if group is None:
+                group = groups[entry["replica_group"]] = ReplicaGroup(
+                    name=entry["replica_group"],
+                    image=entry["image"],
+                    container_port=entry["container_port"] or 80,
+                    policy=ScalingPolicy(name=entry["replica_group"])
+                )
+            group.replicas.append(entry["id"])
+            group.ports.append(entry["host_port"] or 0)
+
+        with self._lock:
+            # Spread the first evaluations over one interval instead of evaluating every group at once
+            for position, group in enumerate(groups.values()):
+                group.next_index = max(group.next_index, len(group.replicas) + len(group.warm_pool) + 1)
+                self._schedule_group(group.name, started + self.evaluation_interval(group) * position / len(groups))
+                self.replica_groups[group.name] = group
+                for container_id in group.replicas:
+                    self._index_replica(group.name, container_id)
+                self._sync_proxy(group.name)
+                self._dirty.add(group.name)
+        self._flush_dirty()
+        self._apply_placement()
+
+        summary = {
+            "groups": len(groups),
+            "replicas": sum(len(g.replicas) for g in groups.values()),
+            "warm_replicas": sum(len(g.warm_pool) for g in groups.values()),
+            "seconds": round(time.time() - started, 3)
+        }
+        for group in groups.values():
+            self._log_scaling_event(group.name, "restored", f"Re-adopted {len(group.replicas)} replicas and {len(group.warm_pool)} warm replicas")
+        logger.info(f"♻️  Restored {summary['groups']} replica groups ({summary['replicas']} replicas) in {summary['seconds']}s")
+        return summary
+
+    def _index_replica(self, group_name: str, container_id: str):
+        """Remember which group a replica belongs to, start sampling it and route traffic to it"""
+        self.replica_index[container_id[:12]] = group_name
+        container_sampler.track(container_id, group_name)
+        self._sync_proxy(group_name)
+        group = self.replica_groups.get(group_name)
+        if group is not None and group.placement == "cpuset":
+            placer.track(container_id, group_name, group.cpu_quota, group.policy.max_replicas == 1)
+
+    def _forget_replica(self, container_id: str):
+        group_name = self.replica_index.pop(container_id[:12], None)
+        container_sampler.untrack(container_id)
+        traffic.forget(container_id)
+        cgroup_reader.forget(container_id)
+        placer.release(container_id)
+        if group_name is not None:
+            self._sync_proxy(group_name)
+
+    def _sync_proxy(self, group_name: str):
+        """Push a group's current replicas to its load balancer, starting or stopping it as needed"""
+        group = self.replica_groups.get(group_name)
+        if group is None or group.load_balancer not in STRATEGIES:
+            proxies.remove(group_name)
+            return
+        port = proxies.sync(group.name, list(zip(group.replicas, group.ports)), group.load_balancer, group.proxy_port)
+        if port is not None and port != group.proxy_port:
+            group.proxy_port = port
+            self._mark_dirty(group)
+
+    def _probe_targets(self) -> List[Tuple[str, int, str]]:
+        """(container ID, host port, path) of every replica whose group targets a latency"""
+        with self._lock:
+            return [
+                (container_id, port, group.policy.latency_probe_path)
+                for group in self.replica_groups.values()
+                if group.enabled and group.policy.target_p95_latency_ms is not None
+                for container_id, port in zip(group.replicas, group.ports)
+                if port
+            ]
+
+    def _thresholds_for(self, container_id: str) -> Optional[Tuple[float, float]]:
+        """Scaling thresholds that apply to a container, for the adaptive sampler"""
+        group = self.replica_groups.get(self.replica_index.get(container_id[:12], ""))
+        if group is None:
+            return None
+        return scaling_thresholds(group.policy)
+
+    def _on_threshold_crossing(self, group_name: str, sample: ContainerSample):
+        """Sampler callback: a replica moved above or below its group's thresholds"""
+        with self._lock:
+            group = self.replica_groups.get(group_name)
+            if group is None or not group.enabled:
+                return
+            # A group in cooldown could not act on the crossing; look at it when the cooldown ends
+            due = max(time.time(), group.policy.last_scale_time + group.policy.cooldown_seconds)
+            if group_name in self._triggered and self._triggered[group_name] <= due:
+                return
+            self._triggered[group_name] = due
+            heapq.heappush(self._schedule, (due, group_name, "event"))
+        self._wakeup.set()
+
+    # ----- scheduling -----
+
+    def evaluation_interval(self, group: ReplicaGroup) -> float:
+        return group.policy.evaluation_interval or self.check_interval
+
+    def _schedule_group(self, name: str, due: float):
+        """Set when a group is next swept (call with the lock held)"""
+        self._next_due[name] = due
+        heapq.heappush(self._schedule, (due, name, "sweep"))
+        scheduled_groups.set(len(self._next_due))
+
+    def _pop_due(self, now: float) -> Tuple[set, set]:
+        """Names of the groups due for a sweep and for a triggered evaluation"""
+        swept, triggered = set(), set()
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                due, name, kind = heapq.heappop(self._schedule)
+                if kind == "sweep" and self._next_due.get(name) == due:
+                    del self._next_due[name]
+                    swept.add(name)
+                elif kind == "event" and self._triggered.get(name) == due:
+                    del self._triggered[name]
+                    triggered.add(name)
+                else:
+                    continue
+                evaluation_lag_seconds.labels(trigger=kind).observe(now - due)
+        # A sweep covers a crossing of the same group
+        return swept, triggered - swept
+
+    def _seconds_until_due(self) -> float:
+        with self._lock:
+            while self._schedule:
+                due, name, kind = self._schedule[0]
+                live = self._next_due.get(name) == due if kind == "sweep" else self._triggered.get(name) == due
+                if live:
+                    return max(0.0, due - time.time())
+                heapq.heappop(self._schedule)
+        return float(self.check_interval)
+
+    def _reschedule(self, groups: List[ReplicaGroup], trigger: str):
+        """Schedule the next sweep of evaluated groups: one interval on, and not before the cooldown ends.
+
+        A triggered evaluation keeps the group's pending sweep, which only moves
+        back if the group just scaled and is now in cooldown.
+        """
+        now = time.time()
+        with self._lock:
+            for group in groups:
+                if self.replica_groups.get(group.name) is not group:
+                    continue
+                cooldown_end = group.policy.last_scale_time + group.policy.cooldown_seconds
+                if trigger == "sweep" or group.name not in self._next_due:
+                    self._schedule_group(group.name, max(now + self.evaluation_interval(group), cooldown_end))
+                elif cooldown_end > self._next_due[group.name]:
+                    self._schedule_group(group.name, cooldown_end)
+                # Scheduled actions are evaluated when they fire, cooldown or not
+                fires = self.next_scheduled_action(group, now)
+                if fires is not None and fires < self._next_due[group.name]:
+                    self._schedule_group(group.name, fires)
+
+    def next_scheduled_action(self, group: ReplicaGroup, now: Optional[float] = None) -> Optional[float]:
+        """When the next scheduled action of a group fires"""
+        if not group.policy.scheduled_actions:
+            return None
+        return next_fire(compile_actions(group.policy.scheduled_actions), time.time() if now is None else now)
+
+    def set_scheduled_actions(self, name: str, actions: List[Dict]):
+        """Replace a group's scheduled actions (validated by compile_actions) and re-plan its next sweep"""
+        compile_actions(actions)
+        with self._lock:
+            group = self.replica_groups[name]
+            group.policy.scheduled_actions = actions
+            # Bounds in force now are applied right away
+            self._schedule_group(name, time.time())
+        self._wakeup.set()
+        self.save_group(group)
+        self._log_scaling_event(name, "schedule_updated", f"{len(actions)} scheduled actions: {', '.join(a['name'] for a in actions) or 'none'}")
+
     def _monitoring_loop(self):
-        """Main monitoring loop"""
+        """Main monitoring loop.
+
+        Sleeps until the earliest entry of the evaluation schedule comes due (or a
+        threshold crossing arrives), then evaluates only the groups that are due:
+        scheduled sweeps with a liveness check, crossings from the sampler's cache.
+        """
         logger.info("🔄 Autoscaler monitoring loop started")
         while self.running:
             try:
-                self._check_all_groups()
+                swept, triggered = self._pop_due(time.time())
+                if swept:
+                    self.reconcile_once(swept)
+                if triggered:
+                    self.reconcile_once(triggered, trigger="event")
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-            
-            time.sleep(self.check_interval)
-    
-    def _check_all_groups(self):
-        """Check all replica groups and make scaling decisions"""
-        for group_name, group in list(self.replica_groups.items()):
-            try:
-                self._check_group(group)
-            except Exception as e:
-                logger.error(f"Error checking group {group_name}: {e}")
-    
-    def _check_group(self, group: ReplicaGroup):
-        """Check a single replica group and scale if needed"""
-        # Get metrics for all replicas in the group
-        total_cpu = 0.0
-        active_replicas = []
-        
-        for container_id in group.replicas:
+
+            self._wakeup.wait(timeout=self._seconds_until_due())
+            self._wakeup.clear()
+
+    def reconcile_once(self, group_names: Optional[set] = None, trigger: str = "sweep"):
+        """Reconcile enabled replica groups once and apply all actions in a batch.
+
+        Without `group_names` every group is evaluated. A sweep lists the
+        containers for liveness; an "event" evaluation works from the sampler's
+        cache alone and makes no Docker calls of its own. The evaluated groups
+        are rescheduled afterwards.
+        """
+        with self._lock:
+            if group_names is None:
+                selected = list(self.replica_groups.values())
+            else:
+                # Due groups are looked up by name, not found by a scan over every group
+                selected = [self.replica_groups[name] for name in group_names if name in self.replica_groups]
+        groups = [g for g in selected if g.enabled]
+        if groups:
+            with self._tick_lock:
+                self._reconcile(groups, trigger)
+        # Disabled groups keep their place in the schedule
+        self._reschedule(selected, trigger)
+
+    def _reconcile(self, groups: List[ReplicaGroup], trigger: str):
+        tick_start = time.time()
+        if trigger == "sweep":
+            # One listing for the liveness of every replica of every group
+            states = runtime.container_states([cid for g in groups for cid in g.replicas])
+            if states is None:
+                return
+            samples = self._collect_samples(groups, states)
+        else:
+            # Liveness is left to the next sweep
+            with self._lock:
+                states = {cid[:12]: 'running' for g in groups for cid in g.replicas}
+            samples = self._collect_samples(groups, states, refresh=False)
+            for group in groups:
+                triggered_evaluations_total.labels(replica_group=group.name).inc()
+        collected = time.time()
+        with self._lock:
+            # Crossings seen up to here are covered by this evaluation; ones waiting for a cooldown are not
+            for group in groups:
+                if self._triggered.get(group.name, float('inf')) <= collected:
+                    del self._triggered[group.name]
+
+        plans = []
+        for group in groups:
             try:
-                cpu = self._get_container_cpu(container_id)
-                if cpu is not None:
-                    total_cpu += cpu
-                    active_replicas.append(container_id)
+                plan = self._check_group(group, states, samples, trigger)
+                if plan is not None:
+                    plans.append(plan)
             except Exception as e:
-                logger.debug(f"Could not get CPU for {container_id[:12]}: {e}")
-        
-        if not active_replicas:
-            logger.debug(f"No active replicas in group {group.name}")
-            return
-        
-        # Calculate average CPU
-        avg_cpu = total_cpu / len(active_replicas)
-        current_replica_count = len(active_replicas)
-        
-        logger.info(f"📊 Group '{group.name}': {current_replica_count} replicas, avg CPU: {avg_cpu:.1f}%")
-        
-        # Check if we're in cooldown period
-        time_since_last_scale = time.time() - group.policy.last_scale_time
-        if time_since_last_scale < group.policy.cooldown_seconds:
-            cooldown_remaining = group.policy.cooldown_seconds - time_since_last_scale
-            logger.debug(f"Group {group.name} in cooldown ({cooldown_remaining:.0f}s remaining)")
+                logger.error(f"Error checking group {group.name}: {e}")
+        evaluated = time.time()
+
+        self._apply_plans(plans)
+        self._refill_warm_pools(groups)
+        self._apply_placement()
+        self._flush_dirty()
+        finished = time.time()
+
+        tick_duration.labels(phase="collect").observe(collected - tick_start)
+        tick_duration.labels(phase="evaluate").observe(evaluated - collected)
+        tick_duration.labels(phase="apply").observe(finished - evaluated)
+        tick_duration.labels(phase="total").observe(finished - tick_start)
+        self.last_tick_duration = finished - tick_start
+
+    def _collect_samples(self, groups: List[ReplicaGroup], states: Dict[str, str], refresh: bool = True) -> Dict[str, ContainerSample]:
+        """Snapshot the latest sample of every running replica of the given groups.
+
+        Cached samples from the background sampler are used as-is; unless `refresh`
+        is off, the stale or missing ones are refreshed in a single docker stats call.
+        """
+        now = time.time()
+        samples: Dict[str, ContainerSample] = {}
+        stale = []
+        for group in groups:
+            for container_id in list(group.replicas):
+                key = container_id[:12]
+                if states.get(key) != 'running':
+                    continue
+                sample = container_sampler.latest(key)
+                if sample is None or now - sample.timestamp > MAX_SAMPLE_AGE:
+                    stale.append(key)
+                else:
+                    samples[key] = sample
+        if stale and refresh:
+            samples.update(container_sampler.refresh(stale))
+        return samples
+
+    def _check_group(self, group: ReplicaGroup, states: Dict[str, str], samples: Dict[str, ContainerSample], trigger: str = "sweep") -> Optional[ScalingPlan]:
+        """Work out the desired replica count of a single group from the tick's snapshot"""
+        with self._lock:
+            lost = [cid for cid in group.replicas if states.get(cid[:12]) != 'running']
+            for container_id in lost:
+                self._drop_replica(group, container_id)
+            if lost:
+                self._mark_dirty(group)
+            current = len(group.replicas)
+            running_ids = list(group.replicas)
+            replica_ids = [cid for cid in running_ids if cid[:12] in samples]
+
+        for container_id in lost:
+            self._log_scaling_event(group.name, "replica_lost", f"Replica {container_id[:12]} is no longer running ({states.get(container_id[:12], 'missing')})")
+
+        policy = group.policy
+        metrics = self._smoothed_metrics(policy, replica_ids, samples)
+        if metrics.reporting:
+            logger.info(f"📊 Group '{group.name}': {current} replicas, avg CPU: {metrics.avg_cpu:.1f}%")
+        stats = None
+        if current and (policy.target_rps_per_replica or policy.target_p95_latency_ms):
+            stats = traffic.group_stats(group.name, running_ids)
+
+        now = time.time()
+        idle = None
+        last_request = proxies.last_request(group.name)
+        if last_request is not None:
+            idle = now - last_request
+        clamped, reason = decide(group, current, metrics, stats, now, idle_seconds=idle)
+        resize = None
+        if policy.vertical_mode != "off" and replica_ids:
+            pressure = LimitPressure.from_replicas(
+                group,
+                [samples[cid[:12]] for cid in replica_ids],
+                [s for s in (cgroup_reader.read(cid) for cid in replica_ids) if s is not None]
+            )
+            cpu, mem, vertical_reason = vertical_recommendation(group, pressure, now)
+            if (cpu is not None or mem is not None) and now - policy.last_scale_time >= policy.cooldown_seconds \
+                    and vertical_precedence(group, current, clamped, cpu, mem, now):
+                resize = (cpu, mem)
+                if clamped != current:
+                    vertical_reason = f"{vertical_reason} (instead of {clamped} replicas, {policy.vertical_mode})"
+                clamped, reason = current, vertical_reason
+        if clamped == current and not lost and resize is None:
+            return None
+        if (clamped != current or resize is not None) and metrics.reporting:
+            reaction_seconds.labels(trigger=trigger).observe(max(0.0, time.time() - metrics.timestamp))
+        plan = ScalingPlan(group, current, clamped, reason, lost, metrics.timestamp if metrics.reporting else None)
+        plan.resize = resize
+        return plan
+
+    def _smoothed_metrics(self, policy: ScalingPolicy, replica_ids: List[str], samples: Dict[str, ContainerSample]) -> GroupMetrics:
+        """Group metrics over the last `smoothing_window` samples of each replica"""
+        if policy.smoothing_window <= 1:
+            return GroupMetrics.from_samples([samples[cid[:12]] for cid in replica_ids])
+        windows = []
+        for container_id in replica_ids:
+            window = container_sampler.history(container_id)[-policy.smoothing_window:]
+            windows.append(window or [samples[container_id[:12]]])
+        return GroupMetrics.from_windows(windows, policy.smoothing)
+
+    def _record_direction(self, group: ReplicaGroup, direction: int):
+        """Count applied scaling decisions and direction reversals"""
+        now = time.time()
+        scaling_decisions_total.labels(replica_group=group.name, direction="up" if direction > 0 else "down").inc()
+        if group.last_direction and direction != group.last_direction and now - group.last_change_time < OSCILLATION_WINDOW:
+            group.oscillations += 1
+            oscillations_total.labels(replica_group=group.name).inc()
+        group.last_direction = direction
+        group.last_change_time = now
+
+    def _cached_metrics(self, group: ReplicaGroup) -> GroupMetrics:
+        """Group metrics from the sampler cache, without calling docker"""
+        samples = [container_sampler.latest(cid) for cid in list(group.replicas)]
+        return GroupMetrics.from_samples([s for s in samples if s is not None])
+
+    def _drop_replica(self, group: ReplicaGroup, container_id: str):
+        """Remove a replica (and its port) from a group's bookkeeping"""
+        if container_id in group.replicas:
+            index = group.replicas.index(container_id)
+            group.replicas.pop(index)
+            group.ports.pop(index)
+        self._forget_replica(container_id)
+
+    def _apply_plans(self, plans: List[ScalingPlan]):
+        """Execute the plans of all groups: one removal call, parallel creations"""
+        if not plans:
             return
-        
-        # Make scaling decision
-        if avg_cpu > group.policy.cpu_scale_up_threshold and current_replica_count < group.policy.max_replicas:
-            logger.warning(f"⬆️  High CPU detected ({avg_cpu:.1f}% > {group.policy.cpu_scale_up_threshold}%) - Scaling UP")
-            self._scale_up(group, avg_cpu)
-        elif avg_cpu < group.policy.cpu_scale_down_threshold and current_replica_count > group.policy.min_replicas:
-            logger.info(f"⬇️  Low CPU detected ({avg_cpu:.1f}% < {group.policy.cpu_scale_down_threshold}%) - Scaling DOWN")
-            self._scale_down(group, avg_cpu)
-    
-    def _get_container_cpu(self, container_id: str) -> Optional[float]:
-        """Get CPU usage for a container"""
+
+        # Lost replicas are only forgotten; they may have been stopped on purpose.
+        # A scale-up is only counted once a replica started (_scale_up), as it may be deferred.
+        for plan in plans:
+            if plan.desired < plan.current:
+                plan.to_remove = self._pick_victims(plan.group, plan.current - plan.desired)
+                self._record_direction(plan.group, -1)
+            if plan.to_remove:
+                self._scale_down(plan)
+
+        scale_ups = [plan for plan in plans if plan.desired > plan.current]
+        if scale_ups:
+            self._scale_up(scale_ups)
+
+        for plan in plans:
+            if plan.resize is not None:
+                self._resize(plan)
+
+    def _resize(self, plan: ScalingPlan):
+        """Apply a new CPU and/or memory limit to every replica and warm replica of a group, in place"""
+        group = plan.group
+        cpu, mem = plan.resize
+        with self._lock:
+            container_ids = list(group.replicas) + [cid for cid, _ in group.warm_pool]
+            previous = (group.cpu_quota, group.mem_limit)
         try:
-            result = subprocess.run(
-                ['docker', 'stats', container_id, '--no-stream', '--format', '{{.CPUPerc}}'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                cpu_str = result.stdout.strip().rstrip('%')
-                return float(cpu_str)
+            with admission.admitted(group.name, "resize"):
+                runtime.update_resources(container_ids, cpu, mem)
         except Exception as e:
-            logger.debug(f"Error getting CPU for {container_id[:12]}: {e}")
-        return None
-    
-    def _scale_up(self, group: ReplicaGroup, avg_cpu: float):
-        """Scale up a replica group"""
-        logger.info(f"🚀 SCALING UP group '{group.name}' (current: {len(group.replicas)} → target: {len(group.replicas) + 1})")
-        
-        try:
-            # Import here to avoid circular dependency
-            from .main import find_free_port, run_docker_command
-            
-            # Find free port
-            host_port = find_free_port()
-            
-            # Build docker run command for replica
-            replica_name = f"{group.name}-replica-{len(group.replicas) + 1}"
-            docker_args = [
-                'run', '-d',
-                '--name', replica_name,
-                '--label', 'managed_by=intelliscalesim',
-                '--label', f'replica_group={group.name}',
-                '--label', 'autoscaled=true',
-                '-p', f'{host_port}:{group.container_port}',
-                '--memory', group.mem_limit,
-                '--cpus', str(group.cpu_quota),
-                group.image
-            ]
-            
-            # Deploy the replica
-            container_id = run_docker_command(docker_args)
-            
-            if container_id:
+            logger.error(f"❌ Failed to resize {group.name}: {e}")
+            self._log_scaling_event(group.name, "resize_failed", f"Error: {str(e)}")
+            return
+        with self._lock:
+            if cpu is not None:
+                group.cpu_quota = cpu
+                if group.placement == "cpuset":
+                    placer.set_quota(group.name, cpu)
+                resizes_total.labels(replica_group=group.name, resource="cpu", direction="up" if cpu > previous[0] else "down").inc()
+            if mem is not None:
+                grew = runtime.parse_memory_limit(mem) > runtime.parse_memory_limit(previous[1])
+                group.mem_limit = mem
+                resizes_total.labels(replica_group=group.name, resource="memory", direction="up" if grew else "down").inc()
+            group.vertical_pressure.clear()
+            group.policy.last_scale_time = time.time()
+            self._mark_dirty(group)
+        logger.info(f"📐 Resized '{group.name}' replicas to {group.cpu_quota} CPUs / {group.mem_limit}")
+        self._log_scaling_event(
+            group.name,
+            "resize",
+            f"Limits {previous[0]} CPUs / {previous[1]} → {group.cpu_quota} CPUs / {group.mem_limit} on {len(container_ids)} containers. Reason: {plan.reason}",
+            replicas=len(group.replicas)
+        )
+
+    def _scale_up(self, plans: List[ScalingPlan]):
+        """Start the new replicas of every scaling-up group concurrently"""
+        launches = []
+        for plan in plans:
+            group = plan.group
+            admitted, admission_reason = host_sampler.admit_scale_up()
+            if not admitted:
+                logger.warning(f"⏸️  Deferring scale up of '{group.name}': {admission_reason}")
+                self._log_scaling_event(group.name, "scale_up_deferred", f"Host admission check failed: {admission_reason}")
+                continue
+            logger.info(f"🚀 SCALING UP group '{group.name}' (current: {plan.current} → target: {plan.desired})")
+            with self._lock:
+                for launched in range(plan.desired - plan.current):
+                    trace = ScalingTrace(group.name, "scale_up", plan.observed_at, plan.decided_at)
+                    # Share of the desired capacity still missing before this replica starts
+                    starvation = (plan.desired - plan.current - launched) / plan.desired
+                    launches.append((plan, f"{group.name}-replica-{group.next_index}", trace, starvation))
+                    group.next_index += 1
+        if not launches:
+            return
+        # Most starved first, so the first pool slots go to the groups furthest below their target
+        launches.sort(key=lambda item: -item[3])
+
+        def launch(item):
+            plan, replica_name, trace, starvation = item
+            with admission.admitted(plan.group.name, "scale_up", starvation):
+                trace.mark('admitted')
+                return start(plan, replica_name, trace)
+
+        def start(plan, replica_name, trace):
+            group = plan.group
+            warm = self._start_warm_replica(group, trace)
+            if warm is not None:
+                return warm + ("warm",)
+            host_port = runtime.find_free_port()
+            trace.mark('port_allocated')
+            cpuset = None
+            if group.placement == "cpuset":
+                cpuset = placer.reserve(replica_name, group.name, group.cpu_quota, group.policy.max_replicas == 1)
+            try:
+                container_id = runtime.run_replica(
+                    replica_name, group.image, group.container_port, host_port,
+                    group.mem_limit, group.cpu_quota, group.name, group.extra_labels,
+                    start=False, cpuset=cpuset
+                )
+            except Exception:
+                placer.cancel(replica_name)
+                raise
+            placer.bind(replica_name, container_id)
+            trace.mark('created')
+            try:
+                runtime.start_container(container_id)
+            except Exception:
+                runtime.remove_containers([container_id])
+                placer.release(container_id)
+                raise
+            trace.mark('running')
+            return container_id, host_port, "cold"
+
+        with ThreadPoolExecutor(max_workers=min(len(launches), MAX_PARALLEL_CREATES)) as pool:
+            futures = [(item, pool.submit(launch, item)) for item in launches]
+
+        started = set()
+        for (plan, replica_name, trace, _), future in futures:
+            group = plan.group
+            try:
+                container_id, host_port, source = future.result()
+            except Exception as e:
+                logger.error(f"❌ Failed to scale up {group.name}: {e}")
+                trace.finish("failed")
+                self._log_scaling_event(group.name, "scale_up_failed", f"Error: {str(e)}", timings=trace.timings)
+                continue
+            if id(plan) not in started:
+                started.add(id(plan))
+                self._record_direction(group, 1)
+            trace.container_id, trace.source = container_id, source
+            scale_out_seconds.labels(source=source).observe(time.time() - plan.decided_at)
+            with self._lock:
                 group.replicas.append(container_id)
                 group.ports.append(host_port)
                 group.policy.last_scale_time = time.time()
-                
-                self._log_scaling_event(
-                    group.name,
-                    "scale_up",
-                    f"Added replica {container_id[:12]} on port {host_port}. Reason: CPU {avg_cpu:.1f}% > {group.policy.cpu_scale_up_threshold}%. Total replicas: {len(group.replicas)}"
+                self._index_replica(group.name, container_id)
+                self._mark_dirty(group)
+            self._log_scaling_event(
+                group.name,
+                "scale_up",
+                f"Added replica {container_id[:12]} on port {host_port} ({source} start). Reason: {plan.reason}. Total replicas: {len(group.replicas)}",
+                replicas=len(group.replicas),
+                timings=trace.timings
+            )
+            logger.info(f"✅ Successfully scaled UP '{group.name}' to {len(group.replicas)} replicas (new replica on port {host_port}, {source} start)")
+            self._probe_executor.submit(self._await_healthy, trace, host_port)
+
+    def _await_healthy(self, trace: ScalingTrace, host_port: int):
+        """Probe a new replica until it answers, then close its trace"""
+        deadline = time.time() + HEALTH_PROBE_TIMEOUT
+        while time.time() < deadline:
+            if runtime.probe_http(host_port):
+                trace.mark('healthy')
+                trace.finish()
+                return
+            time.sleep(HEALTH_PROBE_INTERVAL)
+        logger.warning(f"Replica {(trace.container_id or '')[:12]} of {trace.replica_group} did not answer within {HEALTH_PROBE_TIMEOUT}s")
+        trace.finish("unhealthy")
+
+    def _start_warm_replica(self, group: ReplicaGroup, trace: ScalingTrace) -> Optional[Tuple[str, int]]:
+        """Take a replica from the group's warm pool and start it; None if the pool is empty"""
+        while True:
+            with self._lock:
+                if not group.warm_pool:
+                    return None
+                container_id, host_port = group.warm_pool.pop(0)
+                self._mark_dirty(group)
+            # Port and container already exist; these phases are free for warm replicas
+            trace.mark('port_allocated')
+            trace.mark('created')
+            try:
+                if group.warm_pool_mode == "paused":
+                    runtime.unpause_container(container_id)
+                else:
+                    runtime.start_container(container_id)
+            except Exception as e:
+                # E.g. the held port was taken by another process; discard and try the next one
+                logger.warning(f"Discarding warm replica {container_id[:12]} of {group.name}: {e}")
+                runtime.remove_containers([container_id])
+                runtime.release_port(host_port)
+                continue
+            trace.mark('running')
+            runtime.release_port(host_port)
+            return container_id, host_port
+
+    def _refill_warm_pools(self, groups: List[ReplicaGroup]):
+        """Top up the warm pools of the given groups in the background"""
+        for group in groups:
+            with self._lock:
+                missing = group.warm_pool_size - len(group.warm_pool) - group.warm_pool_pending
+                if missing <= 0:
+                    continue
+                group.warm_pool_pending += missing
+                names = []
+                for _ in range(missing):
+                    names.append(f"{group.name}-replica-{group.next_index}")
+                    group.next_index += 1
+            for replica_name in names:
+                self._pool_executor.submit(self._create_warm_replica, group, replica_name)
+
+    def _create_warm_replica(self, group: ReplicaGroup, replica_name: str):
+        """Create one stopped (or started and paused) replica for a group's warm pool"""
+        host_port = None
+        try:
+            host_port = runtime.find_free_port()
+            runtime.hold_port(host_port)
+            paused = group.warm_pool_mode == "paused"
+            with admission.admitted(group.name, "warm_pool"):
+                container_id = runtime.run_replica(
+                    replica_name, group.image, group.container_port, host_port,
+                    group.mem_limit, group.cpu_quota, group.name, group.extra_labels,
+                    start=paused
                 )
-                logger.info(f"✅ Successfully scaled UP '{group.name}' to {len(group.replicas)} replicas (new replica: {replica_name} on port {host_port})")
+                if paused:
+                    runtime.pause_container(container_id)
         except Exception as e:
-            logger.error(f"❌ Failed to scale up {group.name}: {e}")
-            self._log_scaling_event(group.name, "scale_up_failed", f"Error: {str(e)}")
-    
-    def _scale_down(self, group: ReplicaGroup, avg_cpu: float):
-        """Scale down a replica group"""
-        if len(group.replicas) <= group.policy.min_replicas:
+            logger.error(f"❌ Failed to create warm replica for {group.name}: {e}")
+            if host_port is not None:
+                runtime.release_port(host_port)
+            with self._lock:
+                group.warm_pool_pending -= 1
             return
-        
-        logger.info(f"🔽 SCALING DOWN group '{group.name}' (current: {len(group.replicas)} → target: {len(group.replicas) - 1})")
-        
-        try:
-            # Remove the last replica
-            container_id = group.replicas.pop()
-            port = group.ports.pop()
-            
-            # Stop and remove the container
-            subprocess.run(['docker', 'stop', container_id], timeout=10, capture_output=True)
-            subprocess.run(['docker', 'rm', '-f', container_id], timeout=10, capture_output=True)
-            
+        with self._lock:
+            group.warm_pool_pending -= 1
+            registered = self.replica_groups.get(group.name) is group
+            if registered:
+                group.warm_pool.append((container_id, host_port))
+                self._mark_dirty(group)
+        if not registered:
+            # The group went away while the replica was being created
+            runtime.remove_containers([container_id])
+            runtime.release_port(host_port)
+            return
+        logger.info(f"🔥 Warm replica {replica_name} ready for {group.name} ({len(group.warm_pool)}/{group.warm_pool_size})")
+
+    def _apply_placement(self):
+        """Push changed cpusets to their replicas, one docker update per distinct cpuset"""
+        if not placer.placements:
+            return
+        for cpuset, container_ids in placer.rebalance().items():
+            try:
+                runtime.update_cpuset(container_ids, cpuset)
+            except Exception as e:
+                logger.error(f"❌ Failed to pin {len(container_ids)} replicas to CPUs {cpuset}: {e}")
+                continue
+            placer.mark_applied(container_ids)
+            logger.info(f"🧩 Pinned {', '.join(cid[:12] for cid in container_ids)} to CPUs {cpuset}")
+
+    def _pick_victims(self, group: ReplicaGroup, count: int) -> List[str]:
+        """The `count` least loaded replicas: fewest in-flight requests, then lowest CPU, newest on ties"""
+        connections = proxies.active_connections(group.name) or {}
+        with self._lock:
+            replicas = list(group.replicas)
+
+        def load(item: Tuple[int, str]) -> Tuple[int, float, int]:
+            index, container_id = item
+            sample = container_sampler.latest(container_id)
+            return connections.get(container_id[:12], 0), sample.cpu_percent if sample else 0.0, -index
+
+        return [container_id for _, container_id in sorted(enumerate(replicas), key=load)[:count]]
+
+    def _scale_down(self, plan: ScalingPlan):
+        """Take the removed replicas out of the group and its load balancer, then drain them in the background"""
+        group = plan.group
+        logger.info(f"🔽 SCALING DOWN group '{group.name}' (current: {plan.current} → target: {plan.desired})")
+        victims = []
+        with self._lock:
+            for container_id in plan.to_remove:
+                port = group.ports[group.replicas.index(container_id)] if container_id in group.replicas else None
+                self._drop_replica(group, container_id)
+                trace = ScalingTrace(group.name, "scale_down", plan.observed_at, plan.decided_at)
+                trace.container_id = container_id
+                victims.append((container_id, port, trace))
             group.policy.last_scale_time = time.time()
-            
+            self._mark_dirty(group)
+        self._drain_executor.submit(self._drain, plan, victims)
+
+    def _drain(self, plan: ScalingPlan, victims: List[Tuple[str, Optional[int], ScalingTrace]]):
+        """Drain and remove the replicas of a scale-down (runs on the drain executor, so failures are logged here)"""
+        try:
+            self._drain_replicas(plan, victims)
+        except Exception as e:
+            group = plan.group
+            logger.error(f"❌ Failed to scale down {group.name}: {e}")
+            for container_id, _, trace in victims:
+                trace.finish("failed")
+                self._log_scaling_event(
+                    group.name,
+                    "scale_down_failed",
+                    f"Error removing {container_id[:12]}: {e}",
+                    replicas=len(group.replicas),
+                    timings=trace.timings
+                )
+
+    def _drain_replicas(self, plan: ScalingPlan, victims: List[Tuple[str, Optional[int], ScalingTrace]]):
+        """Wait until the removed replicas have no requests in flight (or the drain timeout passes), then stop and remove them.
+
+        Replicas of a group without a load balancer cannot be observed and are
+        stopped right away, still with a SIGTERM grace period.
+        """
+        group = plan.group
+        started = time.time()
+        deadline = started + group.policy.drain_timeout_seconds
+        pending = {container_id[:12] for container_id, _, _ in victims}
+        drained_at: Dict[str, float] = {}
+        while pending:
+            connections = proxies.active_connections(group.name)
+            now = time.time()
+            for key in list(pending):
+                if not connections or not connections.get(key):
+                    drained_at[key] = now
+                    pending.discard(key)
+            if not pending or now >= deadline:
+                break
+            time.sleep(DRAIN_POLL_INTERVAL)
+
+        container_ids = [container_id for container_id, _, _ in victims]
+        with admission.admitted(group.name, "scale_down"):
+            admitted_at = time.time()
+            try:
+                runtime.stop_containers(container_ids, STOP_GRACE_SECONDS)
+            finally:
+                runtime.remove_containers(container_ids)
+        removed_at = time.time()
+
+        for container_id, port, trace in victims:
+            drained = container_id[:12] in drained_at
+            finished_at = drained_at.get(container_id[:12], removed_at)
+            drain_seconds.labels(result="drained" if drained else "timeout").observe(finished_at - started)
+            trace.mark('drained', finished_at)
+            trace.mark('admitted', max(finished_at, admitted_at))
+            trace.mark('removed', removed_at)
+            trace.finish("done" if drained else "drain_timeout")
+            outcome = f"drained in {finished_at - started:.2f}s" if drained else f"drain timed out after {group.policy.drain_timeout_seconds}s with requests in flight"
             self._log_scaling_event(
                 group.name,
                 "scale_down",
-                f"Removed replica {container_id[:12]} (port {port}). Reason: CPU {avg_cpu:.1f}% < {group.policy.cpu_scale_down_threshold}%. Total replicas: {len(group.replicas)}"
+                f"Removed replica {container_id[:12]} (port {port}), {outcome}. Reason: {plan.reason}. Total replicas: {len(group.replicas)}",
+                replicas=len(group.replicas),
+                drain_seconds=round(finished_at - started, 3),
+                timings=trace.timings
             )
-            logger.info(f"✅ Successfully scaled DOWN '{group.name}' to {len(group.replicas)} replicas")
-        except Exception as e:
-            logger.error(f"❌ Failed to scale down {group.name}: {e}")
-            self._log_scaling_event(group.name, "scale_down_failed", f"Error: {str(e)}")
-    
-    def _log_scaling_event(self, group_name: str, action: str, details: str):
+        logger.info(f"✅ Successfully scaled DOWN '{group.name}' to {len(group.replicas)} replicas")
+
+    def _log_scaling_event(self, group_name: str, action: str, details: str, **extra):
         """Log a scaling event"""
         event = {
             "timestamp": datetime.now().isoformat(),
             "group": group_name,
             "action": action,
-            "details": details
+            "details": details,
+            **extra
         }
         self.scaling_events.append(event)
-        
+        metrics_store.record_event(group_name, action, details, timings=extra.get("timings"))
+
         # Keep only last 200 events
         if len(self.scaling_events) > 200:
             self.scaling_events.pop(0)
-    
+
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Scaling event listener failed: {e}")
+
     def get_status(self) -> Dict:
         """Get autoscaler status"""
         groups_info = []
-        for group in self.replica_groups.values():
-            # Get current CPU for each replica
-            replica_cpus = []
-            for container_id in group.replicas:
-                cpu = self._get_container_cpu(container_id)
-                if cpu is not None:
-                    replica_cpus.append(cpu)
-            
-            avg_cpu = sum(replica_cpus) / len(replica_cpus) if replica_cpus else 0.0
-            
+        for group in list(self.replica_groups.values()):
+            # Served from the sampler cache; status requests never call docker stats
+            metrics = self._cached_metrics(group)
+
             groups_info.append({
                 "name": group.name,
                 "image": group.image,
+                "enabled": group.enabled,
+                "policy_type": group.policy.policy_type,
                 "replicas": len(group.replicas),
                 "ports": group.ports,
                 "min_replicas": group.policy.min_replicas,
                 "max_replicas": group.policy.max_replicas,
                 "cpu_scale_up_threshold": group.policy.cpu_scale_up_threshold,
                 "cpu_scale_down_threshold": group.policy.cpu_scale_down_threshold,
-                "current_avg_cpu": round(avg_cpu, 2),
-                "cooldown_seconds": group.policy.cooldown_seconds
+                "current_avg_cpu": round(metrics.avg_cpu, 2),
+                "current_avg_memory": round(metrics.avg_mem, 2),
+                "reporting_replicas": metrics.reporting,
+                "cooldown_seconds": group.policy.cooldown_seconds,
+                "evaluation_interval": self.evaluation_interval(group),
+                "next_evaluation_in": round(max(0.0, self._next_due[group.name] - time.time()), 1) if group.name in self._next_due else None,
+                "oscillations": group.oscillations,
+                "warm_pool": len(group.warm_pool),
+                "proxy_port": group.proxy_port,
+                "placement": group.placement,
+                "vertical_mode": group.policy.vertical_mode,
+                "cpu_quota": group.cpu_quota,
+                "mem_limit": group.mem_limit,
+                "signals": traffic.group_stats(group.name, list(group.replicas)).to_dict()
             })
-        
+
         return {
             "running": self.running,
             "check_interval": self.check_interval,
+            "last_tick_duration": round(self.last_tick_duration, 3),
+            "policy_types": sorted(POLICY_TYPES),
             "replica_groups_count": len(self.replica_groups),
             "total_replicas": sum(len(group.replicas) for group in self.replica_groups.values()),
             "groups": groups_info
         }
-    
+
     def get_scaling_events(self, limit: int = 50) -> List[Dict]:
         """Get recent scaling events"""
         return self.scaling_events[-limit:]
@@ -0,0 +1,236 @@
+"""
+Autoscaling policy benchmark for IntelliScaleSim
+Scores scaling policies on a library of seeded synthetic workloads with the
+offline simulator, prints a comparison table and fails on regressions against
+a saved baseline.
+
+    cd backend && python -m app.benchmark
+    python -m app.benchmark --save-baseline          # accept the current results
+    python -m app.benchmark --workload step --policy threshold --json
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Optional
+
+from .autoscaler import ScalingPolicy, POLICY_TYPES
+from .simulator import SimulationModel, TracePoint, load_pricing, simulate
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'benchmark_baseline.json')
+
+DURATION_SECONDS = 3600
+STEP_SECONDS = 10
+SEED = 42
+# Requests per second generated per CPU point of demand
+RPS_PER_CPU = 0.4
+
+# Allowed slack before a score counts as a regression: relative, plus an absolute floor
+RELATIVE_TOLERANCE = 0.10
+ABSOLUTE_TOLERANCE = {
+    "under_provisioned_seconds": 10.0,
+    "over_provisioned_replica_seconds": 60.0,
+    "time_to_capacity_max": 10.0,
+    "scaling_actions": 2,
+    "cost": 0.0005,
+}
+# Decision CPU time is machine dependent, so it gets a wider margin
+CPU_TOLERANCE = 1.0
+
+
+# ===== WORKLOADS =====
+# A workload maps (seconds since start, duration, rng) to total CPU demand in % of one replica.
+
+def step_load(t: float, duration: float, rng: random.Random) -> float:
+    """Quiet, then a sudden sustained jump"""
+    return 60.0 if t < 0.2 * duration else 400.0
+
+
+def ramp_load(t: float, duration: float, rng: random.Random) -> float:
+    """Linear climb over the middle half, then hold"""
+    progress = min(1.0, max(0.0, (t - 0.25 * duration) / (0.5 * duration)))
+    return 50.0 + 450.0 * progress
+
+
+def diurnal_load(t: float, duration: float, rng: random.Random) -> float:
+    """One day compressed into the run: night trough, midday peak"""
+    return 50.0 + 350.0 * math.sin(math.pi * t / duration) ** 2
+
+
+def flash_crowd_load(t: float, duration: float, rng: random.Random) -> float:
+    """Steady load, a near-instant spike to 7x, then an exponential fall-off"""
+    onset = 0.4 * duration
+    if t < onset:
+        return 80.0
+    if t < onset + 30:
+        return 80.0 + 520.0 * (t - onset) / 30
+    return 80.0 + 520.0 * math.exp(-(t - onset - 30) / 300)
+
+
+def sawtooth_load(t: float, duration: float, rng: random.Random) -> float:
+    """Repeated 10-minute climbs that drop back at once"""
+    return 50.0 + 300.0 * ((t % 600) / 600)
+
+
+def noisy_plateau_load(t: float, duration: float, rng: random.Random) -> float:
+    """Flat load with sample-to-sample noise a policy should ignore"""
+    return max(0.0, rng.gauss(200.0, 40.0))
+
+
+WORKLOADS: Dict[str, Callable[[float, float, random.Random], float]] = {
+    "step": step_load,
+    "ramp": ramp_load,
+    "diurnal": diurnal_load,
+    "flash_crowd": flash_crowd_load,
+    "sawtooth": sawtooth_load,
+    "noisy_plateau": noisy_plateau_load,
+}
+
+# Policies compared by default (ScalingPolicy settings)
+DEFAULT_POLICIES: Dict[str, Dict] = {
+    "threshold": {"policy_type": "threshold", "max_replicas": 10},
+    "target_tracking": {"policy_type": "target_tracking", "target_cpu_utilization": 60, "max_replicas": 10},
+    "predictive": {"policy_type": "predictive", "max_replicas": 10},
+    "request_rate": {"policy_type": "threshold", "target_rps_per_replica": 30, "max_replicas": 10},
+}
+
+
+def workload_trace(name: str, duration: float = DURATION_SECONDS, step: float = STEP_SECONDS, seed: int = SEED) -> List[TracePoint]:
+    """Seeded trace of a named workload, with a request rate proportional to CPU"""
+    shape = WORKLOADS[name]
+    rng = random.Random(f"{seed}:{name}")
+    points = []
+    for index in range(int(duration // step)):
+        t = index * step
+        cpu = shape(t, duration, rng)
+        points.append(TracePoint(t, cpu, cpu * RPS_PER_CPU))
+    return points
+
+
+def score(result: Dict) -> Dict:
+    """The benchmark's view of one simulation result"""
+    return {
+        "time_to_capacity_mean": result["time_to_capacity"]["mean_seconds"],
+        "time_to_capacity_max": result["time_to_capacity"]["max_seconds"],
+        "under_provisioned_seconds": result["under_provisioned_seconds"],
+        "over_provisioned_replica_seconds": result["over_provisioned_replica_seconds"],
+        "scaling_actions": result["scale_ups"] + result["scale_downs"],
+        "cost": result["cost"]["total"],
+        "decision_cpu_us": result["decision_cpu_us"],
+    }
+
+
+def run(policies: Dict[str, Dict], workloads: List[str], model: Optional[SimulationModel] = None,
+        duration: float = DURATION_SECONDS, seed: int = SEED) -> Dict[str, Dict[str, Dict]]:
+    """Scores of every policy on every workload: {workload: {policy: scores}}"""
+    model = model or SimulationModel()
+    pricing = load_pricing(model.provider)
+    results: Dict[str, Dict[str, Dict]] = {}
+    for workload in workloads:
+        trace = workload_trace(workload, duration, seed=seed)
+        results[workload] = {
+            name: score(simulate(ScalingPolicy.from_dict({"name": name, **settings}), trace, model, pricing))
+            for name, settings in policies.items()
+        }
+    return results
+
+
+def regressions(results: Dict[str, Dict[str, Dict]], baseline: Dict[str, Dict[str, Dict]],
+                tolerance: float = RELATIVE_TOLERANCE, cpu_tolerance: float = CPU_TOLERANCE) -> List[str]:
+    """Scores that got worse than the baseline by more than the allowed slack (all scores are lower-is-better)"""
+    found = []
+    for workload, by_policy in results.items():
+        for policy, scores in by_policy.items():
+            previous = baseline.get(workload, {}).get(policy)
+            if previous is None:
+                continue
+            for key, value in scores.items():
+                if key not in previous or key == "time_to_capacity_mean":
+                    continue
+                if key == "decision_cpu_us":
+                    allowed = previous[key] * (1 + cpu_tolerance) + 5.0
+                else:
+                    allowed = previous[key] * (1 + tolerance) + ABSOLUTE_TOLERANCE.get(key, 0.0)
+                if value > allowed:
+                    found.append(f"{workload}/{policy}: {key} {previous[key]} -> {value} (allowed {allowed:.4g})")
+    return found
+
+
+def format_table(results: Dict[str, Dict[str, Dict]]) -> str:
+    columns = [
+        ("workload", None), ("policy", None),
+        ("ttc mean s", "time_to_capacity_mean"), ("ttc max s", "time_to_capacity_max"),
+        ("under s", "under_provisioned_seconds"), ("over replica-s", "over_provisioned_replica_seconds"),
+        ("actions", "scaling_actions"), ("cost $", "cost"), ("decide us", "decision_cpu_us"),
+    ]
+    rows = []
+    for workload, by_policy in results.items():
+        for policy, scores in by_policy.items():
+            rows.append([workload, policy] + [f"{scores[key]:g}" for _, key in columns[2:]])
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (title, _) in enumerate(columns)]
+    lines = [
+        "  ".join(title.ljust(width) for (title, _), width in zip(columns, widths)),
+        "  ".join("-" * width for width in widths),
+    ]
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark autoscaling policies on synthetic workloads")
+    parser.add_argument("--workload", action="append", choices=sorted(WORKLOADS), help="Workload to run (repeatable; default: all)")
+    parser.add_argument("--policy", action="append", help="Default policy name, or NAME=JSON settings (repeatable; default: all defaults)")
+    parser.add_argument("--duration", type=float, default=DURATION_SECONDS, help="Seconds of load per workload")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--provider", default="AWS", help="Pricing of data/pricing/<provider>_pricing.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline scores to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=RELATIVE_TOLERANCE, help="Relative slack before a score regresses")
+    parser.add_argument("--cpu-tolerance", type=float, default=CPU_TOLERANCE, help="Relative slack for decision CPU time")
+    parser.add_argument("--json", action="store_true", help="Print the scores as JSON instead of a table")
+    args = parser.parse_args(argv)
+    # One simulation per cell; their per-group log lines would drown the table
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    policies: Dict[str, Dict] = {}
+    for spec in args.policy or list(DEFAULT_POLICIES):
+        name, _, settings = spec.partition("=")
+        if settings:
+            policies[name] = json.loads(settings)
+        elif name in DEFAULT_POLICIES:
+            policies[name] = DEFAULT_POLICIES[name]
+        else:
+            parser.error(f"Unknown policy {name}; use NAME=JSON for custom settings")
+        if policies[name].get("policy_type", "threshold") not in POLICY_TYPES:
+            parser.error(f"Unknown policy type in {name}")
+
+    results = run(policies, args.workload or list(WORKLOADS), SimulationModel(provider=args.provider), args.duration, args.seed)
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    found = regressions(results, baseline, args.tolerance, args.cpu_tolerance)
+    if found:
+        print(f"\n{len(found)} regression(s) against {args.baseline}:")
+        for line in found:
+            print(f"  - {line}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
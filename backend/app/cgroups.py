@@ -0,0 +1,153 @@
+"""
+Container cgroup statistics for IntelliScaleSim
+Reads CPU throttling (cpu.stat) and memory pressure (memory.pressure) of
+containers straight from the cgroup filesystem, for the cgroup v2 layouts of
+the systemd and cgroupfs drivers and for cgroup v1. No docker call is made.
+"""
+
+import os
+import glob
+import time
+import threading
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = os.environ.get('INTELLISCALESIM_CGROUP_ROOT', '/sys/fs/cgroup')
+
+# Where docker puts a container's cgroup, relative to the root ({id} is an ID prefix)
+V2_LAYOUTS = ('system.slice/docker-{id}*.scope', 'docker/{id}*')
+V1_LAYOUTS = {
+    'cpu': ('cpu,cpuacct/docker/{id}*', 'cpu/docker/{id}*', 'cpu,cpuacct/system.slice/docker-{id}*.scope'),
+    'memory': ('memory/docker/{id}*', 'memory/system.slice/docker-{id}*.scope'),
+}
+
+
+class CgroupStats:
+    """CPU throttling and memory pressure of one container since its previous read"""
+
+    __slots__ = ('timestamp', 'throttled_ratio', 'throttled_seconds', 'memory_pressure')
+
+    def __init__(self, timestamp: float, throttled_ratio: Optional[float] = None,
+                 throttled_seconds: float = 0.0, memory_pressure: Optional[float] = None):
+        self.timestamp = timestamp
+        self.throttled_ratio = throttled_ratio  # Fraction of CFS periods throttled; None on the first read or without a quota
+        self.throttled_seconds = throttled_seconds  # Time spent throttled since the previous read
+        self.memory_pressure = memory_pressure  # PSI "some" avg10 in %; None on cgroup v1 or without PSI
+
+    def to_dict(self) -> Dict:
+        return {
+            "throttled_ratio": round(self.throttled_ratio, 3) if self.throttled_ratio is not None else None,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "memory_pressure": self.memory_pressure
+        }
+
+
+def read_keyed_file(path: str) -> Dict[str, int]:
+    """Parse a flat 'key value' cgroup file such as cpu.stat"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(' ')
+            try:
+                values[key] = int(value)
+            except ValueError:
+                continue
+    return values
+
+
+def read_pressure_avg10(path: str) -> Optional[float]:
+    """The 'some avg10' value of a PSI file, or None"""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith('some '):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'avg10':
+                            return float(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class CgroupReader:
+    """Finds container cgroups once and turns cumulative counters into per-interval stats"""
+
+    def __init__(self, root: str = CGROUP_ROOT):
+        self.root = root
+        # Short container ID -> (cpu dir, memory dir); None when the cgroup was not found
+        self._dirs: Dict[str, Optional[Tuple[str, str]]] = {}
+        # Short container ID -> (nr_periods, nr_throttled, throttled seconds) at the previous read
+        self._last: Dict[str, Tuple[int, int, float]] = {}
+        self._lock = threading.Lock()
+
+    def _find(self, pattern: str, container_id: str) -> Optional[str]:
+        matches = glob.glob(os.path.join(self.root, pattern.format(id=container_id)))
+        return matches[0] if len(matches) == 1 else None
+
+    def _locate(self, container_id: str) -> Optional[Tuple[str, str]]:
+        key = container_id[:12]
+        if key in self._dirs:
+            return self._dirs[key]
+        dirs = None
+        for pattern in V2_LAYOUTS:
+            found = self._find(pattern, container_id)
+            if found:
+                dirs = (found, found)
+                break
+        else:
+            cpu = next((d for d in (self._find(p, container_id) for p in V1_LAYOUTS['cpu']) if d), None)
+            memory = next((d for d in (self._find(p, container_id) for p in V1_LAYOUTS['memory']) if d), None)
+            if cpu:
+                dirs = (cpu, memory or '')
+        # Containers that are still starting may not have a cgroup yet; only remember hits
+        if dirs is not None:
+            with self._lock:
+                self._dirs[key] = dirs
+        return dirs
+
+    def read(self, container_id: str) -> Optional[CgroupStats]:
+        """Current stats of a container, or None if its cgroup cannot be read"""
+        dirs = self._locate(container_id)
+        if dirs is None:
+            return None
+        cpu_dir, memory_dir = dirs
+        try:
+            cpu_stat = read_keyed_file(os.path.join(cpu_dir, 'cpu.stat'))
+        except OSError:
+            # The container is gone; look it up again next time
+            self.forget(container_id)
+            return None
+
+        periods = cpu_stat.get('nr_periods', 0)
+        throttled = cpu_stat.get('nr_throttled', 0)
+        if 'throttled_usec' in cpu_stat:
+            throttled_time = cpu_stat['throttled_usec'] / 1e6
+        else:
+            throttled_time = cpu_stat.get('throttled_time', 0) / 1e9
+
+        key = container_id[:12]
+        with self._lock:
+            previous = self._last.get(key)
+            self._last[key] = (periods, throttled, throttled_time)
+        stats = CgroupStats(time.time())
+        if previous is not None and periods > previous[0]:
+            stats.throttled_ratio = (throttled - previous[1]) / (periods - previous[0])
+            stats.throttled_seconds = max(0.0, throttled_time - previous[2])
+        elif previous is not None and periods == previous[0]:
+            # No CFS period elapsed: idle, or no CPU quota at all
+            stats.throttled_ratio = 0.0 if periods else None
+        if memory_dir:
+            stats.memory_pressure = read_pressure_avg10(os.path.join(memory_dir, 'memory.pressure'))
+        return stats
+
+    def forget(self, container_id: str):
+        with self._lock:
+            self._dirs.pop(container_id[:12], None)
+            self._last.pop(container_id[:12], None)
+
+
+# Global instance
+cgroup_reader = CgroupReader()
@@ -0,0 +1,283 @@
+"""
+Streaming export of recorded metrics, scaling events, load tests and load test samples
+Rows are read from storage in chunks and encoded incrementally, so memory use
+does not grow with the size of the export.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from .storage import metrics_store, metric_samples, scaling_events, load_tests
+
+try:
+    import pyarrow as pa
+except ImportError:  # columnar export is optional
+    pa = None
+
+EXPORT_FORMATS = ("csv", "arrow")
+
+# Summary fields flattened out of LoadTest.results
+LOAD_TEST_RESULT_FIELDS = [
+    "total_requests_sent",
+    "successful_requests",
+    "failed_requests",
+    "actual_duration",
+    "requests_per_second",
+    "avg_response_time",
+    "min_response_time",
+    "max_response_time",
+    "avg_cpu_usage",
+    "avg_memory_usage",
+    "peak_cpu_usage",
+    "peak_memory_usage",
+]
+
+# Per-batch fields of each entry in LoadTest.results["samples"], as (name, kind)
+LOAD_TEST_SAMPLE_FIELDS = [
+    ("elapsed", "f"),
+    ("cpu_usage", "f"),
+    ("memory_usage", "f"),
+    ("requests_sent", "i"),
+    ("successful", "i"),
+    ("failed", "i"),
+    ("avg_response_time", "f"),
+]
+
+# Longer than any load test runs, so samples inside a time range are found through their test's start
+LOAD_TEST_MAX_SPAN = 3600
+
+
+class ExportError(ValueError):
+    """Raised for an export request that cannot be served"""
+
+
+def _naive_utc(timestamp: float) -> datetime:
+    """A Unix timestamp as the naive UTC datetime LoadTest.created_at is stored as"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _metrics_query(group: Optional[str], container: Optional[str], since: Optional[float], until: Optional[float]):
+    t = metric_samples
+    query = select(
+        t.c.timestamp, t.c.replica_group, t.c.container_id, t.c.container_name,
+        t.c.cpu_percent, t.c.mem_percent, t.c.mem_usage, t.c.mem_limit,
+        t.c.net_rx, t.c.net_tx, t.c.block_read, t.c.block_write, t.c.pids
+    )
+    if group:
+        query = query.where(t.c.replica_group == group)
+    if container:
+        query = query.where((t.c.container_id == container[:12]) | (t.c.container_name == container))
+    if since is not None:
+        query = query.where(t.c.timestamp >= since)
+    if until is not None:
+        query = query.where(t.c.timestamp < until)
+    return query.order_by(t.c.timestamp)
+
+
+def _events_query(group: Optional[str], container: Optional[str], since: Optional[float], until: Optional[float]):
+    t = scaling_events
+    query = select(t.c.timestamp, t.c.replica_group, t.c.action, t.c.details, t.c.trace_id, t.c.timings)
+    if group:
+        query = query.where(t.c.replica_group == group)
+    if since is not None:
+        query = query.where(t.c.timestamp >= since)
+    if until is not None:
+        query = query.where(t.c.timestamp < until)
+    return query.order_by(t.c.timestamp)
+
+
+def _load_tests_query(group: Optional[str], container: Optional[str], since: Optional[float], until: Optional[float]):
+    t = load_tests
+    query = select(
+        t.c.id, t.c.created_at, t.c.target_url, t.c.total_requests,
+        t.c.concurrency, t.c.duration, t.c.status, t.c.results
+    )
+    if since is not None:
+        query = query.where(t.c.created_at >= _naive_utc(since))
+    if until is not None:
+        query = query.where(t.c.created_at < _naive_utc(until))
+    return query.order_by(t.c.created_at)
+
+
+def _load_test_samples_query(group: Optional[str], container: Optional[str], since: Optional[float], until: Optional[float]):
+    t = load_tests
+    query = select(t.c.id, t.c.target_url, t.c.results)
+    if since is not None:
+        query = query.where(t.c.created_at >= _naive_utc(since - LOAD_TEST_MAX_SPAN))
+    if until is not None:
+        query = query.where(t.c.created_at < _naive_utc(until))
+    return query.order_by(t.c.created_at)
+
+
+def _results(row) -> Dict:
+    results = row.results
+    if isinstance(results, str):
+        results = json.loads(results)
+    return results if isinstance(results, dict) else {}
+
+
+def _row(row, since, until) -> List[List]:
+    return [list(row)]
+
+
+def _event_row(row, since, until) -> List[List]:
+    timings = row.timings
+    if timings is not None and not isinstance(timings, str):
+        timings = json.dumps(timings)
+    return [[row.timestamp, row.replica_group, row.action, row.details, row.trace_id, timings]]
+
+
+def _load_test_row(row, since, until) -> List[List]:
+    results = _results(row)
+    created = row.created_at.replace(tzinfo=timezone.utc).timestamp() if row.created_at else None
+    return [[
+        row.id, created, row.target_url, row.total_requests, row.concurrency, row.duration, row.status
+    ] + [results.get(field) for field in LOAD_TEST_RESULT_FIELDS]]
+
+
+def _load_test_sample_rows(row, since, until) -> List[List]:
+    """One row per recorded sample of the test, limited to the time range"""
+    rows = []
+    for sample in _results(row).get("samples") or []:
+        timestamp = sample.get("timestamp")
+        if timestamp is None or (since is not None and timestamp < since) or (until is not None and timestamp >= until):
+            continue
+        rows.append([row.id, timestamp, row.target_url] + [sample.get(name) for name, _ in LOAD_TEST_SAMPLE_FIELDS])
+    return rows
+
+
+# dataset -> (columns as (name, kind), query builder, row converter)
+# kind is 'f' (float), 'i' (integer) or 's' (string); a converter turns one result row
+# into the export rows within (since, until)
+DATASETS = {
+    "metrics": (
+        [("timestamp", "f"), ("replica_group", "s"), ("container_id", "s"), ("container_name", "s"),
+         ("cpu_percent", "f"), ("mem_percent", "f"), ("mem_usage", "i"), ("mem_limit", "i"),
+         ("net_rx", "i"), ("net_tx", "i"), ("block_read", "i"), ("block_write", "i"), ("pids", "i")],
+        _metrics_query,
+        _row,
+    ),
+    "scaling_events": (
+        [("timestamp", "f"), ("replica_group", "s"), ("action", "s"), ("details", "s"),
+         ("trace_id", "s"), ("timings", "s")],
+        _events_query,
+        _event_row,
+    ),
+    "load_tests": (
+        [("id", "i"), ("timestamp", "f"), ("target_url", "s"), ("total_requests", "i"),
+         ("concurrency", "i"), ("duration", "i"), ("status", "s")]
+        + [(field, "f") for field in LOAD_TEST_RESULT_FIELDS],
+        _load_tests_query,
+        _load_test_row,
+    ),
+    "load_test_samples": (
+        [("test_id", "i"), ("timestamp", "f"), ("target_url", "s")] + LOAD_TEST_SAMPLE_FIELDS,
+        _load_test_samples_query,
+        _load_test_sample_rows,
+    ),
+}
+
+# dataset -> the selectors its rows can be filtered by (besides the time range)
+DATASET_SELECTORS = {
+    "metrics": ("group", "container"),
+    "scaling_events": ("group",),
+    "load_tests": (),
+    "load_test_samples": (),
+}
+
+
+def _chunks(dataset: str, group, container, since, until, chunk_size: int) -> Iterator[List[List]]:
+    _, build_query, convert = DATASETS[dataset]
+    for partition in metrics_store.stream(build_query(group, container, since, until), chunk_size):
+        rows = [converted for row in partition for converted in convert(row, since, until)]
+        if rows:
+            yield rows
+
+
+def stream_csv(dataset: str, group=None, container=None, since=None, until=None, chunk_size: int = 1000) -> Iterator[str]:
+    """Yield CSV text one chunk of rows at a time"""
+    columns = [name for name, _ in DATASETS[dataset][0]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in _chunks(dataset, group, container, since, until, chunk_size):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Minimal writable file object that hands written bytes back to the caller"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_schema(dataset: str):
+    types = {"f": pa.float64(), "i": pa.int64(), "s": pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in DATASETS[dataset][0]])
+
+
+def stream_arrow(dataset: str, group=None, container=None, since=None, until=None, chunk_size: int = 10000) -> Iterator[bytes]:
+    """Yield an Arrow IPC stream, one record batch per chunk of rows"""
+    if pa is None:
+        raise ExportError("Columnar export requires pyarrow to be installed")
+    schema = _arrow_schema(dataset)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), schema)
+    for rows in _chunks(dataset, group, container, since, until, chunk_size):
+        arrays = [pa.array(list(col), type=field.type) for col, field in zip(zip(*rows), schema)]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_stream(dataset: str, fmt: str, **selector) -> Dict:
+    """Return the media type, file name and body iterator for an export"""
+    if dataset not in DATASETS:
+        raise ExportError(f"Unknown dataset '{dataset}'. Choose from: {', '.join(DATASETS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    unsupported = [key for key in ("group", "container") if selector.get(key) and key not in DATASET_SELECTORS[dataset]]
+    if unsupported:
+        names = {"group": "replica_group", "container": "container"}
+        raise ExportError(f"Dataset '{dataset}' cannot be filtered by {', '.join(names[key] for key in unsupported)}")
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    if fmt == "csv":
+        return {
+            "media_type": "text/csv",
+            "filename": f"{dataset}-{stamp}.csv",
+            "body": stream_csv(dataset, **selector),
+        }
+    if pa is None:
+        raise ExportError("Columnar export requires pyarrow to be installed")
+    return {
+        "media_type": "application/vnd.apache.arrow.stream",
+        "filename": f"{dataset}-{stamp}.arrows",
+        "body": stream_arrow(dataset, **selector),
+    }
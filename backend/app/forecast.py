@@ -0,0 +1,171 @@
+"""
+Short-horizon load forecasting for IntelliScaleSim
+Holt's linear trend model over the total CPU load of a replica group, seeded
+from the stored metric history and updated online by the autoscaler.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .storage import metrics_store
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factors for the level and the trend
+DEFAULT_ALPHA = 0.5
+DEFAULT_BETA = 0.3
+
+# History used to seed a group's forecaster, and its resolution
+SEED_HISTORY_SECONDS = 900
+BUCKET_SECONDS = 10
+
+
+class HoltForecaster:
+    """Holt's linear trend (double exponential smoothing) for irregularly spaced observations.
+
+    The trend is kept per second, so observations do not need a fixed interval;
+    observations closer together than `min_spacing` only adjust the level, so a
+    burst of near-simultaneous samples cannot blow up the trend.
+    """
+
+    __slots__ = ('alpha', 'beta', 'min_spacing', 'level', 'trend', 'timestamp', 'observations')
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, beta: float = DEFAULT_BETA, min_spacing: float = BUCKET_SECONDS / 2):
+        self.alpha = alpha
+        self.beta = beta
+        self.min_spacing = min_spacing
+        self.level: Optional[float] = None
+        self.trend = 0.0
+        self.timestamp = 0.0
+        self.observations = 0
+
+    def update(self, timestamp: float, value: float):
+        """Add one observation"""
+        self.observations += 1
+        if self.level is None:
+            self.level = value
+            self.timestamp = timestamp
+            return
+        elapsed = timestamp - self.timestamp
+        if elapsed < self.min_spacing:
+            self.level = self.alpha * value + (1 - self.alpha) * self.level
+            return
+        previous = self.level
+        self.level = self.alpha * value + (1 - self.alpha) * (previous + self.trend * elapsed)
+        self.trend = self.beta * (self.level - previous) / elapsed + (1 - self.beta) * self.trend
+        self.timestamp = timestamp
+
+    def forecast(self, horizon_seconds: float) -> Optional[float]:
+        """Expected value `horizon_seconds` after the last observation (never negative)"""
+        if self.level is None:
+            return None
+        return max(0.0, self.level + self.trend * horizon_seconds)
+
+    @classmethod
+    def fit(cls, series: List[Tuple[float, float]], alpha: float = DEFAULT_ALPHA, beta: float = DEFAULT_BETA) -> "HoltForecaster":
+        """Forecaster primed with a (timestamp, value) series, oldest first"""
+        forecaster = cls(alpha, beta)
+        for timestamp, value in series:
+            forecaster.update(timestamp, value)
+        return forecaster
+
+
+def load_series(replica_group: str, since: float, until: Optional[float] = None) -> List[Tuple[float, float, int]]:
+    """(timestamp, total CPU %, replicas) of a group from the metric history"""
+    return [
+        (timestamp, avg_cpu * replicas, replicas)
+        for timestamp, avg_cpu, replicas in metrics_store.group_series(replica_group, since, until, BUCKET_SECONDS)
+        if replicas
+    ]
+
+
+class ForecastRegistry:
+    """One online forecaster per replica group"""
+
+    def __init__(self):
+        self.forecasters: Dict[str, HoltForecaster] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, group_name: str, timestamp: float, total_cpu: float) -> HoltForecaster:
+        """Feed the group's latest total CPU load, seeding the forecaster from history first"""
+        with self._lock:
+            forecaster = self.forecasters.get(group_name)
+        if forecaster is None:
+            history = load_series(group_name, timestamp - SEED_HISTORY_SECONDS, timestamp)
+            forecaster = HoltForecaster.fit([(t, total) for t, total, _ in history])
+            logger.info(f"📈 Forecaster for '{group_name}' seeded with {len(history)} points")
+            with self._lock:
+                forecaster = self.forecasters.setdefault(group_name, forecaster)
+        forecaster.update(timestamp, total_cpu)
+        return forecaster
+
+    def drop(self, group_name: str):
+        with self._lock:
+            self.forecasters.pop(group_name, None)
+
+
+def backtest(
+    series: List[Tuple[float, float, int]],
+    threshold: float,
+    lead_time: float,
+    alpha: float = DEFAULT_ALPHA,
+    beta: float = DEFAULT_BETA
+) -> Dict:
+    """Replay a recorded (timestamp, total CPU %, replicas) series through both modes.
+
+    For every episode in which per-replica CPU crossed `threshold`, report when the
+    threshold mode would have reacted and how much earlier the forecast at
+    now + `lead_time` first exceeded the threshold. Forecast triggers not followed by
+    a crossing within `lead_time` are counted as false alarms.
+    """
+    forecaster = HoltForecaster(alpha, beta)
+    episodes = []
+    false_alarms = 0
+    above = False
+    predicted_at: Optional[float] = None
+
+    for timestamp, total_cpu, replicas in series:
+        forecaster.update(timestamp, total_cpu)
+        utilization = total_cpu / replicas
+
+        if predicted_at is not None and not above and timestamp - predicted_at > lead_time:
+            false_alarms += 1
+            predicted_at = None
+
+        if utilization > threshold:
+            if not above:
+                above = True
+                start = predicted_at if predicted_at is not None else timestamp
+                episodes.append({
+                    "reactive_at": timestamp,
+                    "predictive_at": start,
+                    "lead_seconds": round(timestamp - start, 1)
+                })
+                predicted_at = None
+            continue
+
+        above = False
+        if predicted_at is None and forecaster.observations > 1:
+            predicted = forecaster.forecast(lead_time)
+            if predicted is not None and predicted / replicas > threshold:
+                predicted_at = timestamp
+
+    leads = sorted(e["lead_seconds"] for e in episodes)
+    return {
+        "points": len(series),
+        "threshold": threshold,
+        "lead_time_seconds": lead_time,
+        "alpha": alpha,
+        "beta": beta,
+        "episodes": episodes,
+        "crossings": len(episodes),
+        "predicted_early": sum(1 for lead in leads if lead > 0),
+        "mean_lead_seconds": round(sum(leads) / len(leads), 1) if leads else 0.0,
+        "median_lead_seconds": leads[len(leads) // 2] if leads else 0.0,
+        "false_alarms": false_alarms
+    }
+
+
+# Global forecaster registry
+forecasts = ForecastRegistry()
@@ -0,0 +1,182 @@
+"""
+Background host resource sampler for IntelliScaleSim
+A single thread samples host CPU, memory, load, pressure and network into a
+ring buffer; request handlers and the autoscaler read from the buffer instead
+of calling psutil themselves.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+PSI_RESOURCES = ('cpu', 'memory', 'io')
+
+# Scale-ups are deferred while the host is above either limit
+ADMISSION_MAX_MEMORY_PERCENT = float(os.environ.get('INTELLISCALESIM_ADMISSION_MAX_MEMORY', '90'))
+ADMISSION_MAX_MEMORY_PRESSURE = float(os.environ.get('INTELLISCALESIM_ADMISSION_MAX_MEMORY_PSI', '20'))
+
+
+def read_pressure(resource: str) -> Dict[str, float]:
+    """Read avg10 values from /proc/pressure/<resource> (empty if PSI is unavailable)"""
+    values = {}
+    try:
+        with open(f'/proc/pressure/{resource}') as f:
+            for line in f:
+                kind, _, rest = line.partition(' ')
+                for field in rest.split():
+                    key, _, value = field.partition('=')
+                    if key == 'avg10':
+                        values[kind] = float(value)
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+class HostSample:
+    """One host-wide resource sample"""
+
+    __slots__ = (
+        'timestamp', 'cpu_percent', 'per_cpu', 'mem_percent', 'mem_available',
+        'load_avg', 'pressure', 'net_rx_rate', 'net_tx_rate'
+    )
+
+    def __init__(
+        self,
+        timestamp: float,
+        cpu_percent: float,
+        per_cpu: Tuple[float, ...],
+        mem_percent: float,
+        mem_available: int,
+        load_avg: Tuple[float, float, float],
+        pressure: Dict[str, Dict[str, float]],
+        net_rx_rate: float,
+        net_tx_rate: float
+    ):
+        self.timestamp = timestamp
+        self.cpu_percent = cpu_percent
+        self.per_cpu = per_cpu
+        self.mem_percent = mem_percent
+        self.mem_available = mem_available
+        self.load_avg = load_avg
+        self.pressure = pressure
+        self.net_rx_rate = net_rx_rate
+        self.net_tx_rate = net_tx_rate
+
+    def to_dict(self) -> Dict:
+        return {
+            "timestamp": self.timestamp,
+            "cpu_percent": round(self.cpu_percent, 2),
+            "per_cpu": [round(c, 2) for c in self.per_cpu],
+            "memory_percent": round(self.mem_percent, 2),
+            "memory_available_bytes": self.mem_available,
+            "load_avg": list(self.load_avg),
+            "pressure": self.pressure,
+            "network_rx_bytes_per_sec": round(self.net_rx_rate, 1),
+            "network_tx_bytes_per_sec": round(self.net_tx_rate, 1)
+        }
+
+
+class HostSampler:
+    """Samples the host on a background thread into a fixed-size ring buffer"""
+
+    def __init__(self, interval: float = 1.0, capacity: int = 600):
+        self.interval = interval
+        self.buffer: deque = deque(maxlen=capacity)
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_net = None
+
+    def start(self):
+        """Start the sampling thread"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            # Prime the non-blocking cpu_percent counters
+            psutil.cpu_percent(interval=None, percpu=True)
+            self.thread = threading.Thread(target=self._sampling_loop, daemon=True)
+            self.thread.start()
+        logger.info(f"✓ Host sampler started with {self.interval}s interval")
+
+    def stop(self):
+        """Stop the sampling thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def ensure_started(self):
+        if not self.running:
+            self.start()
+
+    def _sampling_loop(self):
+        while self.running:
+            try:
+                self.buffer.append(self._take_sample())
+            except Exception as e:
+                logger.error(f"Error sampling host resources: {e}")
+            time.sleep(self.interval)
+
+    def _take_sample(self) -> HostSample:
+        now = time.time()
+        per_cpu = tuple(psutil.cpu_percent(interval=None, percpu=True))
+        memory = psutil.virtual_memory()
+        try:
+            load_avg = os.getloadavg()
+        except OSError:
+            load_avg = (0.0, 0.0, 0.0)
+
+        net = psutil.net_io_counters()
+        rx_rate = tx_rate = 0.0
+        if self._last_net is not None:
+            last_time, last_rx, last_tx = self._last_net
+            elapsed = now - last_time
+            if elapsed > 0:
+                rx_rate = (net.bytes_recv - last_rx) / elapsed
+                tx_rate = (net.bytes_sent - last_tx) / elapsed
+        self._last_net = (now, net.bytes_recv, net.bytes_sent)
+
+        return HostSample(
+            timestamp=now,
+            cpu_percent=sum(per_cpu) / len(per_cpu) if per_cpu else 0.0,
+            per_cpu=per_cpu,
+            mem_percent=memory.percent,
+            mem_available=memory.available,
+            load_avg=tuple(load_avg),
+            pressure={resource: read_pressure(resource) for resource in PSI_RESOURCES},
+            net_rx_rate=rx_rate,
+            net_tx_rate=tx_rate
+        )
+
+    def latest(self) -> Optional[HostSample]:
+        """Most recent sample, starting the sampler if needed"""
+        self.ensure_started()
+        return self.buffer[-1] if self.buffer else None
+
+    def window(self, seconds: float) -> List[HostSample]:
+        """Samples from the last `seconds` seconds, oldest first"""
+        cutoff = time.time() - seconds
+        return [s for s in list(self.buffer) if s.timestamp >= cutoff]
+
+    def admit_scale_up(self) -> Tuple[bool, str]:
+        """Decide whether the host has headroom for another replica"""
+        sample = self.latest()
+        if sample is None:
+            return True, "no host sample yet"
+        if sample.mem_percent > ADMISSION_MAX_MEMORY_PERCENT:
+            return False, f"host memory {sample.mem_percent:.1f}% > {ADMISSION_MAX_MEMORY_PERCENT}%"
+        memory_pressure = sample.pressure.get('memory', {}).get('full', 0.0)
+        if memory_pressure > ADMISSION_MAX_MEMORY_PRESSURE:
+            return False, f"host memory pressure {memory_pressure:.1f} > {ADMISSION_MAX_MEMORY_PRESSURE}"
+        return True, "ok"
+
+
+# Global host sampler instance
+host_sampler = HostSampler()
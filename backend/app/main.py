@@ -1,10 +1,7 @@
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-import subprocess
-import socket
-import contextlib
 import time
 import os
 import shutil
@@ -13,7 +10,19 @@ from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATE
 from datetime import datetime
 
 # Import autoscaler
-from .autoscaler import autoscaler, ReplicaGroup, ScalingPolicy
+from .autoscaler import autoscaler, ReplicaGroup, ScalingPolicy, POLICY_TYPES, replica_bounds
+from .forecast import DEFAULT_ALPHA, DEFAULT_BETA, load_series, backtest
+from .simulator import SimulationModel, TracePoint, recorded_trace, load_pricing, simulate
+from .metrics import STATS_FORMAT, parse_stats_output
+from .export import ExportError, export_stream
+from .host_sampler import host_sampler
+from .sampler import container_sampler
+from .traffic import traffic, latency_prober
+from .proxy import proxies
+from .placement import placer
+from .admission import admission
+from .schedules import check_bounds, compile_actions
+from .runtime import run_docker_command, find_free_port, parse_memory_limit
 
 app = FastAPI(
     title="IntelliScaleSim API",
@@ -30,10 +39,6 @@ app.add_middleware(
 )
 
 
-# Port range for dynamic allocation
-SAFE_LOW_PORT = 20000
-SAFE_HIGH_PORT = 30000
-
 # Directory for temporary git clones
 TEMP_DIR = "/tmp/intelliscalesim_builds"
 os.makedirs(TEMP_DIR, exist_ok=True)
@@ -50,20 +55,6 @@ replica_groups_total = Gauge('intelliscalesim_replica_groups_total', 'Total repl
 autoscaling_events_total = Counter('intelliscalesim_autoscaling_events_total', 'Total autoscaling events', ['action'])
 
 
-def run_docker_command(args, capture_output=True, text=True, check=True):
-    """Run a docker command using subprocess."""
-    try:
-        result = subprocess.run(
-            ['docker'] + args,
-            capture_output=capture_output,
-            text=text,
-            check=check
-        )
-        return result.stdout.strip() if capture_output else None
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"Docker command failed: {e.stderr if e.stderr else str(e)}")
-
-
 def check_docker_connection():
     """Check if Docker is accessible."""
     try:
@@ -73,19 +64,6 @@ def check_docker_connection():
         return False
 
 
-def find_free_port() -> int:
-    """Find a free port in the safe range by attempting to bind to it."""
-    for port in range(SAFE_LOW_PORT, SAFE_HIGH_PORT):
-        with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            try:
-                s.bind(("0.0.0.0", port))
-                return port
-            except OSError:
-                continue
-    raise RuntimeError("No free port available in the safe range")
-
-
 def update_container_metrics():
     """Update Prometheus metrics with current container count."""
     try:
@@ -111,18 +89,79 @@ def add_deployment_history(deployment_type, details):
         deployment_history.pop(0)
 
 
-class DeployImageRequest(BaseModel):
+# Docker memory limit syntax, e.g. 512m or 1g
+MEMORY_LIMIT_PATTERN = r"^\d+(\.\d+)?[bkmgBKMG]?$"
+
+
+class ScheduledActionRequest(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z0-9_.-]{1,64}$", description="Unique name of the action within the group")
+    cron: str = Field(..., description="When the action fires: minute hour day-of-month month day-of-week, e.g. '50 9 * * 1-5'")
+    min_replicas: Optional[int] = Field(None, ge=0, le=20, description="min_replicas from this time on")
+    max_replicas: Optional[int] = Field(None, ge=1, le=20, description="max_replicas from this time on")
+    desired_replicas: Optional[int] = Field(None, ge=0, le=20, description="Scale to this many replicas once when the action fires")
+    timezone: Optional[str] = Field(None, description="IANA timezone of the cron expression (default: the host's local time)")
+
+
+class ScheduleRequest(BaseModel):
+    actions: List[ScheduledActionRequest] = Field(..., max_length=50, description="The group's scheduled actions (replaces the current ones)")
+
+
+# Settings of a ScalingPolicy (app.autoscaler), shared by deployments and simulations
+class ScalingPolicySettings(BaseModel):
+    min_replicas: Optional[int] = Field(1, ge=0, le=10, description="Minimum replicas (if autoscaling enabled); 0 scales to zero when idle")
+    max_replicas: Optional[int] = Field(5, ge=1, le=20, description="Maximum replicas (if autoscaling enabled)")
+    policy_type: Optional[str] = Field("threshold", description="Scaling policy type (threshold, fixed, predictive, target_tracking)")
+    cpu_scale_up_threshold: Optional[float] = Field(70.0, ge=0, le=100, description="Average CPU % above which the threshold policy adds a replica")
+    cpu_scale_down_threshold: Optional[float] = Field(30.0, ge=0, le=100, description="Average CPU % below which the threshold policy removes a replica")
+    memory_scale_up_threshold: Optional[float] = Field(None, ge=0, le=100, description="Average memory % above which the threshold policy adds a replica")
+    memory_scale_down_threshold: Optional[float] = Field(None, ge=0, le=100, description="Average memory % that must also hold before the threshold policy removes a replica")
+    cooldown_seconds: Optional[int] = Field(60, ge=0, le=3600, description="Seconds after a scaling action before the group may scale again")
+    evaluation_interval: Optional[int] = Field(None, ge=1, le=3600, description="Seconds between evaluations of the group (default: the autoscaler's check interval)")
+    drain_timeout_seconds: Optional[int] = Field(30, ge=0, le=600, description="Longest wait for a removed replica's in-flight requests before it is stopped")
+    scale_to_zero_after_seconds: Optional[int] = Field(300, ge=10, le=604800, description="With min_replicas=0: seconds without a request on the load balancer port before the group scales to zero")
+    lead_time_seconds: Optional[int] = Field(60, ge=0, le=3600, description="How far ahead the predictive policy looks")
+    target_cpu_utilization: Optional[float] = Field(50.0, gt=0, le=100, description="Per-replica CPU % the target_tracking policy aims for")
+    max_scale_up_step: Optional[int] = Field(None, ge=1, description="Most replicas added in one scaling decision")
+    max_scale_down_step: Optional[int] = Field(None, ge=1, description="Most replicas removed in one scaling decision")
+    smoothing_window: Optional[int] = Field(3, ge=1, le=60, description="Samples per replica the policy averages over")
+    smoothing: Optional[str] = Field("mean", pattern="^(mean|max)$", description="How each replica's window is reduced: mean or max")
+    scale_up_stabilization_seconds: Optional[int] = Field(0, ge=0, le=3600, description="Scale up only as far as the lowest recommendation in this window")
+    scale_down_stabilization_seconds: Optional[int] = Field(300, ge=0, le=3600, description="Scale down only as far as the highest recommendation in this window")
+    target_rps_per_replica: Optional[float] = Field(None, gt=0, description="Requests per second each replica should serve")
+    target_p95_latency_ms: Optional[float] = Field(None, gt=0, description="p95 response latency to stay under, in milliseconds")
+    latency_probe_path: Optional[str] = Field("/", pattern="^/", description="Path requested by the synthetic latency probes")
+    signal_combination: Optional[str] = Field("max", pattern="^(max|min)$", description="Combine CPU, request-rate and latency recommendations by max or min")
+    vertical_mode: Optional[str] = Field("off", pattern="^(off|vertical_first|horizontal_first|vertical_only)$", description="Resize replicas in place on CPU throttling and memory pressure, and which of resizing or adding replicas comes first")
+    min_cpu_quota: Optional[float] = Field(0.25, gt=0, description="Smallest CPU limit vertical scaling may set")
+    max_cpu_quota: Optional[float] = Field(2.0, gt=0, description="Largest CPU limit vertical scaling may set")
+    min_mem_limit: Optional[str] = Field("256m", pattern=MEMORY_LIMIT_PATTERN, description="Smallest memory limit vertical scaling may set")
+    max_mem_limit: Optional[str] = Field("2g", pattern=MEMORY_LIMIT_PATTERN, description="Largest memory limit vertical scaling may set")
+    cpu_throttle_threshold: Optional[float] = Field(0.2, gt=0, le=1, description="Fraction of CPU periods throttled that grows the CPU limit")
+    memory_pressure_threshold: Optional[float] = Field(10.0, gt=0, le=100, description="Memory pressure (PSI some avg10 %) that grows the memory limit")
+    memory_usage_threshold: Optional[float] = Field(90.0, gt=0, le=100, description="Memory % of the limit that grows the memory limit")
+    vertical_step: Optional[float] = Field(1.5, gt=1, description="Factor a limit grows or shrinks by per resize")
+    vertical_sustain_seconds: Optional[int] = Field(60, ge=0, le=3600, description="How long limit pressure must last before a limit grows")
+    scheduled_actions: Optional[List[ScheduledActionRequest]] = Field(None, max_length=50, description="Cron-style changes of min/max replicas and pre-scales")
+
+
+# Autoscaling options of a deployment: the policy plus how its replica group runs
+class AutoscalingOptions(ScalingPolicySettings):
+    enable_autoscaling: Optional[bool] = Field(False, description="Enable autoscaling for this deployment")
+    warm_pool_size: Optional[int] = Field(0, ge=0, le=10, description="Pre-created replicas kept ready for fast scale-out")
+    warm_pool_mode: Optional[str] = Field("stopped", pattern="^(stopped|paused)$", description="Keep warm replicas created-but-stopped or paused")
+    load_balancer: Optional[str] = Field("round_robin", pattern="^(round_robin|least_connections|power_of_two|none)$", description="Strategy of the group's load balancer on its stable port, or none")
+    placement: Optional[str] = Field("none", pattern="^(none|cpuset)$", description="Pin replicas to CPUs by host topology (cpuset) or leave them to the kernel scheduler (none)")
+
+
+class DeployImageRequest(AutoscalingOptions):
     image_name: str = Field(..., description="Docker image name (e.g., nginx:latest)")
     container_port: int = Field(80, ge=1, le=65535, description="Internal container port to expose")
     name: Optional[str] = Field(None, description="Optional custom name for the container")
     mem_limit: Optional[str] = Field("512m", description="Memory limit (e.g., 512m, 1g)")
     cpu_quota: Optional[float] = Field(0.5, description="CPU quota (0.5 = 50% of one core)")
-    enable_autoscaling: Optional[bool] = Field(False, description="Enable autoscaling for this deployment")
-    min_replicas: Optional[int] = Field(1, ge=1, le=10, description="Minimum replicas (if autoscaling enabled)")
-    max_replicas: Optional[int] = Field(5, ge=1, le=20, description="Maximum replicas (if autoscaling enabled)")
 
 
-class DeployGitRequest(BaseModel):
+class DeployGitRequest(AutoscalingOptions):
     repo_url: str = Field(..., description="Public GitHub repository URL")
     branch: Optional[str] = Field("main", description="Branch to clone")
     dockerfile_path: Optional[str] = Field("Dockerfile", description="Path to Dockerfile in repo")
@@ -130,9 +169,36 @@ class DeployGitRequest(BaseModel):
     name: Optional[str] = Field(None, description="Optional custom name for the container")
     mem_limit: Optional[str] = Field("512m", description="Memory limit")
     cpu_quota: Optional[float] = Field(0.5, description="CPU quota")
-    enable_autoscaling: Optional[bool] = Field(False, description="Enable autoscaling for this deployment")
-    min_replicas: Optional[int] = Field(1, ge=1, le=10, description="Minimum replicas (if autoscaling enabled)")
-    max_replicas: Optional[int] = Field(5, ge=1, le=20, description="Maximum replicas (if autoscaling enabled)")
+
+
+class SimulationPolicy(ScalingPolicySettings):
+    name: Optional[str] = Field(None, description="Name of the policy in the results")
+
+
+class SimulationRequest(BaseModel):
+    policies: List[SimulationPolicy] = Field(..., min_length=1, max_length=20, description="ScalingPolicy settings to compare, e.g. {\"policy_type\": \"target_tracking\"}")
+    trace: Optional[List[List[Optional[float]]]] = Field(None, description="Load points [timestamp, total CPU %, requests/s?, memory %?]")
+    replica_group: Optional[str] = Field(None, description="Replay this group's recorded CPU history instead of a trace")
+    history_hours: float = Field(1, gt=0, le=720, description="Hours of recorded history to replay")
+    check_interval: float = Field(30, gt=0, description="Seconds between controller sweeps")
+    sample_interval: float = Field(5, gt=0, description="Seconds between metric samples")
+    event_triggers: bool = Field(True, description="Evaluate on threshold crossings between sweeps")
+    start_latency_seconds: float = Field(5, ge=0, description="Cold start time of a new replica")
+    warm_pool_size: int = Field(0, ge=0, le=10, description="Warm replicas that start in warm_start_latency_seconds")
+    warm_start_latency_seconds: float = Field(1, ge=0)
+    capacity_rps_per_replica: float = Field(50, gt=0, description="Requests per second one replica can serve")
+    slo_cpu_utilization: float = Field(90, gt=0, description="Per-replica CPU demand above this violates the SLO")
+    slo_latency_ms: float = Field(500, gt=0, description="Modelled p95 latency above this violates the SLO")
+    cpu_quota: float = Field(0.5, gt=0, description="vCPUs billed per replica")
+    mem_limit_gb: float = Field(0.5, gt=0, description="Memory GB billed per replica")
+    provider: str = Field("AWS", pattern="^(?i:aws|gcp|azure)$", description="Cloud provider to price with")
+    include_timeline: bool = Field(True, description="Return the replica timeline of every run")
+
+
+class AdmissionConfigRequest(BaseModel):
+    rate_per_second: Optional[float] = Field(None, gt=0, description="Scaling docker operations admitted per second")
+    burst: Optional[float] = Field(None, ge=1, description="Operations admitted at once after a quiet period")
+    max_concurrent: Optional[int] = Field(None, ge=1, le=64, description="Scaling docker operations allowed in flight at once")
 
 
 class DeployResponse(BaseModel):
@@ -144,6 +210,7 @@ class DeployResponse(BaseModel):
     deployment_type: str
     autoscaling_enabled: bool = False
     replica_group: Optional[str] = None
+    proxy_port: Optional[int] = None
 
 
 class ContainerActionResponse(BaseModel):
@@ -154,14 +221,23 @@ class ContainerActionResponse(BaseModel):
 
 @app.on_event("startup")
 async def startup_event():
-    """Start the autoscaler on application startup"""
+    """Start the samplers and autoscaler on application startup"""
+    host_sampler.start()
+    container_sampler.start()
+    latency_prober.start()
+    # Re-adopt the replica groups that were running before the restart
+    autoscaler.restore()
     autoscaler.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Stop the autoscaler on application shutdown"""
+    """Stop the autoscaler and samplers on application shutdown"""
     autoscaler.stop()
+    proxies.stop()
+    latency_prober.stop()
+    container_sampler.stop()
+    host_sampler.stop()
 
 
 @app.get("/")
@@ -188,6 +264,9 @@ def root():
             "autoscaler_status": "/autoscaler/status",
             "autoscaler_events": "/autoscaler/events",
             "autoscaler_groups": "/autoscaler/groups",
+            "export": "/export/{dataset}",
+            "host_metrics": "/host/metrics",
+            "sampler_stats": "/sampler/stats",
             "metrics": "/metrics",
             "docs": "/docs"
         }
@@ -217,9 +296,103 @@ def metrics():
     return PlainTextResponse(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
+@app.get("/host/metrics")
+def host_metrics(window: int = Query(60, ge=1, le=600, description="Seconds of history to return")):
+    """Latest host resource sample plus recent history from the background sampler."""
+    latest = host_sampler.latest()
+    return {
+        "latest": latest.to_dict() if latest else None,
+        "history": [sample.to_dict() for sample in host_sampler.window(window)],
+        "interval": host_sampler.interval
+    }
+
+
+@app.get("/sampler/stats")
+def sampler_stats():
+    """Per-container sampling schedule and effective sampling rates."""
+    return container_sampler.get_stats()
+
+
+def check_vertical_bounds(req):
+    """Reject vertical scaling bounds that are inverted"""
+    if req.min_cpu_quota > req.max_cpu_quota:
+        raise HTTPException(status_code=400, detail="min_cpu_quota is above max_cpu_quota")
+    if parse_memory_limit(req.min_mem_limit) > parse_memory_limit(req.max_mem_limit):
+        raise HTTPException(status_code=400, detail="min_mem_limit is above max_mem_limit")
+
+
+def check_scale_to_zero(load_balancer: str, min_replicas: Optional[int], actions: List[dict]):
+    """A group scaled to zero is woken up by its load balancer, so it needs one,
+    whether min_replicas=0 is its own or set by a scheduled action"""
+    if load_balancer != "none":
+        return
+    if min_replicas == 0:
+        raise HTTPException(status_code=400, detail="min_replicas=0 needs a load balancer to activate the group on its first request")
+    for action in actions:
+        if action.get("min_replicas") == 0:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Scheduled action '{action['name']}' sets min_replicas=0, which needs a load balancer to activate the group on its first request"
+            )
+
+
+def scheduled_actions_of(actions: Optional[List[ScheduledActionRequest]]) -> List[dict]:
+    """Scheduled actions as stored in the policy; rejects bad cron expressions and timezones"""
+    specs = [action.model_dump(exclude_none=True) for action in actions or []]
+    try:
+        compile_actions(specs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return specs
+
+
+def check_schedule_bounds(actions: List[dict], min_replicas: int, max_replicas: int):
+    """Reject scheduled bounds that can leave min_replicas above max_replicas"""
+    try:
+        check_bounds(compile_actions(actions), min_replicas, max_replicas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def check_policy_settings(settings: ScalingPolicySettings):
+    """Reject policy settings the controller cannot run"""
+    if settings.policy_type not in POLICY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown policy type: {settings.policy_type}")
+    check_vertical_bounds(settings)
+    policy = _build_policy(settings, "")
+    check_schedule_bounds(policy.scheduled_actions, policy.min_replicas, policy.max_replicas)
+
+
+def _build_policy(settings: ScalingPolicySettings, name: str) -> ScalingPolicy:
+    """ScalingPolicy from validated settings; unset (None) settings keep the policy's defaults"""
+    values = settings.model_dump(include=set(ScalingPolicySettings.model_fields), exclude_none=True)
+    values.update(name=name, scheduled_actions=scheduled_actions_of(settings.scheduled_actions))
+    return ScalingPolicy.from_dict(values)
+
+
+def _build_group(req, name: str, image: str) -> ReplicaGroup:
+    """Replica group of an autoscaled deployment"""
+    return ReplicaGroup(
+        name=name,
+        image=image,
+        container_port=req.container_port,
+        policy=_build_policy(req, name),
+        mem_limit=req.mem_limit,
+        cpu_quota=req.cpu_quota,
+        warm_pool_size=req.warm_pool_size,
+        warm_pool_mode=req.warm_pool_mode,
+        load_balancer=req.load_balancer,
+        placement=req.placement
+    )
+
+
 @app.post("/deploy", response_model=DeployResponse)
 def deploy(req: DeployImageRequest):
     """Deploy a Docker container from an image with optional autoscaling."""
+    if req.enable_autoscaling:
+        check_policy_settings(req)
+        check_scale_to_zero(req.load_balancer, req.min_replicas, scheduled_actions_of(req.scheduled_actions))
+    
     # Pull the Docker image
     try:
         print(f"Pulling image: {req.image_name}")
@@ -238,6 +411,7 @@ def deploy(req: DeployImageRequest):
     # Prepare container name
     container_name = req.name if req.name else None
     replica_group_name = None
+    proxy_port = None
     
     # Build docker run command
     docker_args = [
@@ -252,20 +426,7 @@ def deploy(req: DeployImageRequest):
     if req.enable_autoscaling:
         # Create replica group
         replica_group_name = container_name if container_name else f"group-{int(time.time())}"
-        policy = ScalingPolicy(
-            name=replica_group_name,
-            min_replicas=req.min_replicas,
-            max_replicas=req.max_replicas
-        )
-        group = ReplicaGroup(
-            name=replica_group_name,
-            image=req.image_name,
-            container_port=req.container_port,
-            policy=policy,
-            mem_limit=req.mem_limit,
-            cpu_quota=req.cpu_quota
-        )
-        autoscaler.register_replica_group(group)
+        group = _build_group(req, replica_group_name, req.image_name)
         docker_args.extend(['--label', f'replica_group={replica_group_name}'])
         container_name = f"{replica_group_name}-replica-1"
     
@@ -286,9 +447,12 @@ def deploy(req: DeployImageRequest):
             inspect_output = run_docker_command(['inspect', '--format', '{{.Name}}', container_id])
             container_name = inspect_output.strip('/').strip()
         
-        # Add to replica group if autoscaling enabled
+        # Register the replica group once its first replica is running, so the
+        # autoscaler never sees it empty and starts a duplicate
         if req.enable_autoscaling and replica_group_name:
+            autoscaler.register_replica_group(group)
             autoscaler.add_replica_to_group(replica_group_name, container_id, host_port)
+            proxy_port = group.proxy_port
         
         # Add to history
         add_deployment_history("image", {
@@ -309,10 +473,11 @@ def deploy(req: DeployImageRequest):
         container_id=container_id[:12],
         container_name=container_name,
         host_port=host_port,
-        url=f"http://localhost:{host_port}",
+        url=f"http://localhost:{proxy_port or host_port}",
         deployment_type="image",
         autoscaling_enabled=req.enable_autoscaling,
-        replica_group=replica_group_name
+        replica_group=replica_group_name,
+        proxy_port=proxy_port
     )
 
 
@@ -321,6 +486,10 @@ def deploy_git(req: DeployGitRequest):
     """Deploy from GitHub repository with Dockerfile and optional autoscaling."""
     import git
     
+    if req.enable_autoscaling:
+        check_policy_settings(req)
+        check_scale_to_zero(req.load_balancer, req.min_replicas, scheduled_actions_of(req.scheduled_actions))
+    
     # Generate unique build directory
     build_id = f"build_{int(time.time())}"
     build_path = os.path.join(TEMP_DIR, build_id)
@@ -361,6 +530,7 @@ def deploy_git(req: DeployGitRequest):
         # Prepare container name
         container_name = req.name if req.name else None
         replica_group_name = None
+        proxy_port = None
         
         # Run container
         docker_args = [
@@ -376,20 +546,7 @@ def deploy_git(req: DeployGitRequest):
         if req.enable_autoscaling:
             # Create replica group
             replica_group_name = container_name if container_name else f"github-group-{int(time.time())}"
-            policy = ScalingPolicy(
-                name=replica_group_name,
-                min_replicas=req.min_replicas,
-                max_replicas=req.max_replicas
-            )
-            group = ReplicaGroup(
-                name=replica_group_name,
-                image=image_tag,
-                container_port=req.container_port,
-                policy=policy,
-                mem_limit=req.mem_limit,
-                cpu_quota=req.cpu_quota
-            )
-            autoscaler.register_replica_group(group)
+            group = _build_group(req, replica_group_name, image_tag)
             docker_args.extend(['--label', f'replica_group={replica_group_name}'])
             container_name = f"{replica_group_name}-replica-1"
         
@@ -409,9 +566,11 @@ def deploy_git(req: DeployGitRequest):
                 inspect_output = run_docker_command(['inspect', '--format', '{{.Name}}', container_id])
                 container_name = inspect_output.strip('/').strip()
             
-            # Add to replica group if autoscaling enabled
+            # Register the replica group once its first replica is running
             if req.enable_autoscaling and replica_group_name:
+                autoscaler.register_replica_group(group)
                 autoscaler.add_replica_to_group(replica_group_name, container_id, host_port)
+                proxy_port = group.proxy_port
             
             # Add to history
             add_deployment_history("github", {
@@ -437,10 +596,11 @@ def deploy_git(req: DeployGitRequest):
             container_id=container_id[:12],
             container_name=container_name,
             host_port=host_port,
-            url=f"http://localhost:{host_port}",
+            url=f"http://localhost:{proxy_port or host_port}",
             deployment_type="github",
             autoscaling_enabled=req.enable_autoscaling,
-            replica_group=replica_group_name
+            replica_group=replica_group_name,
+            proxy_port=proxy_port
         )
         
     except HTTPException:
@@ -503,20 +663,15 @@ def container_stats(container_id: str):
     try:
         # Get stats (one-shot, no stream)
         stats_output = run_docker_command([
-            'stats', container_id, '--no-stream', '--format',
-            '{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}|{{.BlockIO}}'
+            'stats', container_id, '--no-stream', '--format', STATS_FORMAT
         ])
         
-        parts = stats_output.split('|')
+        samples = parse_stats_output(stats_output)
+        if not samples:
+            raise Exception("no stats returned")
+        sample = next(iter(samples.values()))
         
-        return {
-            "container_id": container_id,
-            "cpu_percent": parts[0],
-            "memory_usage": parts[1],
-            "network_io": parts[2],
-            "block_io": parts[3],
-            "timestamp": time.time()
-        }
+        return {**sample.to_dict(), "container_id": container_id}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Container not found or stats unavailable: {str(e)}")
 
@@ -605,10 +760,23 @@ def get_autoscaler_status():
 
 @app.get("/autoscaler/events")
 def get_autoscaler_events(limit: int = Query(50, ge=1, le=200)):
-    """Get recent autoscaling events."""
+    """Get recent autoscaling events, with per-phase timings of scaling actions."""
+    events = autoscaler.get_scaling_events(limit)
+    
+    # Mean seconds spent in each phase over the returned actions, to spot the slowest one
+    phase_totals = {}
+    for event in events:
+        for phase, seconds in event.get("timings", {}).get("durations", {}).items():
+            phase_totals.setdefault(phase, []).append(seconds)
+    phase_summary = {
+        phase: {"count": len(values), "mean_seconds": round(sum(values) / len(values), 4), "max_seconds": max(values)}
+        for phase, values in phase_totals.items()
+    }
+    
     return {
-        "events": autoscaler.get_scaling_events(limit),
-        "total": len(autoscaler.scaling_events)
+        "events": events,
+        "total": len(autoscaler.scaling_events),
+        "phase_summary": phase_summary
     }
 
 
@@ -625,11 +793,52 @@ def get_replica_groups():
             "replica_ids": [rid[:12] for rid in group.replicas],
             "ports": group.ports,
             "policy": {
+                "policy_type": group.policy.policy_type,
                 "min_replicas": group.policy.min_replicas,
                 "max_replicas": group.policy.max_replicas,
                 "cpu_scale_up_threshold": group.policy.cpu_scale_up_threshold,
                 "cpu_scale_down_threshold": group.policy.cpu_scale_down_threshold,
-                "cooldown_seconds": group.policy.cooldown_seconds
+                "cooldown_seconds": group.policy.cooldown_seconds,
+                "evaluation_interval": autoscaler.evaluation_interval(group),
+                "drain_timeout_seconds": group.policy.drain_timeout_seconds,
+                "scale_to_zero_after_seconds": group.policy.scale_to_zero_after_seconds,
+                "scheduled_actions": group.policy.scheduled_actions,
+                "lead_time_seconds": group.policy.lead_time_seconds,
+                "target_cpu_utilization": group.policy.target_cpu_utilization,
+                "max_scale_up_step": group.policy.max_scale_up_step,
+                "max_scale_down_step": group.policy.max_scale_down_step,
+                "smoothing_window": group.policy.smoothing_window,
+                "smoothing": group.policy.smoothing,
+                "scale_up_stabilization_seconds": group.policy.scale_up_stabilization_seconds,
+                "scale_down_stabilization_seconds": group.policy.scale_down_stabilization_seconds,
+                "target_rps_per_replica": group.policy.target_rps_per_replica,
+                "target_p95_latency_ms": group.policy.target_p95_latency_ms,
+                "latency_probe_path": group.policy.latency_probe_path,
+                "signal_combination": group.policy.signal_combination
+            },
+            "signals": traffic.group_stats(group.name, list(group.replicas)).to_dict(),
+            "load_balancer": {
+                "strategy": group.load_balancer,
+                "port": group.proxy_port,
+                **(proxies.stats(group.name) or {})
+            },
+            "placement": group.placement,
+            "vertical": {
+                "mode": group.policy.vertical_mode,
+                "cpu_quota": group.cpu_quota,
+                "mem_limit": group.mem_limit,
+                "cpu_bounds": [group.policy.min_cpu_quota, group.policy.max_cpu_quota],
+                "mem_bounds": [group.policy.min_mem_limit, group.policy.max_mem_limit],
+                "pressure_since": {key: datetime.fromtimestamp(ts).isoformat() for key, ts in group.vertical_pressure.items()}
+            },
+            "oscillations": group.oscillations,
+            "warm_pool": {
+                "size": group.warm_pool_size,
+                "mode": group.warm_pool_mode,
+                "ready": len(group.warm_pool),
+                "pending": group.warm_pool_pending,
+                "replica_ids": [cid[:12] for cid, _ in group.warm_pool],
+                "ports": [port for _, port in group.warm_pool]
             },
             "created_at": group.created_at.isoformat()
         })
@@ -640,6 +849,141 @@ def get_replica_groups():
     }
 
 
+@app.get("/autoscaler/placement")
+def get_cpu_placement():
+    """Get the host CPU topology and the CPUs each pinned replica runs on."""
+    return placer.report()
+
+
+@app.get("/autoscaler/admission")
+def get_action_admission():
+    """Get the scaling action rate limits, the running actions and the admission queue."""
+    return admission.get_stats()
+
+
+@app.post("/autoscaler/admission")
+def configure_action_admission(req: AdmissionConfigRequest):
+    """Change the scaling action rate limit and concurrency cap."""
+    admission.configure(req.rate_per_second, req.burst, req.max_concurrent)
+    return admission.get_stats()
+
+
+def schedule_of(group) -> dict:
+    """Scheduled actions of a group with their last and next firing, and the bounds in force"""
+    now = time.time()
+    low, high, sources = replica_bounds(group.policy, now)
+    actions = []
+    for action in compile_actions(group.policy.scheduled_actions):
+        fired, upcoming = action.previous(now), action.next_after(now)
+        actions.append({
+            **action.to_dict(),
+            "last_fired": datetime.fromtimestamp(fired).isoformat() if fired else None,
+            "next_fire": datetime.fromtimestamp(upcoming).isoformat() if upcoming else None
+        })
+    return {
+        "group": group.name,
+        "min_replicas": low,
+        "max_replicas": high,
+        "bounds_from": sources,
+        "actions": actions
+    }
+
+
+@app.get("/autoscaler/groups/{group_name}/schedule")
+def get_group_schedule(group_name: str):
+    """Get a group's scheduled actions, when they fire, and the replica bounds in force."""
+    group = autoscaler.replica_groups.get(group_name)
+    if group is None:
+        raise HTTPException(status_code=404, detail=f"Replica group {group_name} not found")
+    return schedule_of(group)
+
+
+@app.post("/autoscaler/groups/{group_name}/schedule")
+def set_group_schedule(group_name: str, req: ScheduleRequest):
+    """Replace a group's scheduled actions; bounds already in force apply right away."""
+    group = autoscaler.replica_groups.get(group_name)
+    if group is None:
+        raise HTTPException(status_code=404, detail=f"Replica group {group_name} not found")
+    actions = scheduled_actions_of(req.actions)
+    check_schedule_bounds(actions, group.policy.min_replicas, group.policy.max_replicas)
+    check_scale_to_zero(group.load_balancer, group.policy.min_replicas, actions)
+    autoscaler.set_scheduled_actions(group_name, actions)
+    return schedule_of(group)
+
+
+@app.get("/autoscaler/groups/{group_name}/backtest")
+def backtest_replica_group(
+    group_name: str,
+    hours: float = Query(24, gt=0, le=720, description="Hours of recorded history to replay"),
+    lead_time: Optional[int] = Query(None, ge=0, le=3600, description="Forecast horizon (default: the group's policy)"),
+    threshold: Optional[float] = Query(None, gt=0, description="CPU scale-up threshold (default: the group's policy)"),
+    alpha: float = Query(DEFAULT_ALPHA, gt=0, le=1, description="Level smoothing factor"),
+    beta: float = Query(DEFAULT_BETA, gt=0, le=1, description="Trend smoothing factor")
+):
+    """Replay a group's recorded metrics and report how early the predictive policy would have acted."""
+    group = autoscaler.replica_groups.get(group_name)
+    if lead_time is None:
+        lead_time = group.policy.lead_time_seconds if group else 60
+    if threshold is None:
+        threshold = group.policy.cpu_scale_up_threshold if group else 70.0
+    
+    now = time.time()
+    series = load_series(group_name, now - hours * 3600, now)
+    if not series:
+        raise HTTPException(status_code=404, detail=f"No recorded metrics for replica group {group_name}")
+    
+    return {"group": group_name, **backtest(series, threshold, lead_time, alpha, beta)}
+
+
+@app.post("/autoscaler/simulate")
+def simulate_policies(req: SimulationRequest):
+    """Replay a trace through one or more scaling policies offline and compare replicas, SLO violations and cost."""
+    if req.trace:
+        try:
+            trace = [TracePoint.parse(point) for point in req.trace]
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid trace point: {e}")
+    elif req.replica_group:
+        now = time.time()
+        trace = recorded_trace(req.replica_group, now - req.history_hours * 3600, now)
+        if not trace:
+            raise HTTPException(status_code=404, detail=f"No recorded metrics for replica group {req.replica_group}")
+    else:
+        raise HTTPException(status_code=400, detail="Provide a trace or a replica_group to replay")
+
+    policies = []
+    for index, settings in enumerate(req.policies):
+        check_policy_settings(settings)
+        policies.append(_build_policy(settings, settings.name or f"policy-{index + 1}"))
+
+    model = SimulationModel(
+        check_interval=req.check_interval,
+        sample_interval=req.sample_interval,
+        start_latency_seconds=req.start_latency_seconds,
+        warm_start_latency_seconds=req.warm_start_latency_seconds,
+        warm_pool_size=req.warm_pool_size,
+        event_triggers=req.event_triggers,
+        capacity_rps_per_replica=req.capacity_rps_per_replica,
+        slo_cpu_utilization=req.slo_cpu_utilization,
+        slo_latency_ms=req.slo_latency_ms,
+        cpu_quota=req.cpu_quota,
+        mem_limit_gb=req.mem_limit_gb,
+        provider=req.provider
+    )
+    try:
+        pricing = load_pricing(model.provider)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = []
+    for policy in policies:
+        result = simulate(policy, trace, model, pricing)
+        if not req.include_timeline:
+            result.pop("timeline")
+        results.append(result)
+    return {"trace_points": len(trace), "pricing": pricing, "results": results}
+
+
 @app.post("/autoscaler/start")
 def start_autoscaler():
     """Start the autoscaler."""
@@ -653,3 +997,33 @@ def stop_autoscaler():
     autoscaler.stop()
     return {"message": "Autoscaler stopped", "running": autoscaler.running}
 
+
+# ===== EXPORT ENDPOINTS =====
+
+@app.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="csv or arrow (Arrow IPC stream, requires pyarrow)"),
+    replica_group: Optional[str] = Query(None, description="Only rows for this replica group"),
+    container: Optional[str] = Query(None, description="Only rows for this container ID or name"),
+    start: Optional[datetime] = Query(None, description="Start of the time range (inclusive)"),
+    end: Optional[datetime] = Query(None, description="End of the time range (exclusive)")
+):
+    """Stream recorded metrics, scaling events, load tests or load test samples as a file download."""
+    try:
+        export = export_stream(
+            dataset,
+            format,
+            group=replica_group,
+            container=container,
+            since=start.timestamp() if start else None,
+            until=end.timestamp() if end else None
+        )
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        export["body"],
+        media_type=export["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{export["filename"]}"'}
+    )
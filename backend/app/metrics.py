@@ -0,0 +1,243 @@
+"""
+Container metrics representation for IntelliScaleSim
+Parses `docker stats` output once into compact numeric samples
+"""
+
+import json
+import time
+import subprocess
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Format string for `docker stats` - one JSON object per container per line
+STATS_FORMAT = '{{json .}}'
+
+# Multipliers for the unit suffixes printed by the docker CLI
+_UNITS = {
+    '': 1,
+    'b': 1,
+    'kb': 1000,
+    'mb': 1000 ** 2,
+    'gb': 1000 ** 3,
+    'tb': 1000 ** 4,
+    'kib': 1024,
+    'mib': 1024 ** 2,
+    'gib': 1024 ** 3,
+    'tib': 1024 ** 4,
+}
+
+_BINARY_SIZES = ['B', 'KiB', 'MiB', 'GiB', 'TiB']
+_DECIMAL_SIZES = ['B', 'kB', 'MB', 'GB', 'TB']
+
+
+def parse_percent(value) -> float:
+    """Parse a percentage such as '3.4%' into a float (0.0 if unparseable)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return 0.0
+    try:
+        return float(value.strip().rstrip('%'))
+    except ValueError:
+        return 0.0
+
+
+def parse_size(value) -> int:
+    """Parse a size such as '12.5MiB' or '1.2kB' into bytes (0 if unparseable)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not value:
+        return 0
+    value = value.strip()
+    # Split at the first character that cannot be part of the number
+    i = 0
+    for i, ch in enumerate(value):
+        if not (ch.isdigit() or ch == '.'):
+            break
+    else:
+        i = len(value)
+    try:
+        number = float(value[:i])
+    except ValueError:
+        return 0
+    return int(number * _UNITS.get(value[i:].strip().lower(), 1))
+
+
+def parse_pair(value) -> Tuple[int, int]:
+    """Parse an 'a / b' pair such as '12.5MiB / 1GiB' into two byte counts"""
+    if not value or '/' not in value:
+        return 0, 0
+    left, right = value.split('/', 1)
+    return parse_size(left), parse_size(right)
+
+
+def format_size(num_bytes: float, binary: bool = True) -> str:
+    """Format a byte count the way the docker CLI does (e.g. '12.5MiB')"""
+    sizes = _BINARY_SIZES if binary else _DECIMAL_SIZES
+    k = 1024 if binary else 1000
+    value = float(num_bytes)
+    i = 0
+    while value >= k and i < len(sizes) - 1:
+        value /= k
+        i += 1
+    return f"{round(value, 2):g}{sizes[i]}"
+
+
+class ContainerSample:
+    """One point-in-time resource sample of a container, stored as raw numbers"""
+
+    # Numeric fields, in the order used by as_row() / SampleColumns
+    FIELDS = (
+        'timestamp',
+        'cpu_percent',
+        'mem_percent',
+        'mem_usage',
+        'mem_limit',
+        'net_rx',
+        'net_tx',
+        'block_read',
+        'block_write',
+        'pids',
+    )
+
+    __slots__ = ('container_id', 'name') + FIELDS
+
+    def __init__(
+        self,
+        container_id: str,
+        name: str = "",
+        timestamp: Optional[float] = None,
+        cpu_percent: float = 0.0,
+        mem_percent: float = 0.0,
+        mem_usage: int = 0,
+        mem_limit: int = 0,
+        net_rx: int = 0,
+        net_tx: int = 0,
+        block_read: int = 0,
+        block_write: int = 0,
+        pids: int = 0
+    ):
+        self.container_id = container_id
+        self.name = name
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.cpu_percent = cpu_percent
+        self.mem_percent = mem_percent
+        self.mem_usage = mem_usage
+        self.mem_limit = mem_limit
+        self.net_rx = net_rx
+        self.net_tx = net_tx
+        self.block_read = block_read
+        self.block_write = block_write
+        self.pids = pids
+
+    @classmethod
+    def from_stats(cls, stat: Dict, timestamp: Optional[float] = None) -> "ContainerSample":
+        """Build a sample from one `docker stats --format '{{json .}}'` object"""
+        mem_usage, mem_limit = parse_pair(stat.get('MemUsage'))
+        net_rx, net_tx = parse_pair(stat.get('NetIO'))
+        block_read, block_write = parse_pair(stat.get('BlockIO'))
+        try:
+            pids = int(stat.get('PIDs') or 0)
+        except ValueError:
+            pids = 0
+        return cls(
+            container_id=(stat.get('ID') or stat.get('Container') or '')[:12],
+            name=stat.get('Name', ''),
+            timestamp=timestamp,
+            cpu_percent=parse_percent(stat.get('CPUPerc')),
+            mem_percent=parse_percent(stat.get('MemPerc')),
+            mem_usage=mem_usage,
+            mem_limit=mem_limit,
+            net_rx=net_rx,
+            net_tx=net_tx,
+            block_read=block_read,
+            block_write=block_write,
+            pids=pids
+        )
+
+    def as_row(self) -> Tuple:
+        """Numeric fields as a tuple, in FIELDS order"""
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def to_dict(self) -> Dict:
+        """JSON-ready representation; only used at the API edge"""
+        return {
+            "container_id": self.container_id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "cpu_percent": round(self.cpu_percent, 2),
+            "memory_percent": round(self.mem_percent, 2),
+            "memory_usage_bytes": self.mem_usage,
+            "memory_limit_bytes": self.mem_limit,
+            "network_rx_bytes": self.net_rx,
+            "network_tx_bytes": self.net_tx,
+            "block_read_bytes": self.block_read,
+            "block_write_bytes": self.block_write,
+            "pids": self.pids
+        }
+
+    def __repr__(self):
+        return f"ContainerSample({self.container_id}, cpu={self.cpu_percent}%, mem={self.mem_percent}%)"
+
+
+class SampleColumns:
+    """Column-oriented buffer of samples, one typed array per numeric field"""
+
+    __slots__ = ('container_ids', 'columns')
+
+    def __init__(self, samples: Iterable[ContainerSample] = ()):
+        self.container_ids: List[str] = []
+        self.columns: Dict[str, array] = {field: array('d') for field in ContainerSample.FIELDS}
+        for sample in samples:
+            self.append(sample)
+
+    def append(self, sample: ContainerSample):
+        self.container_ids.append(sample.container_id)
+        for field, value in zip(ContainerSample.FIELDS, sample.as_row()):
+            self.columns[field].append(value)
+
+    def column(self, field: str) -> array:
+        return self.columns[field]
+
+    def __len__(self):
+        return len(self.container_ids)
+
+
+def parse_stats_output(output: str, timestamp: Optional[float] = None) -> Dict[str, ContainerSample]:
+    """Parse multi-line `docker stats` JSON output into samples keyed by short ID"""
+    timestamp = timestamp if timestamp is not None else time.time()
+    samples = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            sample = ContainerSample.from_stats(json.loads(line), timestamp)
+        except (ValueError, AttributeError) as e:
+            logger.debug(f"Skipping unparseable stats line: {e}")
+            continue
+        samples[sample.container_id] = sample
+    return samples
+
+
+def read_samples(container_ids: List[str], timeout: int = 10) -> Dict[str, ContainerSample]:
+    """Sample the given containers with a single `docker stats` call"""
+    if not container_ids:
+        return {}
+    try:
+        result = subprocess.run(
+            ['docker', 'stats', '--no-stream', '--format', STATS_FORMAT] + list(container_ids),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except Exception as e:
+        logger.debug(f"docker stats failed: {e}")
+        return {}
+    if result.returncode != 0 and not result.stdout:
+        logger.debug(f"docker stats failed: {result.stderr.strip()}")
+        return {}
+    return parse_stats_output(result.stdout)
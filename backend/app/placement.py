@@ -0,0 +1,304 @@
+"""
+CPU-topology-aware replica placement for IntelliScaleSim
+Pins replicas of groups in cpuset placement mode to CPUs with --cpuset-cpus,
+from the host topology in /sys/devices/system (cores, hyperthread siblings,
+NUMA nodes). Replicas of a scaling group are spread over separate physical
+cores; single-replica apps are packed together so whole cores stay free.
+"""
+
+import os
+import glob
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+SYSFS_ROOT = os.environ.get('INTELLISCALESIM_SYSFS_ROOT', '/sys')
+
+# CPU quota one logical CPU can carry before a packed placement spills onto the next one
+CPU_CAPACITY = 1.0
+
+cpu_allocated = Gauge('intelliscalesim_placement_cpu_allocated', 'CPU quota pinned to a logical CPU', ['cpu'])
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """Expand a kernel CPU list such as '0-3,8,10-11'"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        low, _, high = part.partition('-')
+        cpus.extend(range(int(low), int(high or low) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus) -> str:
+    """Compress CPU numbers into a kernel CPU list ('0-3,8')"""
+    ranges: List[List[int]] = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+
+class CpuTopology:
+    """Logical CPUs of the host with their physical core and NUMA node"""
+
+    def __init__(self, cpus: List[int], core_of: Dict[int, Tuple[int, int]], node_of: Dict[int, int], source: str):
+        self.cpus = sorted(cpus)
+        self.core_of = core_of  # CPU -> (package, core ID); hyperthread siblings share it
+        self.node_of = node_of
+        self.source = source
+        self.nodes: Dict[int, List[int]] = {}
+        for cpu in self.cpus:
+            self.nodes.setdefault(node_of.get(cpu, 0), []).append(cpu)
+        self.siblings: Dict[Tuple[int, int], List[int]] = {}
+        for cpu in self.cpus:
+            self.siblings.setdefault(core_of[cpu], []).append(cpu)
+
+    @classmethod
+    def read(cls, root: str = SYSFS_ROOT) -> "CpuTopology":
+        """Read the topology from sysfs; without it, every CPU counts as its own core on node 0"""
+        base = os.path.join(root, 'devices', 'system')
+        try:
+            with open(os.path.join(base, 'cpu', 'online')) as f:
+                cpus = parse_cpu_list(f.read())
+            core_of = {}
+            for cpu in cpus:
+                topology = os.path.join(base, 'cpu', f'cpu{cpu}', 'topology')
+                with open(os.path.join(topology, 'core_id')) as f:
+                    core = int(f.read())
+                with open(os.path.join(topology, 'physical_package_id')) as f:
+                    package = int(f.read())
+                core_of[cpu] = (package, core)
+        except (OSError, ValueError) as e:
+            count = os.cpu_count() or 1
+            logger.warning(f"CPU topology unavailable ({e}); assuming {count} independent CPUs")
+            return cls(list(range(count)), {cpu: (0, cpu) for cpu in range(count)}, {}, "fallback")
+        node_of = {}
+        for path in glob.glob(os.path.join(base, 'node', 'node[0-9]*', 'cpulist')):
+            node = int(os.path.basename(os.path.dirname(path))[4:])
+            try:
+                with open(path) as f:
+                    node_of.update((cpu, node) for cpu in parse_cpu_list(f.read()))
+            except (OSError, ValueError):
+                continue
+        return cls(cpus, core_of, node_of, "sysfs")
+
+
+class Placement:
+    """CPUs assigned to one replica"""
+
+    __slots__ = ('group', 'quota', 'single', 'cpus', 'applied')
+
+    def __init__(self, group: str, quota: float, single: bool, cpus: Tuple[int, ...], applied: bool):
+        self.group = group
+        self.quota = quota
+        self.single = single  # Part of a single-replica app: packed instead of spread
+        self.cpus = cpus
+        self.applied = applied  # Whether the container already runs with `cpus`
+
+
+class CpusetPlacer:
+    """Assigns cpusets to replicas and keeps them balanced as replicas come and go"""
+
+    def __init__(self, root: str = SYSFS_ROOT):
+        self.root = root
+        self._topology: Optional[CpuTopology] = None
+        # Container ID (or replica name until the container exists) -> placement
+        self.placements: Dict[str, Placement] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def topology(self) -> CpuTopology:
+        if self._topology is None:
+            self._topology = CpuTopology.read(self.root)
+            logger.info(f"🧩 CPU topology: {len(self._topology.cpus)} CPUs, {len(self._topology.siblings)} cores, {len(self._topology.nodes)} NUMA nodes ({self._topology.source})")
+        return self._topology
+
+    # ----- allocation -----
+
+    def _loads(self, placements) -> Dict[int, float]:
+        loads = {cpu: 0.0 for cpu in self.topology.cpus}
+        for placement in placements:
+            for cpu in placement.cpus:
+                loads[cpu] += placement.quota / len(placement.cpus)
+        return loads
+
+    def _choose(self, quota: float, single: bool, loads: Dict[int, float], group_cores: set) -> Tuple[int, ...]:
+        """CPUs for one replica, all on one NUMA node: ceil(quota) of them"""
+        topology = self.topology
+        width = max(1, math.ceil(quota))
+        share = quota / width
+
+        def core_load(cpu: int) -> float:
+            return sum(loads[sibling] for sibling in topology.siblings[topology.core_of[cpu]])
+
+        if single:
+            # Best fit: the fullest CPUs that still have room, so single-replica apps share cores
+            def rank(cpu: int):
+                return loads[cpu] + share > CPU_CAPACITY, -loads[cpu], cpu
+        else:
+            # Spread: cores the group does not use yet, then the least loaded core and CPU
+            def rank(cpu: int):
+                return topology.core_of[cpu] in group_cores, core_load(cpu), loads[cpu], cpu
+
+        best, best_key = None, None
+        for cpus in topology.nodes.values():
+            if len(cpus) < width:
+                continue
+            chosen = sorted(cpus, key=rank)[:width]
+            key = [rank(cpu) for cpu in chosen]
+            if best_key is None or key < best_key:
+                best, best_key = chosen, key
+        if best is None:
+            # Wider than any NUMA node: take the least loaded CPUs anywhere
+            best = sorted(topology.cpus, key=lambda cpu: (loads[cpu], cpu))[:width]
+        return tuple(sorted(best))
+
+    def _group_cores(self, group: str, placements) -> set:
+        return {self.topology.core_of[cpu] for p in placements if p.group == group for cpu in p.cpus}
+
+    def reserve(self, key: str, group: str, quota: float, single: bool) -> str:
+        """Pick CPUs for a replica about to be created with them; returns the --cpuset-cpus value"""
+        with self._lock:
+            others = list(self.placements.values())
+            cpus = self._choose(quota, single, self._loads(others), self._group_cores(group, others))
+            self.placements[key] = Placement(group, quota, single, cpus, applied=True)
+        self._update_gauges()
+        return format_cpu_list(cpus)
+
+    def bind(self, key: str, container_id: str):
+        """Re-key a reservation to the container created from it"""
+        with self._lock:
+            placement = self.placements.pop(key, None)
+            if placement is not None:
+                self.placements[container_id[:12]] = placement
+
+    def track(self, container_id: str, group: str, quota: float, single: bool):
+        """Give a running replica that has no placement yet (restored, adopted, warm) its CPUs"""
+        with self._lock:
+            if container_id[:12] in self.placements:
+                return
+            others = list(self.placements.values())
+            cpus = self._choose(quota, single, self._loads(others), self._group_cores(group, others))
+            self.placements[container_id[:12]] = Placement(group, quota, single, cpus, applied=False)
+        self._update_gauges()
+
+    def release(self, container_id: str):
+        """A replica went away; the remaining ones are rebalanced by the next rebalance()"""
+        self.cancel(container_id[:12])
+
+    def cancel(self, key: str):
+        """Drop a reservation whose container was never created"""
+        with self._lock:
+            placement = self.placements.pop(key, None)
+        if placement is not None:
+            self._update_gauges()
+
+    def set_quota(self, group: str, quota: float):
+        """A group's replicas were resized; their CPU counts are reconsidered by the next rebalance"""
+        with self._lock:
+            for placement in self.placements.values():
+                if placement.group == group:
+                    placement.quota = quota
+
+    # ----- rebalancing -----
+
+    def _cost(self, placements) -> Tuple[int, float]:
+        """(replicas sharing a core with a replica of their own group, CPU load spread)"""
+        collisions = 0
+        seen: Dict[Tuple[str, Tuple[int, int]], int] = {}
+        for placement in placements:
+            if placement.single:
+                continue
+            for core in {self.topology.core_of[cpu] for cpu in placement.cpus}:
+                collisions += seen.get((placement.group, core), 0)
+                seen[(placement.group, core)] = seen.get((placement.group, core), 0) + 1
+        loads = self._loads(placements)
+        return collisions, round(max(loads.values()) - min(loads.values()), 3)
+
+    def rebalance(self) -> Dict[str, List[str]]:
+        """Replan every placement and return the cpusets to apply: {cpuset: [container IDs]}.
+
+        The fresh plan replaces the current one only if it is better (fewer
+        same-group core collisions, then a flatter load); unapplied placements
+        and replicas whose CPU count no longer fits their quota are always pushed.
+        """
+        with self._lock:
+            keys = [key for key in self.placements]
+            current = [self.placements[key] for key in keys]
+            # Scaling groups first, biggest quota first, so spreading sees the most free cores
+            order = sorted(range(len(keys)), key=lambda i: (current[i].single, current[i].group, -current[i].quota, keys[i]))
+            planned: List[Placement] = []
+            fresh: Dict[str, Tuple[int, ...]] = {}
+            for i in order:
+                placement = current[i]
+                cpus = self._choose(placement.quota, placement.single, self._loads(planned), self._group_cores(placement.group, planned))
+                fresh[keys[i]] = cpus
+                planned.append(Placement(placement.group, placement.quota, placement.single, cpus, True))
+
+            replan = self._cost(planned) < self._cost(current)
+            moves: Dict[str, List[str]] = {}
+            for key, placement in zip(keys, current):
+                if replan or len(placement.cpus) != max(1, math.ceil(placement.quota)):
+                    if fresh[key] != placement.cpus:
+                        placement.cpus = fresh[key]
+                        placement.applied = False
+                if not placement.applied:
+                    moves.setdefault(format_cpu_list(placement.cpus), []).append(key)
+        if moves:
+            self._update_gauges()
+        return moves
+
+    def mark_applied(self, container_ids: List[str]):
+        with self._lock:
+            for container_id in container_ids:
+                placement = self.placements.get(container_id[:12])
+                if placement is not None:
+                    placement.applied = True
+
+    # ----- reporting -----
+
+    def _update_gauges(self):
+        with self._lock:
+            loads = self._loads(list(self.placements.values()))
+        for cpu, load in loads.items():
+            cpu_allocated.labels(cpu=str(cpu)).set(load)
+
+    def report(self) -> Dict:
+        """Per-CPU allocation: core, NUMA node, pinned quota and the replicas on it"""
+        topology = self.topology
+        with self._lock:
+            placements = dict(self.placements)
+        loads = self._loads(placements.values())
+        on_cpu: Dict[int, List[Dict]] = {cpu: [] for cpu in topology.cpus}
+        for key, placement in placements.items():
+            for cpu in placement.cpus:
+                on_cpu[cpu].append({"container_id": key, "replica_group": placement.group, "quota": round(placement.quota / len(placement.cpus), 3)})
+        return {
+            "source": topology.source,
+            "cores": len(topology.siblings),
+            "numa_nodes": sorted(topology.nodes),
+            "cost": dict(zip(("core_collisions", "load_spread"), self._cost(placements.values()))),
+            "cpus": [
+                {
+                    "cpu": cpu,
+                    "core": list(topology.core_of[cpu]),
+                    "node": topology.node_of.get(cpu, 0),
+                    "allocated": round(loads[cpu], 3),
+                    "replicas": on_cpu[cpu]
+                }
+                for cpu in topology.cpus
+            ]
+        }
+
+
+# Global instance
+placer = CpusetPlacer()
@@ -0,0 +1,584 @@
+"""
+Embedded HTTP load balancer for IntelliScaleSim
+One asyncio reverse proxy per replica group on a stable host port, balancing
+requests across the group's live replicas with pooled keep-alive upstream
+connections. Membership is pushed by the autoscaler whenever replicas change;
+removed replicas get no new requests but are tracked until their in-flight
+requests finish, so a scale-down can drain them. A group scaled to zero keeps
+its proxy: the first request is held while a replica is activated.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from . import runtime
+from .traffic import traffic
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("round_robin", "least_connections", "power_of_two")
+
+# Upstream timeouts (seconds)
+CONNECT_TIMEOUT = 2.0
+RESPONSE_TIMEOUT = 60.0
+# An upstream that refused a connection is skipped for this long
+UPSTREAM_BACKOFF = 1.0
+# Idle keep-alive connections kept per upstream
+MAX_IDLE_PER_UPSTREAM = 32
+# Client connections idle longer than this are closed
+CLIENT_IDLE_TIMEOUT = 60.0
+MAX_HEADER_BYTES = 64 * 1024
+# Longest a request is held while a group scaled to zero starts a replica, and how often
+# the new replica is tried until it accepts connections
+ACTIVATION_TIMEOUT = 60.0
+ACTIVATION_RETRY_INTERVAL = 0.1
+
+# Headers that only apply to one connection and are never forwarded
+HOP_BY_HOP = {
+    b'connection', b'keep-alive', b'proxy-connection', b'proxy-authenticate',
+    b'proxy-authorization', b'te', b'trailer', b'upgrade'
+}
+
+proxy_requests_total = Counter(
+    'intelliscalesim_proxy_requests_total',
+    'Requests handled by the group load balancers',
+    ['replica_group', 'result']
+)
+proxy_upstream_seconds = Histogram(
+    'intelliscalesim_proxy_upstream_seconds',
+    'Time from forwarding a request to the first response byte',
+    ['replica_group'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+proxy_cold_start_seconds = Histogram(
+    'intelliscalesim_proxy_cold_start_seconds',
+    'Time from a request arriving at a group scaled to zero to the first response byte of the activated replica',
+    ['replica_group'],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 30, 60)
+)
+proxy_active_connections = Gauge(
+    'intelliscalesim_proxy_active_connections',
+    'Requests in flight per upstream replica',
+    ['replica_group', 'upstream']
+)
+
+
+class ProxyError(Exception):
+    """No upstream could serve a request"""
+
+
+class Upstream:
+    """One replica behind a group proxy"""
+
+    __slots__ = ('container_id', 'port', 'active', 'requests', 'errors', 'latency_ewma', 'latencies', 'down_until', 'idle')
+
+    def __init__(self, container_id: str, port: int):
+        self.container_id = container_id
+        self.port = port
+        self.active = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.latencies: deque = deque(maxlen=1000)
+        self.down_until = 0.0
+        self.idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    def observe(self, latency: float):
+        self.requests += 1
+        self.latencies.append(latency)
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def close_idle(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+    def to_dict(self) -> Dict:
+        ordered = sorted(self.latencies)
+        return {
+            "container_id": self.container_id[:12],
+            "port": self.port,
+            "active_connections": self.active,
+            "requests": self.requests,
+            "errors": self.errors,
+            "idle_connections": len(self.idle),
+            "avg_latency_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            "p95_latency_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2) if ordered else None,
+            "available": self.down_until <= time.time()
+        }
+
+
+class GroupProxy:
+    """Reverse proxy of one replica group"""
+
+    def __init__(self, group_name: str, port: int, strategy: str = "round_robin"):
+        self.group_name = group_name
+        self.port = port
+        self.strategy = strategy
+        self.upstreams: List[Upstream] = []
+        # Removed from the membership with requests still in flight, by container ID
+        self.draining: Dict[str, Upstream] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.started_at = time.time()
+        self.last_request_at = self.started_at
+        # Called (in a worker thread) with the group name to start a replica when there is none
+        self.activator: Optional[Callable[[str], bool]] = None
+        self.held = 0  # Requests waiting for an activation
+        self.cold_starts = 0
+        self.last_cold_start: Optional[float] = None
+        self._activation: Optional[asyncio.Future] = None
+        self._ready = asyncio.Event()
+        self._next = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_client, '0.0.0.0', self.port, limit=MAX_HEADER_BYTES)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for upstream in self.upstreams + list(self.draining.values()):
+            upstream.close_idle()
+            self._remove_gauge(upstream)
+        self.draining.clear()
+
+    def set_members(self, members: List[Tuple[str, int]]):
+        """Replace the upstream set, keeping the stats and pools of replicas that stay"""
+        current = {u.container_id: u for u in self.upstreams}
+        upstreams = []
+        for container_id, port in members:
+            upstream = current.pop(container_id, None) or self.draining.pop(container_id, None)
+            if upstream is None or upstream.port != port:
+                upstream = Upstream(container_id, port)
+            upstreams.append(upstream)
+        self.upstreams = upstreams
+        if upstreams:
+            self._ready.set()
+        else:
+            self._ready.clear()
+        for upstream in current.values():
+            upstream.close_idle()
+            if upstream.active:
+                self.draining[upstream.container_id] = upstream
+            else:
+                self._remove_gauge(upstream)
+
+    def active_connections(self) -> Dict[str, int]:
+        """In-flight requests per replica (short container ID), draining replicas included"""
+        counts = {u.container_id[:12]: u.active for u in self.draining.values()}
+        counts.update((u.container_id[:12], u.active) for u in self.upstreams)
+        return counts
+
+    def _remove_gauge(self, upstream: Upstream):
+        try:
+            proxy_active_connections.remove(self.group_name, upstream.container_id[:12])
+        except KeyError:
+            pass
+
+    # ----- balancing -----
+
+    def pick(self, exclude: set) -> Optional[Upstream]:
+        """Choose an upstream with the group's strategy, skipping excluded and backed-off ones"""
+        now = time.time()
+        candidates = [u for u in self.upstreams if u.container_id not in exclude and u.down_until <= now]
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            low = min(u.active for u in candidates)
+            candidates = [u for u in candidates if u.active == low]
+        elif self.strategy == "power_of_two" and len(candidates) > 1:
+            first, second = random.sample(candidates, 2)
+            return first if (first.active, first.latency_ewma or 0) <= (second.active, second.latency_ewma or 0) else second
+        self._next += 1
+        return candidates[self._next % len(candidates)]
+
+    # ----- HTTP -----
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), CLIENT_IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    return
+                request_line, headers = parse_head(head)
+                method, _, version = request_line.split(b' ', 2) if request_line.count(b' ') >= 2 else (b'', b'', b'')
+                if not method:
+                    await send_error(writer, 400, "Bad Request")
+                    return
+                body = await read_request_body(reader, headers)
+                keep_alive = wants_keep_alive(version, headers)
+                self.last_request_at = time.time()
+
+                forwarded = [(k, v) for k, v in headers if k.lower() not in HOP_BY_HOP]
+                if peer:
+                    forwarded.append((b'X-Forwarded-For', peer[0].encode()))
+                forwarded.append((b'Connection', b'keep-alive'))
+                request = request_line.split(b' ', 2)
+                upstream_head = b' '.join([request[0], request[1], b'HTTP/1.1']) + b'\r\n' + b''.join(
+                    k + b': ' + v + b'\r\n' for k, v in forwarded
+                ) + b'\r\n'
+
+                try:
+                    keep_alive = await self._forward(method, upstream_head + body, writer, keep_alive)
+                except ProxyError as e:
+                    proxy_requests_total.labels(replica_group=self.group_name, result="no_upstream").inc()
+                    await send_error(writer, 503 if not self.upstreams else 502, str(e))
+                    return
+                if not keep_alive:
+                    return
+        except Exception as e:
+            logger.debug(f"Proxy connection for {self.group_name} failed: {e}")
+        finally:
+            writer.close()
+
+    async def _forward(self, method: bytes, request: bytes, client: asyncio.StreamWriter, keep_alive: bool) -> bool:
+        """Send one request to an upstream and relay the response; returns whether the client connection stays open"""
+        held_since = deadline = None
+        if not self.upstreams and self.activator is not None:
+            held_since = time.perf_counter()
+            deadline = await self._await_activation()
+        tried = set()
+        while True:
+            upstream = self.pick(tried)
+            if upstream is None:
+                if deadline is not None and time.time() < deadline:
+                    # A just-activated replica refuses connections until its app listens
+                    await asyncio.sleep(ACTIVATION_RETRY_INTERVAL)
+                    tried.clear()
+                    continue
+                raise ProxyError("No replica available" if not tried else "All replicas failed")
+            tried.add(upstream.container_id)
+            upstream.active += 1
+            proxy_active_connections.labels(self.group_name, upstream.container_id[:12]).set(upstream.active)
+            started = time.perf_counter()
+            try:
+                result = await self._exchange(upstream, method, request, client, keep_alive, started, held_since)
+            except asyncio.TimeoutError:
+                # The request may have had effects; do not send it again
+                upstream.errors += 1
+                raise ProxyError(f"Replica {upstream.container_id[:12]} timed out")
+            except (OSError, asyncio.IncompleteReadError) as e:
+                # Nothing reached the client yet: try another replica
+                upstream.errors += 1
+                if deadline is None:
+                    upstream.down_until = time.time() + UPSTREAM_BACKOFF
+                logger.debug(f"Upstream {upstream.container_id[:12]} of {self.group_name} failed: {e}")
+                continue
+            finally:
+                upstream.active -= 1
+                if not upstream.active and self.draining.get(upstream.container_id) is upstream:
+                    del self.draining[upstream.container_id]
+                    self._remove_gauge(upstream)
+                else:
+                    proxy_active_connections.labels(self.group_name, upstream.container_id[:12]).set(upstream.active)
+            proxy_requests_total.labels(replica_group=self.group_name, result="ok").inc()
+            return result
+
+    async def _await_activation(self) -> float:
+        """Hold a request while the group has no replica: ask for one and wait until it is a member.
+
+        Returns the deadline until which the new replica is retried.
+        """
+        deadline = time.time() + ACTIVATION_TIMEOUT
+        if self._activation is None or self._activation.done():
+            logger.info(f"⚡ Request for '{self.group_name}' held while a replica is activated")
+            self._activation = asyncio.get_running_loop().run_in_executor(None, self.activator, self.group_name)
+        activation = self._activation
+        ready = asyncio.ensure_future(self._ready.wait())
+        self.held += 1
+        try:
+            await asyncio.wait({ready, activation}, timeout=ACTIVATION_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+            if not ready.done() and activation.done():
+                # The activator gave up (unknown or disabled group) or failed: answer now, not at the deadline
+                error = activation.exception()
+                if error is not None:
+                    raise ProxyError(f"Activating {self.group_name} failed: {error}")
+                if not activation.result():
+                    raise ProxyError(f"{self.group_name} cannot be activated")
+                await asyncio.wait_for(ready, max(0.0, deadline - time.time()))
+            if not ready.done():
+                raise asyncio.TimeoutError
+        except asyncio.TimeoutError:
+            raise ProxyError(f"No replica of {self.group_name} started within {ACTIVATION_TIMEOUT:.0f}s")
+        finally:
+            ready.cancel()
+            self.held -= 1
+        return deadline
+
+    async def _exchange(self, upstream: Upstream, method: bytes, request: bytes, client: asyncio.StreamWriter,
+                        keep_alive: bool, started: float, held_since: Optional[float] = None) -> bool:
+        while True:
+            pooled = bool(upstream.idle)
+            if pooled:
+                up_reader, up_writer = upstream.idle.pop()
+                if up_writer.is_closing():
+                    continue
+            else:
+                up_reader, up_writer = await asyncio.wait_for(
+                    asyncio.open_connection('127.0.0.1', upstream.port, limit=MAX_HEADER_BYTES), CONNECT_TIMEOUT
+                )
+            try:
+                up_writer.write(request)
+                await up_writer.drain()
+                head = await asyncio.wait_for(up_reader.readuntil(b'\r\n\r\n'), RESPONSE_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                up_writer.close()
+                raise
+            except (OSError, asyncio.IncompleteReadError):
+                up_writer.close()
+                if pooled:
+                    # The replica closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise
+
+        latency = time.perf_counter() - started
+        upstream.observe(latency)
+        traffic.record_request(upstream.container_id, latency)
+        proxy_upstream_seconds.labels(replica_group=self.group_name).observe(latency)
+        if held_since is not None:
+            self.cold_starts += 1
+            self.last_cold_start = time.perf_counter() - held_since
+            proxy_cold_start_seconds.labels(replica_group=self.group_name).observe(self.last_cold_start)
+
+        status_line, headers = parse_head(head)
+        status = int(status_line.split(b' ', 2)[1]) if status_line.count(b' ') else 502
+        framing = body_framing(method, status, headers)
+        reusable = framing != "eof" and wants_keep_alive(status_line.split(b' ', 1)[0], headers)
+        keep_alive = keep_alive and framing != "eof"
+
+        response = [(k, v) for k, v in headers if k.lower() not in HOP_BY_HOP or k.lower() == b'transfer-encoding']
+        response.append((b'Connection', b'keep-alive' if keep_alive else b'close'))
+        client.write(status_line + b'\r\n' + b''.join(k + b': ' + v + b'\r\n' for k, v in response) + b'\r\n')
+        try:
+            await relay_body(up_reader, client, framing, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            # Part of the response already went out; all that is left is to close both sides
+            logger.debug(f"Relaying a response of {self.group_name} failed: {e}")
+            up_writer.close()
+            return False
+
+        if reusable and len(upstream.idle) < MAX_IDLE_PER_UPSTREAM and upstream in self.upstreams:
+            upstream.idle.append((up_reader, up_writer))
+        else:
+            up_writer.close()
+        return keep_alive
+
+    def stats(self) -> Dict:
+        return {
+            "port": self.port,
+            "strategy": self.strategy,
+            "upstreams": [u.to_dict() for u in self.upstreams],
+            "requests": sum(u.requests for u in self.upstreams),
+            "active_connections": sum(u.active for u in self.upstreams),
+            "draining": [u.to_dict() for u in self.draining.values()],
+            "idle_seconds": round(time.time() - self.last_request_at, 1),
+            "held_requests": self.held,
+            "cold_starts": self.cold_starts,
+            "last_cold_start_seconds": round(self.last_cold_start, 3) if self.last_cold_start is not None else None
+        }
+
+
+# ----- HTTP/1.1 framing helpers -----
+
+def parse_head(head: bytes) -> Tuple[bytes, List[Tuple[bytes, bytes]]]:
+    """Split a request or response head into its first line and (name, value) headers"""
+    lines = head.rstrip(b'\r\n').split(b'\r\n')
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers.append((name.strip(), value.strip()))
+    return lines[0], headers
+
+
+def header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def wants_keep_alive(version: bytes, headers: List[Tuple[bytes, bytes]]) -> bool:
+    connection = (header(headers, b'connection') or b'').lower()
+    if version.upper() == b'HTTP/1.0':
+        return b'keep-alive' in connection
+    return b'close' not in connection
+
+
+def body_framing(method: bytes, status: int, headers: List[Tuple[bytes, bytes]]) -> str:
+    """How a response body ends: "none", "chunked", "length" or "eof\""""
+    if method.upper() == b'HEAD' or 100 <= status < 200 or status in (204, 304):
+        return "none"
+    if b'chunked' in (header(headers, b'transfer-encoding') or b'').lower():
+        return "chunked"
+    if header(headers, b'content-length') is not None:
+        return "length"
+    return "eof"
+
+
+async def read_request_body(reader: asyncio.StreamReader, headers: List[Tuple[bytes, bytes]]) -> bytes:
+    """The raw request body, chunk framing included"""
+    if b'chunked' in (header(headers, b'transfer-encoding') or b'').lower():
+        parts = []
+        async for part in iter_chunks(reader):
+            parts.append(part)
+        return b''.join(parts)
+    length = int(header(headers, b'content-length') or 0)
+    return await reader.readexactly(length) if length else b''
+
+
+async def iter_chunks(reader: asyncio.StreamReader):
+    """Yield a chunked body piece by piece, framing included, up to and including the trailers"""
+    while True:
+        size_line = await reader.readuntil(b'\r\n')
+        size = int(size_line.split(b';', 1)[0].strip(), 16)
+        if size == 0:
+            trailers = size_line
+            while True:
+                line = await reader.readuntil(b'\r\n')
+                trailers += line
+                if line == b'\r\n':
+                    yield trailers
+                    return
+        yield size_line + await reader.readexactly(size + 2)
+
+
+async def relay_body(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, framing: str, headers: List[Tuple[bytes, bytes]]):
+    if framing == "chunked":
+        async for part in iter_chunks(reader):
+            writer.write(part)
+            await writer.drain()
+    elif framing == "length":
+        remaining = int(header(headers, b'content-length'))
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                raise asyncio.IncompleteReadError(b'', remaining)
+            remaining -= len(data)
+            writer.write(data)
+            await writer.drain()
+    elif framing == "eof":
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    await writer.drain()
+
+
+async def send_error(writer: asyncio.StreamWriter, status: int, message: str):
+    body = message.encode()
+    reason = {400: b'Bad Request', 502: b'Bad Gateway', 503: b'Service Unavailable'}.get(status, b'Error')
+    writer.write(
+        b'HTTP/1.1 %d %s\r\nContent-Type: text/plain\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % (status, reason, len(body))
+        + body
+    )
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+class ProxyManager:
+    """Runs the group proxies on one event loop in a background thread"""
+
+    def __init__(self):
+        self.proxies: Dict[str, GroupProxy] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        # Starts a replica of a group scaled to zero (set by the autoscaler)
+        self.activator: Optional[Callable[[str], bool]] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+                self.thread.start()
+            return self.loop
+
+    def _call(self, coroutine, timeout: float = 5.0):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result(timeout)
+
+    def sync(self, group_name: str, members: List[Tuple[str, int]], strategy: str = "round_robin", port: Optional[int] = None) -> Optional[int]:
+        """Start the group's proxy if needed and set its replicas; returns the proxy port"""
+        proxy = self.proxies.get(group_name)
+        if proxy is None:
+            proxy = self._start(group_name, strategy, port)
+            if proxy is None:
+                return None
+        proxy.strategy = strategy
+        members = [(cid, p) for cid, p in members if p]
+        self._ensure_loop().call_soon_threadsafe(proxy.set_members, members)
+        return proxy.port
+
+    def _start(self, group_name: str, strategy: str, port: Optional[int]) -> Optional[GroupProxy]:
+        for candidate in ([port] if port else []) + [None]:
+            proxy = GroupProxy(group_name, candidate or runtime.find_free_port(), strategy)
+            proxy.activator = self.activator
+            try:
+                self._call(proxy.start())
+            except OSError as e:
+                logger.warning(f"Load balancer for {group_name} could not bind port {proxy.port}: {e}")
+                continue
+            except Exception as e:
+                logger.error(f"❌ Failed to start load balancer for {group_name}: {e}")
+                return None
+            runtime.hold_port(proxy.port)
+            self.proxies[group_name] = proxy
+            logger.info(f"⚖️  Load balancer for '{group_name}' listening on port {proxy.port} ({strategy})")
+            return proxy
+        return None
+
+    def remove(self, group_name: str):
+        proxy = self.proxies.pop(group_name, None)
+        if proxy is None:
+            return
+        try:
+            self._call(proxy.close())
+        except Exception as e:
+            logger.error(f"Failed to stop load balancer for {group_name}: {e}")
+        runtime.release_port(proxy.port)
+        logger.info(f"Load balancer for '{group_name}' stopped")
+
+    def stats(self, group_name: str) -> Optional[Dict]:
+        proxy = self.proxies.get(group_name)
+        return proxy.stats() if proxy else None
+
+    def last_request(self, group_name: str) -> Optional[float]:
+        """When the group's load balancer last received a request (its start if none yet); None without one"""
+        proxy = self.proxies.get(group_name)
+        return proxy.last_request_at if proxy else None
+
+    def active_connections(self, group_name: str) -> Optional[Dict[str, int]]:
+        """In-flight requests per replica of a group; None when the group has no proxy"""
+        proxy = self.proxies.get(group_name)
+        if proxy is None:
+            return None
+        try:
+            return self._call(self._snapshot(proxy.active_connections))
+        except Exception:
+            return None
+
+    @staticmethod
+    async def _snapshot(read):
+        return read()
+
+    def stop(self):
+        for group_name in list(self.proxies):
+            self.remove(group_name)
+
+
+# Global proxy manager
+proxies = ProxyManager()
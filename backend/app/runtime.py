@@ -0,0 +1,279 @@
+"""
+Container runtime helpers for IntelliScaleSim
+Thin wrappers around the docker CLI shared by the API and the autoscaler
+"""
+
+import json
+import re
+import socket
+import http.client
+import contextlib
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Port range for dynamic allocation
+SAFE_LOW_PORT = 20000
+SAFE_HIGH_PORT = 30000
+
+# Ports handed out recently but possibly not bound yet (port -> expiry time);
+# ports of stopped warm-pool containers are held until released
+PORT_RESERVATION_SECONDS = 60
+_reserved_ports: Dict[int, float] = {}
+_port_lock = threading.Lock()
+
+
+def run_docker_command(args, capture_output=True, text=True, check=True):
+    """Run a docker command using subprocess."""
+    try:
+        result = subprocess.run(
+            ['docker'] + args,
+            capture_output=capture_output,
+            text=text,
+            check=check
+        )
+        return result.stdout.strip() if capture_output else None
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"Docker command failed: {e.stderr if e.stderr else str(e)}")
+
+
+def find_free_port() -> int:
+    """Find a free port in the safe range by attempting to bind to it.
+
+    The port is reserved for a short while so that concurrent callers
+    starting containers at the same time never receive the same port.
+    """
+    with _port_lock:
+        now = time.time()
+        for port, expiry in list(_reserved_ports.items()):
+            if expiry < now:
+                del _reserved_ports[port]
+        for port in range(SAFE_LOW_PORT, SAFE_HIGH_PORT):
+            if port in _reserved_ports:
+                continue
+            with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                try:
+                    s.bind(("0.0.0.0", port))
+                except OSError:
+                    continue
+            _reserved_ports[port] = now + PORT_RESERVATION_SECONDS
+            return port
+    raise RuntimeError("No free port available in the safe range")
+
+
+def hold_port(port: int):
+    """Keep a port reserved until release_port, e.g. for a container that is not running"""
+    with _port_lock:
+        _reserved_ports[port] = float('inf')
+
+
+def release_port(port: int):
+    with _port_lock:
+        _reserved_ports.pop(port, None)
+
+
+def probe_http(port: int, host: str = "127.0.0.1", path: str = "/", timeout: float = 1.0) -> bool:
+    """True if something answers HTTP on the port (any status counts as serving).
+
+    A plain TCP connect is not enough: docker's port proxy accepts connections
+    before the application inside the container is listening.
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        connection.getresponse()
+        return True
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        connection.close()
+
+
+def probe_latency(port: int, host: str = "127.0.0.1", path: str = "/", timeout: float = 2.0) -> Optional[float]:
+    """Seconds until a full HTTP response to GET `path` arrives.
+
+    A timed-out probe counts as `timeout` (the replica is at least that slow);
+    any other failure (nothing listening, connection reset) returns None.
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        connection.request("GET", path)
+        connection.getresponse().read()
+        return time.perf_counter() - started
+    except TimeoutError:
+        return float(timeout)
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def container_states(container_ids: List[str]) -> Optional[Dict[str, str]]:
+    """Map short container ID -> state for the given containers in one `docker ps` call.
+
+    Containers that no longer exist are absent from the result. Returns None if
+    docker could not be queried, so callers can tell "gone" from "unknown".
+    """
+    if not container_ids:
+        return {}
+    args = ['ps', '-a', '--no-trunc', '--format', '{{.ID}}|{{.State}}']
+    for container_id in container_ids:
+        args.extend(['--filter', f'id={container_id}'])
+    try:
+        output = run_docker_command(args)
+    except Exception as e:
+        logger.error(f"Could not list containers: {e}")
+        return None
+    states = {}
+    for line in output.splitlines():
+        container_id, _, state = line.strip().partition('|')
+        if container_id:
+            states[container_id[:12]] = state
+    return states
+
+
+HOST_PORT_PATTERN = re.compile(r':(\d+)->(\d+)/')
+
+
+def list_group_containers() -> Optional[List[Dict]]:
+    """All containers carrying a replica_group label, in one `docker ps` call.
+
+    Each entry has id, state, replica_group, image, host_port and container_port
+    (the ports are None for containers that never started). Returns None if
+    docker could not be queried.
+    """
+    args = [
+        'ps', '-a', '--no-trunc', '--filter', 'label=replica_group',
+        '--format', '{{.ID}}|{{.State}}|{{.Label "replica_group"}}|{{.Image}}|{{.Ports}}'
+    ]
+    try:
+        output = run_docker_command(args)
+    except Exception as e:
+        logger.error(f"Could not list replica group containers: {e}")
+        return None
+    containers = []
+    for line in output.splitlines():
+        parts = line.strip().split('|')
+        if len(parts) < 5:
+            continue
+        match = HOST_PORT_PATTERN.search(parts[4])
+        containers.append({
+            "id": parts[0],
+            "state": parts[1],
+            "replica_group": parts[2],
+            "image": parts[3],
+            "host_port": int(match.group(1)) if match else None,
+            "container_port": int(match.group(2)) if match else None,
+        })
+    return containers
+
+
+def stop_containers(container_ids: List[str], timeout: int = 10):
+    """Stop several containers with a single docker call: SIGTERM, then SIGKILL after `timeout` seconds"""
+    if not container_ids:
+        return
+    subprocess.run(['docker', 'stop', '-t', str(timeout)] + list(container_ids), timeout=timeout + 60, capture_output=True)
+
+
+def remove_containers(container_ids: List[str]):
+    """Force-remove several containers with a single docker call"""
+    if not container_ids:
+        return
+    subprocess.run(['docker', 'rm', '-f'] + list(container_ids), timeout=60, capture_output=True)
+
+
+def inspect_container(container_id: str) -> Dict:
+    """Return `docker inspect` output for one container"""
+    return json.loads(run_docker_command(['inspect', container_id]))[0]
+
+
+def run_replica(
+    name: str,
+    image: str,
+    container_port: int,
+    host_port: int,
+    mem_limit: str,
+    cpu_quota: float,
+    group_name: str,
+    extra_labels: Optional[Dict[str, str]] = None,
+    start: bool = True,
+    cpuset: Optional[str] = None
+) -> str:
+    """Start (or with start=False only create) one replica container of a replica group and return its ID"""
+    docker_args = [
+        'run', '-d',
+        '--name', name,
+        '--label', 'managed_by=intelliscalesim',
+        '--label', f'replica_group={group_name}',
+        '--label', 'autoscaled=true',
+    ]
+    if not start:
+        docker_args[:2] = ['create']
+    for key, value in (extra_labels or {}).items():
+        docker_args.extend(['--label', f'{key}={value}'])
+    docker_args.extend([
+        '-p', f'{host_port}:{container_port}',
+        '--memory', mem_limit,
+        '--cpus', str(cpu_quota),
+    ])
+    if cpuset:
+        docker_args.extend(['--cpuset-cpus', cpuset])
+    docker_args.append(image)
+    return run_docker_command(docker_args)
+
+
+# Multipliers of the unit suffixes docker accepts for --memory
+_MEMORY_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def parse_memory_limit(value: str) -> int:
+    """Bytes of a docker memory limit such as '512m' or '1g'"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid memory limit: {value}")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2)])
+
+
+def format_memory_limit(num_bytes: int) -> str:
+    """Docker memory limit for a byte count, in whole megabytes (e.g. '768m')"""
+    return f"{max(6, round(num_bytes / 1024 ** 2))}m"
+
+
+def update_resources(container_ids: List[str], cpu_quota: Optional[float] = None, mem_limit: Optional[str] = None):
+    """Change the CPU and/or memory limit of running or stopped containers in place (no restart).
+
+    The swap limit is kept at twice the memory limit, as set by `docker run --memory`;
+    raising the memory limit past the old swap limit would otherwise be rejected.
+    """
+    if not container_ids or (cpu_quota is None and mem_limit is None):
+        return
+    args = ['update']
+    if cpu_quota is not None:
+        args.extend(['--cpus', str(cpu_quota)])
+    if mem_limit is not None:
+        args.extend(['--memory', mem_limit, '--memory-swap', format_memory_limit(2 * parse_memory_limit(mem_limit))])
+    run_docker_command(args + list(container_ids))
+
+
+def update_cpuset(container_ids: List[str], cpuset: str):
+    """Pin running containers to the given CPUs (e.g. '0,4') in place"""
+    if container_ids:
+        run_docker_command(['update', '--cpuset-cpus', cpuset] + list(container_ids))
+
+
+def start_container(container_id: str):
+    run_docker_command(['start', container_id])
+
+
+def pause_container(container_id: str):
+    run_docker_command(['pause', container_id])
+
+
+def unpause_container(container_id: str):
+    run_docker_command(['unpause', container_id])
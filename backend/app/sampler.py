@@ -0,0 +1,374 @@
+"""
+Adaptive container metrics sampler for IntelliScaleSim
+Keeps a per-container schedule: containers near a scaling threshold or changing
+quickly are sampled often, idle and stopped ones rarely. All due containers are
+sampled with one batched `docker stats` call, within a global per-second budget.
+Samples that cross a scaling threshold are published to crossing listeners.
+"""
+
+import heapq
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from prometheus_client import Counter, Gauge
+
+from .metrics import ContainerSample, read_samples
+from .storage import metrics_store
+
+logger = logging.getLogger(__name__)
+
+# Sampling intervals (seconds)
+MIN_INTERVAL = float(os.environ.get('INTELLISCALESIM_SAMPLE_MIN_INTERVAL', '2'))
+MAX_INTERVAL = float(os.environ.get('INTELLISCALESIM_SAMPLE_MAX_INTERVAL', '60'))
+# Container samples allowed per second across all containers
+SAMPLE_BUDGET_PER_SECOND = float(os.environ.get('INTELLISCALESIM_SAMPLE_BUDGET', '20'))
+
+# Within this many CPU points of a threshold a container is sampled at MIN_INTERVAL
+NEAR_THRESHOLD_BAND = 10.0
+# Beyond this distance from every threshold it is sampled at MAX_INTERVAL
+FAR_THRESHOLD_BAND = 40.0
+# CPU change (points per second) that counts as "changing quickly"
+FAST_CHANGE_RATE = 2.0
+# Below this CPU with no replica group a container is considered idle
+IDLE_CPU_PERCENT = 1.0
+# Memory above this is always sampled at MIN_INTERVAL
+HOT_MEMORY_PERCENT = 85.0
+# How often the set of managed containers is re-listed
+DISCOVERY_INTERVAL = 30.0
+# Samples kept in memory per container
+HISTORY_LENGTH = 120
+
+sampler_samples_total = Counter('intelliscalesim_sampler_samples_total', 'Container samples taken')
+sampler_deferred_total = Counter('intelliscalesim_sampler_deferred_total', 'Container samples deferred by the budget')
+sampler_tracked = Gauge('intelliscalesim_sampler_tracked_containers', 'Containers tracked by the sampler', ['state'])
+sampler_rate = Gauge('intelliscalesim_sampler_samples_per_second', 'Effective container samples per second')
+sampler_interval = Gauge('intelliscalesim_sampler_interval_seconds', 'Current sampling interval per container', ['container', 'replica_group'])
+
+
+class TrackedContainer:
+    """Sampling state for one container"""
+
+    __slots__ = (
+        'container_id', 'replica_group', 'running', 'interval', 'reason',
+        'next_due', 'history', 'sample_times', 'zone', 'explicit'
+    )
+
+    def __init__(self, container_id: str, replica_group: Optional[str] = None, running: bool = True):
+        self.container_id = container_id
+        self.replica_group = replica_group
+        self.running = running
+        self.interval = MIN_INTERVAL
+        self.reason = "new"
+        self.next_due = 0.0
+        self.history: deque = deque(maxlen=HISTORY_LENGTH)
+        self.sample_times: deque = deque(maxlen=HISTORY_LENGTH)
+        self.zone = "normal"  # "high", "normal" or "low" relative to the scaling thresholds
+        # Registered with track() (e.g. an adopted container without our labels): kept until untrack()
+        self.explicit = False
+
+    @property
+    def latest(self) -> Optional[ContainerSample]:
+        return self.history[-1] if self.history else None
+
+    def effective_rate(self, window: float = 60.0) -> float:
+        cutoff = time.time() - window
+        return sum(1 for t in self.sample_times if t >= cutoff) / window
+
+
+class ContainerSampler:
+    """Samples managed containers on an adaptive per-container schedule"""
+
+    def __init__(self, budget_per_second: float = SAMPLE_BUDGET_PER_SECOND):
+        self.budget_per_second = budget_per_second
+        self.containers: Dict[str, TrackedContainer] = {}
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+        self._schedule: List[Tuple[float, str]] = []
+        self._tokens = budget_per_second
+        self._last_refill = time.time()
+        self._last_discovery = 0.0
+        self._sample_times: deque = deque(maxlen=10000)
+        self._deferred = 0
+        # container_id -> (scale_up, scale_down) CPU thresholds, supplied by the autoscaler
+        self.threshold_source: Callable[[str], Optional[Tuple[float, float]]] = lambda cid: None
+        # Called with (replica_group, sample) when a sample moves above or below the thresholds
+        self.crossing_listeners: List[Callable[[str, ContainerSample], None]] = []
+
+    def start(self):
+        """Start the sampling thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._sampling_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"✓ Container sampler started (budget {self.budget_per_second}/s)")
+
+    def stop(self):
+        """Stop the sampling thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def track(self, container_id: str, replica_group: Optional[str] = None):
+        """Start sampling a container; sampled on the next pass"""
+        key = container_id[:12]
+        with self._lock:
+            tracked = self.containers.get(key)
+            if tracked is None:
+                tracked = self.containers[key] = TrackedContainer(key, replica_group)
+            else:
+                tracked.replica_group = replica_group or tracked.replica_group
+                tracked.running = True
+            tracked.explicit = True
+            self._reschedule(tracked, time.time())
+
+    def untrack(self, container_id: str):
+        """Stop sampling a container"""
+        with self._lock:
+            tracked = self.containers.pop(container_id[:12], None)
+        if tracked is not None:
+            try:
+                sampler_interval.remove(tracked.container_id, tracked.replica_group or "")
+            except KeyError:
+                pass
+
+    def latest(self, container_id: str) -> Optional[ContainerSample]:
+        """Most recent sample of a container, if any"""
+        tracked = self.containers.get(container_id[:12])
+        return tracked.latest if tracked else None
+
+    def history(self, container_id: str) -> List[ContainerSample]:
+        tracked = self.containers.get(container_id[:12])
+        return list(tracked.history) if tracked else []
+
+    def refresh(self, container_ids: List[str]) -> Dict[str, ContainerSample]:
+        """Sample tracked containers right away, outside their schedule"""
+        with self._lock:
+            due = [self.containers[cid[:12]] for cid in container_ids if cid[:12] in self.containers]
+        return self.sample(due) if due else {}
+
+    # ----- scheduling -----
+
+    def _reschedule(self, tracked: TrackedContainer, due: float):
+        tracked.next_due = due
+        heapq.heappush(self._schedule, (due, tracked.container_id))
+
+    def _next_interval(self, tracked: TrackedContainer) -> Tuple[float, str]:
+        """Pick the next sampling interval from the latest samples"""
+        if not tracked.running:
+            return MAX_INTERVAL, "stopped"
+        sample = tracked.latest
+        if sample is None:
+            return MIN_INTERVAL, "no sample"
+        if sample.mem_percent >= HOT_MEMORY_PERCENT:
+            return MIN_INTERVAL, "memory hot"
+
+        if len(tracked.history) >= 2:
+            previous = tracked.history[-2]
+            elapsed = sample.timestamp - previous.timestamp
+            if elapsed > 0 and abs(sample.cpu_percent - previous.cpu_percent) / elapsed >= FAST_CHANGE_RATE:
+                return MIN_INTERVAL, "changing fast"
+
+        thresholds = self.threshold_source(tracked.container_id)
+        if thresholds is None:
+            if sample.cpu_percent < IDLE_CPU_PERCENT:
+                return MAX_INTERVAL, "idle"
+            # No policy to be close to - sample at a moderate pace
+            return (MIN_INTERVAL + MAX_INTERVAL) / 2, "unmanaged"
+
+        distance = min(abs(sample.cpu_percent - t) for t in thresholds)
+        if distance <= NEAR_THRESHOLD_BAND:
+            return MIN_INTERVAL, "near threshold"
+        if distance >= FAR_THRESHOLD_BAND:
+            return MAX_INTERVAL, "far from threshold"
+        fraction = (distance - NEAR_THRESHOLD_BAND) / (FAR_THRESHOLD_BAND - NEAR_THRESHOLD_BAND)
+        return MIN_INTERVAL + fraction * (MAX_INTERVAL - MIN_INTERVAL), "scaled by threshold distance"
+
+    def _refill_tokens(self, now: float):
+        self._tokens = min(
+            self.budget_per_second,
+            self._tokens + (now - self._last_refill) * self.budget_per_second
+        )
+        self._last_refill = now
+
+    def _due_containers(self, now: float) -> List[TrackedContainer]:
+        """Pop due containers from the schedule, limited by the sampling budget"""
+        due = []
+        with self._lock:
+            self._refill_tokens(now)
+            while self._schedule and self._schedule[0][0] <= now:
+                due_time, container_id = heapq.heappop(self._schedule)
+                tracked = self.containers.get(container_id)
+                # Skip entries superseded by a later reschedule or for removed containers
+                if tracked is None or tracked.next_due != due_time:
+                    continue
+                if not tracked.running:
+                    self._reschedule(tracked, now + MAX_INTERVAL)
+                    continue
+                if self._tokens < 1:
+                    # Over budget: push back and let the rest of the queue wait too
+                    self._deferred += 1
+                    sampler_deferred_total.inc()
+                    self._reschedule(tracked, now + 1.0 / self.budget_per_second)
+                    break
+                self._tokens -= 1
+                due.append(tracked)
+        return due
+
+    # ----- sampling -----
+
+    def _sampling_loop(self):
+        while self.running:
+            now = time.time()
+            try:
+                if now - self._last_discovery >= DISCOVERY_INTERVAL:
+                    self._discover()
+                    self._last_discovery = now
+                due = self._due_containers(now)
+                if due:
+                    self.sample(due)
+                self._update_gauges()
+            except Exception as e:
+                logger.error(f"Error in container sampler: {e}")
+
+            with self._lock:
+                next_due = self._schedule[0][0] if self._schedule else now + 1.0
+            time.sleep(min(max(next_due - time.time(), 0.05), 1.0))
+
+    def sample(self, due: List[TrackedContainer]) -> Dict[str, ContainerSample]:
+        """Sample the given containers in one call and reschedule them"""
+        samples = read_samples([t.container_id for t in due])
+        now = time.time()
+        by_group: Dict[Optional[str], List[ContainerSample]] = {}
+        crossings: List[Tuple[str, ContainerSample]] = []
+        with self._lock:
+            for tracked in due:
+                sample = samples.get(tracked.container_id)
+                if sample is not None:
+                    tracked.history.append(sample)
+                    tracked.sample_times.append(now)
+                    self._sample_times.append(now)
+                    by_group.setdefault(tracked.replica_group, []).append(sample)
+                    if self._update_zone(tracked, sample) and tracked.replica_group:
+                        crossings.append((tracked.replica_group, sample))
+                tracked.interval, tracked.reason = self._next_interval(tracked)
+                if tracked.container_id in self.containers:
+                    self._reschedule(tracked, now + tracked.interval)
+        sampler_samples_total.inc(len(samples))
+        for group_name, group_samples in by_group.items():
+            metrics_store.record_samples(group_samples, replica_group=group_name)
+        for group_name, sample in crossings:
+            for listener in list(self.crossing_listeners):
+                try:
+                    listener(group_name, sample)
+                except Exception as e:
+                    logger.error(f"Threshold crossing listener failed: {e}")
+        return samples
+
+    def _update_zone(self, tracked: TrackedContainer, sample: ContainerSample) -> bool:
+        """Place a container above, between or below its thresholds; True when it just crossed one"""
+        thresholds = self.threshold_source(tracked.container_id)
+        if thresholds is None:
+            return False
+        scale_up, scale_down = thresholds
+        if sample.cpu_percent > scale_up:
+            zone = "high"
+        elif sample.cpu_percent < scale_down:
+            zone = "low"
+        else:
+            zone = "normal"
+        crossed = zone != tracked.zone and zone != "normal"
+        tracked.zone = zone
+        return crossed
+
+    def _discover(self):
+        """Refresh the set of managed containers and their running state"""
+        try:
+            result = subprocess.run(
+                ['docker', 'ps', '-a', '--filter', 'label=managed_by=intelliscalesim',
+                 '--format', '{{.ID}}|{{.State}}|{{.Label "replica_group"}}'],
+                capture_output=True, text=True, timeout=10
+            )
+        except Exception as e:
+            logger.debug(f"Container discovery failed: {e}")
+            return
+        if result.returncode != 0:
+            return
+
+        seen = set()
+        for line in result.stdout.splitlines():
+            parts = line.strip().split('|')
+            if len(parts) < 2:
+                continue
+            container_id, state = parts[0][:12], parts[1]
+            group_name = parts[2] if len(parts) > 2 and parts[2] else None
+            seen.add(container_id)
+            with self._lock:
+                tracked = self.containers.get(container_id)
+                if tracked is None:
+                    tracked = self.containers[container_id] = TrackedContainer(container_id, group_name, state == 'running')
+                    self._reschedule(tracked, time.time())
+                else:
+                    was_running = tracked.running
+                    tracked.running = state == 'running'
+                    tracked.replica_group = tracked.replica_group or group_name
+                    if tracked.running and not was_running:
+                        self._reschedule(tracked, time.time())
+
+        # Containers registered with track() are not necessarily labelled, so only untrack() drops them
+        with self._lock:
+            gone = [cid for cid, tracked in self.containers.items() if cid not in seen and not tracked.explicit]
+        for container_id in gone:
+            self.untrack(container_id)
+
+    # ----- stats -----
+
+    def effective_rate(self, window: float = 60.0) -> float:
+        cutoff = time.time() - window
+        return sum(1 for t in list(self._sample_times) if t >= cutoff) / window
+
+    def _update_gauges(self):
+        with self._lock:
+            tracked = list(self.containers.values())
+        running = sum(1 for t in tracked if t.running)
+        sampler_tracked.labels(state='running').set(running)
+        sampler_tracked.labels(state='stopped').set(len(tracked) - running)
+        sampler_rate.set(self.effective_rate())
+        for t in tracked:
+            sampler_interval.labels(container=t.container_id, replica_group=t.replica_group or "").set(t.interval)
+
+    def get_stats(self) -> Dict:
+        """Sampling schedule and effective rates"""
+        with self._lock:
+            tracked = list(self.containers.values())
+        return {
+            "running": self.running,
+            "budget_per_second": self.budget_per_second,
+            "effective_samples_per_second": round(self.effective_rate(), 3),
+            "deferred_by_budget": self._deferred,
+            "min_interval": MIN_INTERVAL,
+            "max_interval": MAX_INTERVAL,
+            "containers": [
+                {
+                    "container_id": t.container_id,
+                    "replica_group": t.replica_group,
+                    "running": t.running,
+                    "interval_seconds": round(t.interval, 2),
+                    "reason": t.reason,
+                    "next_due_in": round(max(t.next_due - time.time(), 0.0), 2),
+                    "effective_rate": round(t.effective_rate(), 3),
+                    "latest": t.latest.to_dict() if t.latest else None
+                }
+                for t in sorted(tracked, key=lambda t: t.interval)
+            ]
+        }
+
+
+# Global sampler instance
+container_sampler = ContainerSampler()
@@ -0,0 +1,249 @@
+"""
+Scheduled scaling for IntelliScaleSim
+Cron-style actions attached to a scaling policy that change the replica
+bounds (min_replicas / max_replicas) or pre-scale a group to a replica count
+at given times, e.g. capacity for a lab before the students arrive:
+
+    {"name": "lab", "cron": "50 9 * * 1-5", "min_replicas": 6}
+    {"name": "after-lab", "cron": "0 12 * * 1-5", "min_replicas": 1}
+
+Bounds follow the action that fired last (so a restart picks them up again);
+a pre-scale is applied once per occurrence. The reactive policy keeps working
+within the bounds in force.
+"""
+
+import json
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# A pre-scale that comes due while the autoscaler is not looking is still applied this long after its time
+PRESCALE_GRACE_SECONDS = 300
+
+# How far next/previous occurrences are searched (covers Feb 29 schedules)
+MAX_SEARCH_DAYS = 4 * 366
+
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'))}
+
+# (name, lowest, highest, names) of the five cron fields
+CRON_FIELDS = (
+    ('minute', 0, 59, {}),
+    ('hour', 0, 23, {}),
+    ('day of month', 1, 31, {}),
+    ('month', 1, 12, MONTH_NAMES),
+    ('day of week', 0, 7, WEEKDAY_NAMES),
+)
+
+
+def parse_cron_field(text: str, low: int, high: int, names: Dict[str, int], field: str) -> List[int]:
+    """Values of one cron field: '*', '5', '1-5', '*/15', '0-30/10', 'mon-fri' and lists of these"""
+    values = set()
+    for part in text.lower().split(','):
+        spec, _, step = part.partition('/')
+        try:
+            step = int(step) if step else 1
+            if spec == '*':
+                start, end = low, high
+            else:
+                first, _, last = spec.partition('-')
+                start = names[first] if first in names else int(first)
+                end = (names[last] if last in names else int(last)) if last else (high if step > 1 else start)
+        except ValueError:
+            raise ValueError(f"Invalid {field} '{part}'")
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"{field.capitalize()} '{part}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronExpression:
+    """A standard five-field cron expression (minute hour day-of-month month day-of-week)"""
+
+    __slots__ = ('expression', 'minutes', 'hours', 'days', 'months', 'weekdays', 'any_day', 'any_weekday')
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields, has {len(fields)}")
+        self.expression = expression
+        minutes, hours, days, months, weekdays = (
+            parse_cron_field(text, low, high, names, name) for text, (name, low, high, names) in zip(fields, CRON_FIELDS)
+        )
+        self.minutes, self.hours = minutes, hours
+        self.days, self.months = set(days), set(months)
+        self.weekdays = {day % 7 for day in weekdays}  # 7 is Sunday too
+        # Cron matches either day field when both are restricted
+        self.any_day, self.any_weekday = fields[2] == '*', fields[4] == '*'
+
+    def _day_matches(self, day) -> bool:
+        if day.month not in self.months:
+            return False
+        by_day = day.day in self.days
+        by_weekday = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return by_day and by_weekday
+        return by_day or by_weekday
+
+    def next_after(self, timestamp: float, tz: Optional[tzinfo] = None) -> Optional[float]:
+        """First occurrence strictly after `timestamp` (None if there is none within four years)"""
+        start = datetime.fromtimestamp(timestamp, tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for offset in range(MAX_SEARCH_DAYS):
+            day = start.date() + timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in self.hours:
+                if offset == 0 and hour < start.hour:
+                    continue
+                for minute in self.minutes:
+                    if offset == 0 and hour == start.hour and minute < start.minute:
+                        continue
+                    # Wall-clock times are compared as instants: in a repeated DST hour the first
+                    # occurrence fires, and a time skipped by a DST gap fires just after it
+                    fire = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz).timestamp()
+                    if fire > timestamp:
+                        return fire
+        return None
+
+    def previous(self, timestamp: float, tz: Optional[tzinfo] = None) -> Optional[float]:
+        """Last occurrence at or before `timestamp` (None if there is none within four years)"""
+        end = datetime.fromtimestamp(timestamp, tz)
+        for offset in range(MAX_SEARCH_DAYS):
+            day = end.date() - timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in reversed(self.hours):
+                if offset == 0 and hour > end.hour:
+                    continue
+                for minute in reversed(self.minutes):
+                    if offset == 0 and hour == end.hour and minute > end.minute:
+                        continue
+                    fire = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz).timestamp()
+                    if fire <= timestamp:
+                        return fire
+        return None
+
+
+class ScheduledAction:
+    """Bounds and/or a replica count a policy switches to whenever `cron` fires"""
+
+    __slots__ = ('name', 'cron', 'min_replicas', 'max_replicas', 'desired_replicas', 'timezone', 'tz')
+
+    def __init__(self, name: str, cron: str, min_replicas: Optional[int] = None, max_replicas: Optional[int] = None,
+                 desired_replicas: Optional[int] = None, timezone: Optional[str] = None):
+        if min_replicas is None and max_replicas is None and desired_replicas is None:
+            raise ValueError(f"Scheduled action '{name}' sets none of min_replicas, max_replicas, desired_replicas")
+        if min_replicas is not None and max_replicas is not None and min_replicas > max_replicas:
+            raise ValueError(f"Scheduled action '{name}' has min_replicas above max_replicas")
+        self.name = name
+        self.cron = CronExpression(cron)
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.desired_replicas = desired_replicas
+        self.timezone = timezone  # IANA name; None is the host's local time
+        try:
+            self.tz = ZoneInfo(timezone) if timezone else None
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone '{timezone}' in scheduled action '{name}'")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScheduledAction":
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f"Invalid scheduled action {data}: {e}")
+
+    def to_dict(self) -> Dict:
+        data = {"name": self.name, "cron": self.cron.expression}
+        for key in ('min_replicas', 'max_replicas', 'desired_replicas', 'timezone'):
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        return data
+
+    def next_after(self, timestamp: float) -> Optional[float]:
+        return self.cron.next_after(timestamp, self.tz)
+
+    def previous(self, timestamp: float) -> Optional[float]:
+        return self.cron.previous(timestamp, self.tz)
+
+
+@lru_cache(maxsize=256)
+def _compile(spec: str) -> Tuple[ScheduledAction, ...]:
+    return tuple(ScheduledAction.from_dict(data) for data in json.loads(spec))
+
+
+def compile_actions(actions: List[Dict]) -> Tuple[ScheduledAction, ...]:
+    """Scheduled actions of a policy (its JSON-friendly `scheduled_actions`), parsed once per distinct list"""
+    compiled = _compile(json.dumps(actions, sort_keys=True))
+    names = [action.name for action in compiled]
+    if len(set(names)) != len(names):
+        raise ValueError("Scheduled action names must be unique")
+    return compiled
+
+
+def check_bounds(actions, min_replicas: int, max_replicas: int):
+    """Reject actions whose bounds can leave min_replicas above max_replicas.
+
+    The min of one setter and the max of another are in force together unless both set
+    both bounds: then whichever fired later replaced the two. The policy's own bounds
+    count as a setter of both.
+    """
+    setters = [("the policy", min_replicas, max_replicas)] + [
+        (f"scheduled action '{a.name}'", a.min_replicas, a.max_replicas) for a in actions
+    ]
+    for low_name, low, low_max in setters:
+        for high_name, high_min, high in setters:
+            if low is None or high is None or high >= low or low_name == high_name:
+                continue
+            if low_max is None or high_min is None:
+                raise ValueError(f"min_replicas={low} of {low_name} is above max_replicas={high} of {high_name}")
+
+
+def scheduled_bounds(actions, now: float, min_replicas: int, max_replicas: int) -> Tuple[int, int, List[str]]:
+    """Replica bounds in force at `now`: each one from the action that set it last, else the policy's own.
+
+    If that leaves min above max, the bound set last wins and the other one follows it.
+    Also returns the names of the actions the bounds came from.
+    """
+    latest = {"min_replicas": (float('-inf'), min_replicas, None), "max_replicas": (float('-inf'), max_replicas, None)}
+    for action in actions:
+        fired = None
+        for key in latest:
+            value = getattr(action, key)
+            if value is None:
+                continue
+            if fired is None:
+                fired = action.previous(now)
+                if fired is None:
+                    break
+            if fired > latest[key][0]:
+                latest[key] = (fired, value, action.name)
+    if latest["min_replicas"][1] > latest["max_replicas"][1]:
+        if latest["min_replicas"][0] >= latest["max_replicas"][0]:
+            latest["max_replicas"] = latest["min_replicas"]
+        else:
+            latest["min_replicas"] = latest["max_replicas"]
+    sources = sorted({name for _, _, name in latest.values() if name is not None})
+    return latest["min_replicas"][1], latest["max_replicas"][1], sources
+
+
+def due_prescale(actions, now: float, applied: Dict[str, float]) -> Optional[Tuple[ScheduledAction, float]]:
+    """The most recent pre-scale that fired within the grace period and was not applied yet, with its time"""
+    due = None
+    for action in actions:
+        if action.desired_replicas is None:
+            continue
+        fired = action.previous(now)
+        if fired is None or now - fired > PRESCALE_GRACE_SECONDS or applied.get(action.name, float('-inf')) >= fired:
+            continue
+        if due is None or fired > due[1]:
+            due = (action, fired)
+    return due
+
+
+def next_fire(actions, after: float) -> Optional[float]:
+    """When the next of the actions fires"""
+    times = [t for t in (action.next_after(after) for action in actions) if t is not None]
+    return min(times) if times else None
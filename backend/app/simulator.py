@@ -0,0 +1,358 @@
+"""
+Offline autoscaling simulator for IntelliScaleSim
+Replays a recorded or synthetic load trace through the controller's own decision
+pipeline (app.autoscaler.decide) as a discrete-event simulation, with modelled
+replica start latency, sampling, cooldowns, scheduled actions and per-replica
+capacity. Reports the replica timeline, SLO violations and cost, priced from the
+cloud pricing table.
+"""
+
+import heapq
+import itertools
+import json
+import math
+import os
+import statistics
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .autoscaler import (
+    ReplicaGroup, ScalingPolicy, GroupMetrics, decide, scaling_thresholds, OSCILLATION_WINDOW
+)
+from .forecast import forecasts, load_series
+from .schedules import compile_actions, next_fire
+from .traffic import TrafficStats
+
+logger = logging.getLogger(__name__)
+
+PRICING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'pricing')
+
+# Timeline points kept in a result; longer runs are thinned evenly
+MAX_TIMELINE_POINTS = 2000
+
+
+class TracePoint:
+    """Load offered to a whole group at one instant, in effect until the next point"""
+
+    __slots__ = ('timestamp', 'cpu', 'rps', 'mem')
+
+    def __init__(self, timestamp: float, cpu: float, rps: Optional[float] = None, mem: float = 0.0):
+        self.timestamp = timestamp
+        self.cpu = cpu  # Total CPU demand, in % of one replica (250 = two and a half replicas busy)
+        self.rps = rps  # Total requests per second, if known
+        self.mem = mem  # Memory % per replica
+
+    @classmethod
+    def parse(cls, raw) -> "TracePoint":
+        """From a [timestamp, cpu, rps?, mem?] list or a dict with those keys"""
+        if isinstance(raw, dict):
+            return cls(float(raw["timestamp"]), float(raw.get("cpu", 0.0)), raw.get("rps"), float(raw.get("mem", 0.0)))
+        timestamp, cpu, rps, mem = (list(raw) + [None, None])[:4]
+        return cls(float(timestamp), float(cpu), rps, float(mem or 0.0))
+
+
+def recorded_trace(replica_group: str, since: float, until: Optional[float] = None) -> List[TracePoint]:
+    """A group's stored CPU history as a trace (total CPU over all reporting replicas)"""
+    return [TracePoint(ts, total) for ts, total, _ in load_series(replica_group, since, until)]
+
+
+class SimulationModel:
+    """Environment parameters of a simulation run"""
+
+    def __init__(
+        self,
+        check_interval: float = 30.0,
+        sample_interval: float = 5.0,
+        start_latency_seconds: float = 5.0,
+        warm_start_latency_seconds: float = 1.0,
+        warm_pool_size: int = 0,
+        event_triggers: bool = True,
+        capacity_rps_per_replica: float = 50.0,
+        base_latency_ms: float = 20.0,
+        slo_cpu_utilization: float = 90.0,
+        slo_latency_ms: float = 500.0,
+        initial_replicas: Optional[int] = None,
+        cpu_quota: float = 0.5,
+        mem_limit_gb: float = 0.5,
+        provider: str = "AWS"
+    ):
+        self.check_interval = check_interval
+        self.sample_interval = sample_interval
+        self.start_latency_seconds = start_latency_seconds  # Cold start until a replica serves
+        self.warm_start_latency_seconds = warm_start_latency_seconds
+        self.warm_pool_size = warm_pool_size  # A used warm replica is replaced after one cold start latency
+        self.event_triggers = event_triggers  # Evaluate on threshold crossings, like the live controller
+        self.capacity_rps_per_replica = capacity_rps_per_replica
+        self.base_latency_ms = base_latency_ms  # Response time of an idle replica
+        self.slo_cpu_utilization = slo_cpu_utilization  # Per-replica CPU demand above this violates the SLO
+        self.slo_latency_ms = slo_latency_ms
+        self.initial_replicas = initial_replicas  # Defaults to the policy's min_replicas (at least one; scale-to-zero is not modelled)
+        self.cpu_quota = cpu_quota  # vCPUs billed per replica
+        self.mem_limit_gb = mem_limit_gb
+        self.provider = provider
+
+    def latency_ms(self, rps: float, ready: int) -> float:
+        """p95 response time under load: the idle latency stretched as utilization nears 1 (M/M/1-like)"""
+        if ready <= 0:
+            return float('inf')
+        utilization = rps / (ready * self.capacity_rps_per_replica)
+        return self.base_latency_ms / max(0.02, 1 - utilization)
+
+
+def load_pricing(provider: str = "AWS") -> Dict[str, float]:
+    """Per-hour vCPU and GB prices of a provider: the active CloudPricing row, else data/pricing/*.json"""
+    try:
+        from database import SessionLocal
+        from models.cloud_pricing import CloudPricing
+        db = SessionLocal()
+        try:
+            row = db.query(CloudPricing).filter(
+                CloudPricing.provider == provider.upper(),
+                CloudPricing.is_active == True  # noqa: E712
+            ).first()
+            if row is not None:
+                return {"provider": row.provider, "cpu_per_vcpu_hour": row.cpu_per_vcpu_hour,
+                        "memory_per_gb_hour": row.memory_per_gb_hour, "source": "database"}
+        finally:
+            db.close()
+    except Exception as e:
+        logger.debug(f"Cloud pricing table unavailable, using the bundled price files: {e}")
+
+    path = os.path.join(PRICING_DIR, f"{provider.lower()}_pricing.json")
+    if not os.path.exists(path):
+        raise ValueError(f"No pricing for provider {provider}")
+    with open(path) as f:
+        data = json.load(f)
+    return {"provider": data["provider"], "cpu_per_vcpu_hour": data["compute"]["cpu_per_vcpu_hour"],
+            "memory_per_gb_hour": data["compute"]["memory_per_gb_hour"], "source": "file"}
+
+
+def simulate(policy: ScalingPolicy, trace: List[TracePoint], model: Optional[SimulationModel] = None,
+             pricing: Optional[Dict[str, float]] = None) -> Dict:
+    """Run one policy over a trace and summarize what the controller would have done"""
+    model = model or SimulationModel()
+    trace = sorted(trace, key=lambda p: p.timestamp)
+    if not trace:
+        raise ValueError("Empty trace")
+    pricing = pricing or load_pricing(model.provider)
+    wall_start = time.perf_counter()
+
+    # A private copy of the policy, and a group name the forecaster registry cannot confuse with a live group
+    policy = ScalingPolicy.from_dict(policy.to_dict())
+    group = ReplicaGroup(f"{policy.name}@sim-{uuid.uuid4().hex[:8]}", "simulated", 80, policy)
+    scale_up, scale_down = scaling_thresholds(policy)
+
+    start, end = trace[0].timestamp, trace[-1].timestamp
+    if len(trace) > 1:
+        end += trace[-1].timestamp - trace[-2].timestamp
+    ready = model.initial_replicas or max(1, policy.min_replicas)
+    starting: Dict[int, float] = {}  # launch id -> ready time
+    warm = model.warm_pool_size
+    launch_ids = itertools.count()
+
+    events: List[Tuple[float, int, str, Optional[int]]] = []
+    sequence = itertools.count()
+
+    def schedule(at: float, kind: str, payload: Optional[int] = None):
+        if at <= end:
+            heapq.heappush(events, (at, next(sequence), kind, payload))
+
+    for index, point in enumerate(trace):
+        schedule(point.timestamp, "load", index)
+    schedule(start, "tick")
+    schedule(start, "sample")
+    actions = compile_actions(policy.scheduled_actions) if policy.scheduled_actions else ()
+    if actions:
+        schedule(next_fire(actions, start - 1) or float('inf'), "scheduled")
+
+    point = trace[0]
+    now = start
+    window: List[Tuple[float, float]] = []  # Recent (per-replica CPU, memory) samples
+    zone = "normal"
+    stats = {"scale_ups": 0, "scale_downs": 0, "evaluations": 0, "triggered": 0, "oscillations": 0,
+             "replica_seconds": 0.0, "violation_seconds": 0.0, "peak_replicas": ready, "unserved_cpu": 0.0,
+             "under_seconds": 0.0, "over_replica_seconds": 0.0}
+    decision_cpu: List[float] = []  # CPU seconds of each evaluation
+    last_direction, last_change = 0, float('-inf')
+    under_since: Optional[float] = None  # Start of the current under-provisioned episode
+    episodes: List[float] = []  # Durations of the closed under-provisioned episodes
+    timeline: List[Dict] = []
+
+    def needed() -> int:
+        """Replicas that would serve the current load within the SLO"""
+        replicas = math.ceil(point.cpu / model.slo_cpu_utilization)
+        if point.rps is not None:
+            replicas = max(replicas, math.ceil(point.rps / model.capacity_rps_per_replica))
+        return max(1, replicas)
+
+    def account(until: float):
+        """Add the interval since `now` to the totals, at the state it had"""
+        nonlocal under_since
+        elapsed = until - now
+        stats["replica_seconds"] += elapsed * (ready + len(starting))
+        if violated():
+            stats["violation_seconds"] += elapsed
+        stats["unserved_cpu"] += max(0.0, point.cpu - ready * 100.0) * elapsed
+        required = needed()
+        if ready < required:
+            stats["under_seconds"] += elapsed
+            if under_since is None:
+                under_since = now
+        elif under_since is not None:
+            episodes.append(now - under_since)
+            under_since = None
+        stats["over_replica_seconds"] += max(0, ready + len(starting) - required) * elapsed
+
+    def utilization() -> float:
+        if not ready:
+            return float('inf') if point.cpu > 0 else 0.0
+        return point.cpu / ready
+
+    def violated() -> bool:
+        if utilization() > model.slo_cpu_utilization:
+            return True
+        return point.rps is not None and model.latency_ms(point.rps, ready) > model.slo_latency_ms
+
+    def evaluate(trigger: str):
+        nonlocal ready, warm, last_direction, last_change
+        stats["evaluations"] += 1
+        if trigger == "event":
+            stats["triggered"] += 1
+        current = ready + len(starting)
+        recent = window[-max(1, policy.smoothing_window):]
+        metrics = GroupMetrics()
+        if recent and ready:
+            reduce = max if policy.smoothing == "max" else (lambda values: sum(values) / len(values))
+            cpu = reduce([c for c, _ in recent])
+            metrics = GroupMetrics(cpu, reduce([m for _, m in recent]), cpu, ready, now)
+        signals = None
+        if point.rps is not None and ready:
+            signals = TrafficStats(point.rps / current, model.latency_ms(point.rps, ready) / 1000, int(point.rps), "proxy", ready)
+        cpu_started = time.process_time()
+        desired, reason = decide(group, current, metrics, signals, now)
+        decision_cpu.append(time.process_time() - cpu_started)
+        if desired == current:
+            return
+        direction = 1 if desired > current else -1
+        if last_direction and direction != last_direction and now - last_change < OSCILLATION_WINDOW:
+            stats["oscillations"] += 1
+        last_direction, last_change = direction, now
+        policy.last_scale_time = now
+        if desired > current:
+            stats["scale_ups"] += 1
+            for _ in range(desired - current):
+                latency = model.start_latency_seconds
+                if warm:
+                    warm -= 1
+                    latency = model.warm_start_latency_seconds
+                    schedule(now + model.start_latency_seconds, "refill")
+                launch = next(launch_ids)
+                starting[launch] = now + latency
+                schedule(now + latency, "ready", launch)
+        else:
+            stats["scale_downs"] += 1
+            # Starting replicas are the newest, so they go first (like group.replicas[desired:])
+            for _ in range(current - desired):
+                if starting:
+                    starting.pop(max(starting))
+                else:
+                    ready -= 1
+        stats["peak_replicas"] = max(stats["peak_replicas"], ready + len(starting))
+        record(reason)
+
+    def record(reason: Optional[str] = None):
+        entry = {"t": round(now - start, 3), "ready": ready, "starting": len(starting),
+                 "cpu_demand": round(point.cpu, 2), "cpu_per_replica": round(utilization(), 2) if ready else None}
+        if point.rps is not None:
+            entry["rps"] = round(point.rps, 2)
+            entry["p95_latency_ms"] = round(model.latency_ms(point.rps, ready), 1) if ready else None
+        if reason:
+            entry["reason"] = reason
+        timeline.append(entry)
+
+    record()
+    try:
+        while events:
+            at, _, kind, payload = heapq.heappop(events)
+            account(at)
+            now = at
+
+            if kind == "load":
+                point = trace[payload]
+            elif kind == "refill":
+                warm = min(model.warm_pool_size, warm + 1)
+            elif kind == "ready":
+                if starting.pop(payload, None) is not None:
+                    ready += 1
+                    record()
+            elif kind == "sample":
+                cpu = min(100.0, utilization()) if ready else 0.0
+                window.append((cpu, point.mem))
+                del window[:-60]
+                schedule(now + model.sample_interval, "sample")
+                if model.event_triggers:
+                    new_zone = "high" if cpu > scale_up else "low" if cpu < scale_down else "normal"
+                    crossed = new_zone != zone and new_zone != "normal"
+                    zone = new_zone
+                    if crossed:
+                        evaluate("event")
+            elif kind == "tick":
+                evaluate("sweep")
+                schedule(now + (policy.evaluation_interval or model.check_interval), "tick")
+            elif kind == "scheduled":
+                evaluate("scheduled")
+                schedule(next_fire(actions, now) or float('inf'), "scheduled")
+        account(end)
+        if under_since is not None:
+            episodes.append(end - under_since)
+    finally:
+        forecasts.drop(group.name)
+
+    duration = max(end - start, 1e-9)
+    hourly = model.cpu_quota * pricing["cpu_per_vcpu_hour"] + model.mem_limit_gb * pricing["memory_per_gb_hour"]
+    if len(timeline) > MAX_TIMELINE_POINTS:
+        step = len(timeline) / MAX_TIMELINE_POINTS
+        timeline = [timeline[int(i * step)] for i in range(MAX_TIMELINE_POINTS)]
+    wall = time.perf_counter() - wall_start
+    return {
+        "policy": policy.to_dict(),
+        "duration_seconds": round(duration, 1),
+        "evaluations": stats["evaluations"],
+        "triggered_evaluations": stats["triggered"],
+        "scale_ups": stats["scale_ups"],
+        "scale_downs": stats["scale_downs"],
+        "oscillations": stats["oscillations"],
+        "peak_replicas": stats["peak_replicas"],
+        "avg_replicas": round(stats["replica_seconds"] / duration, 3),
+        "replica_hours": round(stats["replica_seconds"] / 3600, 4),
+        "slo_violation_seconds": round(stats["violation_seconds"], 1),
+        "slo_violation_pct": round(100 * stats["violation_seconds"] / duration, 2),
+        "unserved_cpu_pct": round(100 * stats["unserved_cpu"] / max(1e-9, _cpu_seconds(trace, end)), 2),
+        "under_provisioned_seconds": round(stats["under_seconds"], 1),
+        "over_provisioned_replica_seconds": round(stats["over_replica_seconds"], 1),
+        "time_to_capacity": {
+            "episodes": len(episodes),
+            "mean_seconds": round(sum(episodes) / len(episodes), 1) if episodes else 0.0,
+            "max_seconds": round(max(episodes), 1) if episodes else 0.0
+        },
+        # Median, so one-off costs such as a forecaster's first fit do not dominate
+        "decision_cpu_us": round(1e6 * statistics.median(decision_cpu), 2) if decision_cpu else 0.0,
+        "cost": {
+            "provider": pricing["provider"],
+            "pricing_source": pricing.get("source"),
+            "per_replica_hour": round(hourly, 6),
+            "total": round(stats["replica_seconds"] / 3600 * hourly, 6)
+        },
+        "speedup": round(duration / wall, 1) if wall > 0 else None,
+        "timeline": timeline
+    }
+
+
+def _cpu_seconds(trace: List[TracePoint], end: float) -> float:
+    """Total CPU demand of a trace, in %-seconds"""
+    total = 0.0
+    for point, following in zip(trace, trace[1:] + [None]):
+        total += point.cpu * ((following.timestamp if following else end) - point.timestamp)
+    return total
@@ -0,0 +1,287 @@
+"""
+Persistent metric and scaling history for IntelliScaleSim
+Samples and scaling events are appended here so they can be exported or replayed later
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, Integer, String, Float, Text, DateTime, JSON,
+    Boolean, Index, select, insert, delete, func, cast, distinct, inspect, text
+)
+
+from .metrics import ContainerSample
+
+logger = logging.getLogger(__name__)
+
+# Same database file the rest of the backend uses, overridable for the container image
+DB_PATH = os.environ.get(
+    'INTELLISCALESIM_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'intelliscalesim.db')
+)
+DATABASE_URL = f'sqlite:///{DB_PATH}'
+
+# How long raw samples are kept before being pruned
+RETENTION_SECONDS = int(os.environ.get('INTELLISCALESIM_RETENTION_DAYS', '30')) * 86400
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    echo=False
+)
+
+metadata = MetaData()
+
+metric_samples = Table(
+    'metric_samples', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('timestamp', Float, nullable=False),
+    Column('container_id', String(12), nullable=False),
+    Column('container_name', String(255)),
+    Column('replica_group', String(255)),
+    Column('cpu_percent', Float),
+    Column('mem_percent', Float),
+    Column('mem_usage', Integer),
+    Column('mem_limit', Integer),
+    Column('net_rx', Integer),
+    Column('net_tx', Integer),
+    Column('block_read', Integer),
+    Column('block_write', Integer),
+    Column('pids', Integer),
+    Index('ix_metric_samples_group_ts', 'replica_group', 'timestamp'),
+    Index('ix_metric_samples_container_ts', 'container_id', 'timestamp'),
+)
+
+scaling_events = Table(
+    'scaling_events', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('timestamp', Float, nullable=False, index=True),
+    Column('replica_group', String(255), nullable=False),
+    Column('action', String(50), nullable=False),
+    Column('details', Text),
+    # Phase timings of the scaling action as of the event; trace_id joins its row in scaling_traces
+    Column('trace_id', String(32)),
+    Column('timings', JSON),
+)
+
+# Phase timestamps of one scaling action (see app.tracing)
+scaling_traces = Table(
+    'scaling_traces', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('timestamp', Float, nullable=False, index=True),
+    Column('replica_group', String(255), nullable=False),
+    Column('action', String(50), nullable=False),
+    Column('container_id', String(12)),
+    Column('source', String(20)),
+    Column('phases', JSON),
+    Column('trace_id', String(32)),
+)
+
+# Replica groups of the autoscaler, so they survive a backend restart
+replica_groups = Table(
+    'replica_groups', metadata,
+    Column('name', String(255), primary_key=True),
+    Column('image', String(512), nullable=False),
+    Column('container_port', Integer, nullable=False),
+    Column('mem_limit', String(32)),
+    Column('cpu_quota', Float),
+    Column('extra_labels', JSON),
+    Column('policy', JSON),
+    Column('enabled', Boolean),
+    Column('next_index', Integer),
+    Column('warm_pool_size', Integer),
+    Column('warm_pool_mode', String(20)),
+    Column('replicas', JSON),  # [[container_id, host_port], ...]
+    Column('warm_pool', JSON),  # [[container_id, host_port], ...]
+    Column('load_balancer', String(32)),
+    Column('proxy_port', Integer),
+    Column('placement', String(16)),
+    Column('created_at', Float),
+    Column('updated_at', Float),
+)
+
+# Owned by models.LoadTest; declared here so the export can read it without the ORM models
+load_tests = Table(
+    'load_tests', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('target_url', String, nullable=False),
+    Column('total_requests', Integer, nullable=False),
+    Column('concurrency', Integer, nullable=False),
+    Column('duration', Integer, nullable=False),
+    Column('status', String),
+    Column('results', JSON),
+    Column('created_at', DateTime),
+)
+
+
+class MetricsStore:
+    """Append-only store for samples and scaling events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._last_prune = 0.0
+
+    def _ensure_tables(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                metadata.create_all(bind=engine)
+                self._add_missing_columns()
+                self._initialized = True
+
+    def _add_missing_columns(self):
+        """Add columns introduced after a table was created (create_all never alters tables)"""
+        inspector = inspect(engine)
+        with engine.begin() as conn:
+            for table in (replica_groups, scaling_events, scaling_traces):
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}'))
+                        logger.info(f"Added column {table.name}.{column.name}")
+
+    def record_samples(self, samples: Iterable[ContainerSample], replica_group: Optional[str] = None):
+        """Persist a batch of samples in one executemany"""
+        rows = [
+            {
+                "timestamp": s.timestamp,
+                "container_id": s.container_id,
+                "container_name": s.name,
+                "replica_group": replica_group,
+                "cpu_percent": s.cpu_percent,
+                "mem_percent": s.mem_percent,
+                "mem_usage": s.mem_usage,
+                "mem_limit": s.mem_limit,
+                "net_rx": s.net_rx,
+                "net_tx": s.net_tx,
+                "block_read": s.block_read,
+                "block_write": s.block_write,
+                "pids": s.pids,
+            }
+            for s in samples
+        ]
+        if not rows:
+            return
+        try:
+            self._ensure_tables()
+            with engine.begin() as conn:
+                conn.execute(insert(metric_samples), rows)
+            self._maybe_prune()
+        except Exception as e:
+            logger.error(f"Failed to record metric samples: {e}")
+
+    def record_event(self, replica_group: str, action: str, details: str, timestamp: Optional[float] = None,
+                     timings: Optional[Dict] = None):
+        """Persist a single scaling event, with the phase timings of its scaling action if it has any"""
+        try:
+            self._ensure_tables()
+            with engine.begin() as conn:
+                conn.execute(insert(scaling_events), {
+                    "timestamp": timestamp if timestamp is not None else time.time(),
+                    "replica_group": replica_group,
+                    "action": action,
+                    "details": details,
+                    "trace_id": timings.get("trace_id") if timings else None,
+                    "timings": timings,
+                })
+        except Exception as e:
+            logger.error(f"Failed to record scaling event: {e}")
+
+    def record_trace(self, replica_group: str, action: str, container_id: Optional[str], source: Optional[str], phases: Dict[str, float],
+                     trace_id: Optional[str] = None):
+        """Persist the phase timestamps of one scaling action"""
+        try:
+            self._ensure_tables()
+            with engine.begin() as conn:
+                conn.execute(insert(scaling_traces), {
+                    "timestamp": min(phases.values()) if phases else time.time(),
+                    "replica_group": replica_group,
+                    "action": action,
+                    "container_id": container_id[:12] if container_id else None,
+                    "source": source,
+                    "phases": phases,
+                    "trace_id": trace_id,
+                })
+        except Exception as e:
+            logger.error(f"Failed to record scaling trace: {e}")
+
+    def save_groups(self, rows: List[Dict]):
+        """Insert or replace replica group rows"""
+        if not rows:
+            return
+        try:
+            self._ensure_tables()
+            with engine.begin() as conn:
+                conn.execute(delete(replica_groups).where(replica_groups.c.name.in_([row["name"] for row in rows])))
+                conn.execute(insert(replica_groups), [{**row, "updated_at": time.time()} for row in rows])
+        except Exception as e:
+            logger.error(f"Failed to save replica groups: {e}")
+
+    def delete_group(self, name: str):
+        try:
+            self._ensure_tables()
+            with engine.begin() as conn:
+                conn.execute(delete(replica_groups).where(replica_groups.c.name == name))
+        except Exception as e:
+            logger.error(f"Failed to delete replica group {name}: {e}")
+
+    def load_groups(self) -> List[Dict]:
+        """All persisted replica group rows"""
+        try:
+            self._ensure_tables()
+            with engine.connect() as conn:
+                return [dict(row._mapping) for row in conn.execute(select(replica_groups))]
+        except Exception as e:
+            logger.error(f"Failed to load replica groups: {e}")
+            return []
+
+    def group_series(self, replica_group: str, since: float, until: Optional[float] = None, bucket_seconds: int = 10) -> List[Tuple[float, float, int]]:
+        """Per-bucket (timestamp, average CPU %, replicas reporting) of a replica group, oldest first"""
+        bucket = cast(metric_samples.c.timestamp / bucket_seconds, Integer)
+        query = (
+            select(
+                func.min(metric_samples.c.timestamp),
+                func.avg(metric_samples.c.cpu_percent),
+                func.count(distinct(metric_samples.c.container_id))
+            )
+            .where(metric_samples.c.replica_group == replica_group)
+            .where(metric_samples.c.timestamp >= since)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        if until is not None:
+            query = query.where(metric_samples.c.timestamp < until)
+        try:
+            self._ensure_tables()
+            with engine.connect() as conn:
+                return [(row[0], row[1] or 0.0, row[2]) for row in conn.execute(query)]
+        except Exception as e:
+            logger.error(f"Failed to read history of group {replica_group}: {e}")
+            return []
+
+    def _maybe_prune(self):
+        """Drop samples past the retention window, at most once an hour"""
+        now = time.time()
+        if now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        with engine.begin() as conn:
+            conn.execute(delete(metric_samples).where(metric_samples.c.timestamp < now - RETENTION_SECONDS))
+
+    def stream(self, query, chunk_size: int = 1000) -> Iterator[List]:
+        """Yield result rows in chunks using a server-side cursor"""
+        self._ensure_tables()
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for partition in result.partitions(chunk_size):
+                yield partition
+
+
+# Global store instance
+metrics_store = MetricsStore()
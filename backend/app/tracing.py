@@ -0,0 +1,82 @@
+"""
+Scaling latency tracing for IntelliScaleSim
+Every scaling action records when it passed each phase, from the metric that
+triggered it to the first successful health probe of the new replica.
+"""
+
+import time
+import uuid
+from typing import Dict, Optional
+import logging
+
+from prometheus_client import Histogram
+
+from .storage import metrics_store
+
+logger = logging.getLogger(__name__)
+
+# Phases in the order a scale-up passes them; a scale-down drains the replica, then ends with "removed".
+# "admitted" is when the action got through the admission queue (app.admission), so its duration is the queue wait.
+SCALE_UP_PHASES = ('observed', 'decided', 'admitted', 'port_allocated', 'created', 'running', 'healthy')
+SCALE_DOWN_PHASES = ('observed', 'decided', 'drained', 'admitted', 'removed')
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+phase_seconds = Histogram(
+    'intelliscalesim_scaling_phase_seconds',
+    'Time spent reaching a scaling phase from the previous one',
+    ['replica_group', 'phase'],
+    buckets=LATENCY_BUCKETS
+)
+action_seconds = Histogram(
+    'intelliscalesim_scaling_action_seconds',
+    'Time from the triggering metric to the last phase of a scaling action',
+    ['replica_group', 'action'],
+    buckets=LATENCY_BUCKETS
+)
+
+
+class ScalingTrace:
+    """Phase timestamps of one scaling action.
+
+    `timings` is a plain dict that is filled in as the action progresses, so it can
+    be handed out (e.g. in scaling events) before the action has finished. Its
+    trace_id is stored with those events and with the finished trace.
+    """
+
+    __slots__ = ('replica_group', 'action', 'container_id', 'source', 'timings')
+
+    def __init__(self, replica_group: str, action: str, observed_at: float, decided_at: float):
+        self.replica_group = replica_group
+        self.action = action
+        self.container_id: Optional[str] = None
+        self.source: Optional[str] = None
+        self.timings: Dict = {"trace_id": uuid.uuid4().hex, "status": "in_progress", "phases": {}, "durations": {}}
+        self.mark('observed', min(observed_at, decided_at))
+        self.mark('decided', decided_at)
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        return self.timings["phases"]
+
+    def mark(self, phase: str, timestamp: Optional[float] = None):
+        """Record that the action reached a phase"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        if self.phases:
+            previous = max(self.phases.values())
+            self.timings["durations"][phase] = round(max(0.0, timestamp - previous), 4)
+        self.phases[phase] = timestamp
+
+    def finish(self, status: str = "done"):
+        """Close the trace and export it to Prometheus and the metrics store (once)"""
+        if self.timings["status"] != "in_progress":
+            return
+        durations = self.timings["durations"]
+        self.timings["total_seconds"] = round(max(self.phases.values()) - self.phases['observed'], 4)
+        self.timings["status"] = status
+        for phase, seconds in durations.items():
+            phase_seconds.labels(replica_group=self.replica_group, phase=phase).observe(seconds)
+        if status == "done":
+            action_seconds.labels(replica_group=self.replica_group, action=self.action).observe(self.timings["total_seconds"])
+        metrics_store.record_trace(self.replica_group, self.action, self.container_id, self.source, dict(self.phases),
+                                   self.timings["trace_id"])
@@ -0,0 +1,185 @@
+"""
+Request-rate and latency signals for IntelliScaleSim
+Per-replica request records, fed by a front proxy (real requests) or by periodic
+synthetic probes against each replica's host port, summarized per group as
+requests per second per replica and p95 response latency.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from prometheus_client import Counter, Gauge
+
+from . import runtime
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two synthetic probe rounds, and how long one probe may take
+PROBE_INTERVAL = float(os.environ.get('INTELLISCALESIM_PROBE_INTERVAL', '5'))
+PROBE_TIMEOUT = 2.0
+# Window the request rate and latency percentile are computed over
+SIGNAL_WINDOW = 30.0
+# Requests kept in memory per replica
+REQUEST_HISTORY = 5000
+
+probes_total = Counter('intelliscalesim_latency_probes_total', 'Synthetic latency probes', ['result'])
+group_rps = Gauge('intelliscalesim_group_requests_per_second', 'Requests per second per replica', ['replica_group'])
+group_p95 = Gauge('intelliscalesim_group_p95_latency_seconds', 'p95 response latency of a replica group', ['replica_group', 'source'])
+
+
+class ReplicaTraffic:
+    """Recent request and probe latencies of one replica"""
+
+    __slots__ = ('requests', 'probes')
+
+    def __init__(self):
+        self.requests: deque = deque(maxlen=REQUEST_HISTORY)  # (timestamp, latency seconds)
+        self.probes: deque = deque(maxlen=120)
+
+
+class TrafficStats:
+    """Request signals of a replica group over the signal window"""
+
+    __slots__ = ('requests_per_replica', 'p95_latency', 'requests', 'source', 'reporting')
+
+    def __init__(self, requests_per_replica: Optional[float] = None, p95_latency: Optional[float] = None,
+                 requests: int = 0, source: Optional[str] = None, reporting: int = 0):
+        self.requests_per_replica = requests_per_replica  # None without proxied traffic
+        self.p95_latency = p95_latency  # Seconds; None without requests or probes
+        self.requests = requests
+        self.source = source  # "proxy" or "probe"
+        self.reporting = reporting
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests_per_replica": round(self.requests_per_replica, 2) if self.requests_per_replica is not None else None,
+            "p95_latency_ms": round(self.p95_latency * 1000, 1) if self.p95_latency is not None else None,
+            "requests": self.requests,
+            "source": self.source,
+            "reporting_replicas": self.reporting
+        }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class TrafficRegistry:
+    """Request records of every replica, keyed by short container ID"""
+
+    def __init__(self):
+        self.replicas: Dict[str, ReplicaTraffic] = {}
+        self._lock = threading.Lock()
+
+    def _replica(self, container_id: str) -> ReplicaTraffic:
+        key = container_id[:12]
+        replica = self.replicas.get(key)
+        if replica is None:
+            with self._lock:
+                replica = self.replicas.setdefault(key, ReplicaTraffic())
+        return replica
+
+    def record_request(self, container_id: str, latency: float, timestamp: Optional[float] = None):
+        """One proxied request answered by a replica"""
+        self._replica(container_id).requests.append((timestamp if timestamp is not None else time.time(), latency))
+
+    def record_probe(self, container_id: str, latency: float, timestamp: Optional[float] = None):
+        """One synthetic probe answered by a replica"""
+        self._replica(container_id).probes.append((timestamp if timestamp is not None else time.time(), latency))
+
+    def forget(self, container_id: str):
+        with self._lock:
+            self.replicas.pop(container_id[:12], None)
+
+    def group_stats(self, group_name: str, container_ids: List[str], window: float = SIGNAL_WINDOW) -> TrafficStats:
+        """Request rate per replica and p95 latency of the given replicas.
+
+        Proxied requests are preferred; probe latencies are used only when no
+        request reached the group within the window. The request rate is only
+        known from proxied traffic.
+        """
+        if not container_ids:
+            return TrafficStats()
+        cutoff = time.time() - window
+        requests: List[float] = []
+        probes: List[float] = []
+        reporting = 0
+        for container_id in container_ids:
+            replica = self.replicas.get(container_id[:12])
+            if replica is None:
+                continue
+            recent = [latency for ts, latency in list(replica.requests) if ts >= cutoff]
+            probed = [latency for ts, latency in list(replica.probes) if ts >= cutoff]
+            requests.extend(recent)
+            probes.extend(probed)
+            reporting += 1 if recent or probed else 0
+
+        if requests:
+            stats = TrafficStats(len(requests) / window / len(container_ids), percentile(requests, 0.95), len(requests), "proxy", reporting)
+        elif probes:
+            stats = TrafficStats(None, percentile(probes, 0.95), 0, "probe", reporting)
+        else:
+            return TrafficStats()
+        if stats.requests_per_replica is not None:
+            group_rps.labels(replica_group=group_name).set(stats.requests_per_replica)
+        group_p95.labels(replica_group=group_name, source=stats.source).set(stats.p95_latency)
+        return stats
+
+
+class LatencyProber:
+    """Periodically times a GET against every replica that a policy wants latency for"""
+
+    def __init__(self, registry: TrafficRegistry, interval: float = PROBE_INTERVAL):
+        self.registry = registry
+        self.interval = interval
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        # () -> [(container_id, host_port, path), ...], supplied by the autoscaler
+        self.target_source: Callable[[], List[Tuple[str, int, str]]] = lambda: []
+        self._executor = ThreadPoolExecutor(max_workers=8)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._probe_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"✓ Latency prober started ({self.interval}s interval)")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _probe_loop(self):
+        while self.running:
+            try:
+                self.probe_once()
+            except Exception as e:
+                logger.error(f"Error in latency prober: {e}")
+            time.sleep(self.interval)
+
+    def probe_once(self):
+        """Probe every target in parallel and record the answers"""
+        targets = self.target_source()
+        for container_id, latency in zip(
+            [cid for cid, _, _ in targets],
+            self._executor.map(lambda t: runtime.probe_latency(t[1], path=t[2], timeout=PROBE_TIMEOUT), targets)
+        ):
+            if latency is None:
+                probes_total.labels(result="failed").inc()
+                continue
+            probes_total.labels(result="timeout" if latency >= PROBE_TIMEOUT else "ok").inc()
+            self.registry.record_probe(container_id, latency)
+
+
+# Global instances
+traffic = TrafficRegistry()
+latency_prober = LatencyProber(traffic)
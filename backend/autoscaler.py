@@ -1,26 +1,102 @@
-import time
 import json
 import subprocess
-import threading
-from datetime import datetime
 from typing import Dict, List
+from app.metrics import ContainerSample
+from app.autoscaler import autoscaler as controller, ScalingPolicy
+
+# Settings that feed the scaling policy of every enabled container
+POLICY_SETTINGS = {
+    'cpu_scale_up_threshold',
+    'cpu_scale_down_threshold',
+    'memory_scale_up_threshold',
+    'memory_scale_down_threshold',
+    'min_replicas',
+    'max_replicas',
+    'policy_type',
+    'target_cpu_utilization',
+    'max_scale_up_step',
+    'max_scale_down_step',
+    'check_interval',
+}
 
 class AutoScaler:
+    """Per-container autoscaling API.
+
+    Each enabled container becomes a replica group of the unified controller in
+    app.autoscaler, which does the actual monitoring and scaling in its single
+    reconciliation loop. This class only keeps the legacy configuration and
+    history shapes used by the /autoscaler endpoints.
+    """
     def __init__(self):
         # Default thresholds
         self.cpu_scale_up_threshold = 70.0
         self.cpu_scale_down_threshold = 20.0
         self.memory_scale_up_threshold = 75.0
         self.memory_scale_down_threshold = 25.0
-        
+
         self.min_replicas = 1
         self.max_replicas = 5
         self.check_interval = 30
-        
+
+        # "threshold" moves one replica per check; "target_tracking" sizes in one step
+        self.policy_type = "threshold"
+        self.target_cpu_utilization = 50.0
+        self.max_scale_up_step = None
+        self.max_scale_down_step = None
+
         self.scaling_rules = {}
         self.scaling_history = []
         self.running = False
-        
+
+        controller.listeners.append(self._on_scaling_event)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Config changes (e.g. PUT /autoscaler/config) apply to the live groups
+        if 'scaling_rules' not in self.__dict__:
+            return
+        if name in POLICY_SETTINGS:
+            self._sync_policies()
+
+    def _policy(self, container_name: str) -> ScalingPolicy:
+        return ScalingPolicy(
+            name=container_name,
+            min_replicas=self.min_replicas,
+            max_replicas=self.max_replicas,
+            cpu_scale_up_threshold=self.cpu_scale_up_threshold,
+            cpu_scale_down_threshold=self.cpu_scale_down_threshold,
+            cooldown_seconds=0,
+            evaluation_interval=self.check_interval,
+            memory_scale_up_threshold=self.memory_scale_up_threshold,
+            memory_scale_down_threshold=self.memory_scale_down_threshold,
+            policy_type=self.policy_type,
+            target_cpu_utilization=self.target_cpu_utilization,
+            max_scale_up_step=self.max_scale_up_step,
+            max_scale_down_step=self.max_scale_down_step
+        )
+
+    def _sync_policies(self):
+        for container_name in self.scaling_rules:
+            group = controller.replica_groups.get(container_name)
+            if group:
+                last_scale_time = group.policy.last_scale_time
+                group.policy = self._policy(container_name)
+                group.policy.last_scale_time = last_scale_time
+                controller.save_group(group)
+
+    def _on_scaling_event(self, event: Dict):
+        """Mirror controller events for our containers into the legacy history"""
+        container_name = event["group"]
+        if container_name not in self.scaling_rules or event["action"] not in ("scale_up", "scale_down"):
+            return
+        self.scaling_history.append({
+            "timestamp": event["timestamp"],
+            "container": container_name,
+            "action": event["action"].upper(),
+            "replicas": event.get("replicas")
+        })
+        print(f"✅ {event['action'].upper()}: {container_name} to {event.get('replicas')} replicas")
+
     def run_docker_command(self, cmd: str) -> str:
         """Execute Docker command"""
         try:
@@ -29,7 +105,7 @@ class AutoScaler:
         except Exception as e:
             print(f"Error running docker command: {e}")
             return ""
-    
+
     def get_container_stats(self) -> List[Dict]:
         """Get current stats for all containers with intelliscalesim label"""
         try:
@@ -37,7 +113,7 @@ class AutoScaler:
             cmd = 'stats --no-stream --format "{{json .}}"'
             result = subprocess.run(f"docker {cmd}", shell=True, capture_output=True, text=True)
             output = result.stdout
-            
+
             stats = []
             if output.strip():
                 for line in output.strip().split('\n'):
@@ -45,40 +121,30 @@ class AutoScaler:
                         try:
                             stat = json.loads(line)
                             container_id = stat.get("ID", "")[:12]
-                            
+
                             # Check if container has intelliscalesim label
                             inspect_cmd = f'inspect {container_id} --format "{{{{.Config.Labels.intelliscalesim}}}}"'
                             inspect_result = subprocess.run(f"docker {inspect_cmd}", shell=True, capture_output=True, text=True)
-                            
+
                             if inspect_result.stdout.strip() != "true":
                                 continue
-                            
-                            # Parse CPU and Memory percentages
-                            cpu_str = stat.get("CPUPerc", "0%").replace("%", "")
-                            mem_str = stat.get("MemPerc", "0%").replace("%", "")
-                            
-                            try:
-                                cpu_percent = float(cpu_str)
-                                mem_percent = float(mem_str)
-                            except:
-                                cpu_percent = 0.0
-                                mem_percent = 0.0
-                            
+
+                            sample = ContainerSample.from_stats(stat)
                             stats.append({
                                 "id": container_id,
-                                "name": stat.get("Name", ""),
-                                "cpu": cpu_percent,
-                                "memory": mem_percent
+                                "name": sample.name,
+                                "cpu": sample.cpu_percent,
+                                "memory": sample.mem_percent
                             })
                         except Exception as e:
                             print(f"Error parsing container stat: {e}")
                             continue
-            
+
             return stats
         except Exception as e:
             print(f"Error getting container stats: {e}")
             return []
-    
+
     def get_container_info(self, container_id: str) -> Dict:
         """Get detailed container information"""
         try:
@@ -94,165 +160,80 @@ class AutoScaler:
         except:
             pass
         return {}
-    
-    def scale_up(self, container_name: str, container_id: str):
-        """Scale up by creating additional replica"""
-        try:
-            info = self.get_container_info(container_id)
-            if not info:
-                return False
-            
-            current_replicas = self.scaling_rules.get(container_name, {}).get("replicas", 1)
-            if current_replicas >= self.max_replicas:
-                print(f"Already at max replicas ({self.max_replicas}) for {container_name}")
-                return False
-            
-            image = info["image"]
-            new_replica_name = f"{container_name}_replica_{current_replicas + 1}"
-            
-            # Get port mapping
-            port_mapping = ""
-            if info.get("ports"):
-                for container_port, host_bindings in info["ports"].items():
-                    if host_bindings:
-                        base_port = int(host_bindings[0]["HostPort"])
-                        new_port = base_port + current_replicas
-                        port_mapping = f"-p {new_port}:{container_port.split('/')[0]}"
-            
-            # Create new container
-            cmd = f"run -d --name {new_replica_name} {port_mapping} --label intelliscalesim=true --label parent={container_name} {image}"
-            self.run_docker_command(cmd)
-            
-            # Update replica count
-            if container_name not in self.scaling_rules:
-                self.scaling_rules[container_name] = {"enabled": True, "replicas": 1}
-            self.scaling_rules[container_name]["replicas"] += 1
-            
-            # Log scaling event
-            self.scaling_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "container": container_name,
-                "action": "SCALE_UP",
-                "replicas": self.scaling_rules[container_name]["replicas"]
-            })
-            
-            print(f"✅ SCALED UP: {container_name} to {self.scaling_rules[container_name]['replicas']} replicas")
-            return True
-            
-        except Exception as e:
-            print(f"Error scaling up {container_name}: {e}")
-            return False
-    
-    def scale_down(self, container_name: str):
-        """Scale down by removing a replica"""
-        try:
-            current_replicas = self.scaling_rules.get(container_name, {}).get("replicas", 1)
-            if current_replicas <= self.min_replicas:
-                print(f"Already at min replicas ({self.min_replicas}) for {container_name}")
-                return False
-            
-            # Find and remove a replica
-            cmd = f"ps --format json --filter label=parent={container_name}"
-            output = self.run_docker_command(cmd)
-            
-            if output:
-                for line in output.strip().split('\n'):
-                    if line.strip():
-                        container = json.loads(line)
-                        replica_id = container["ID"]
-                        
-                        # Remove this replica
-                        self.run_docker_command(f"rm -f {replica_id}")
-                        
-                        # Update replica count
-                        self.scaling_rules[container_name]["replicas"] -= 1
-                        
-                        # Log scaling event
-                        self.scaling_history.append({
-                            "timestamp": datetime.now().isoformat(),
-                            "container": container_name,
-                            "action": "SCALE_DOWN",
-                            "replicas": self.scaling_rules[container_name]["replicas"]
-                        })
-                        
-                        print(f"✅ SCALED DOWN: {container_name} to {self.scaling_rules[container_name]['replicas']} replicas")
-                        return True
-            
+
+    def _replicas(self, container_name: str) -> int:
+        group = controller.replica_groups.get(container_name)
+        return len(group.replicas) if group else 1
+
+    def scale_up(self, container_name: str, container_id: str = None, count: int = 1):
+        """Scale up by creating `count` additional replicas in one step"""
+        current_replicas = self._replicas(container_name)
+        if current_replicas >= self.max_replicas:
+            print(f"Already at max replicas ({self.max_replicas}) for {container_name}")
             return False
-            
-        except Exception as e:
-            print(f"Error scaling down {container_name}: {e}")
+        return controller.scale_group(container_name, current_replicas + count, reason="manual scale up")
+
+    def scale_down(self, container_name: str, count: int = 1):
+        """Scale down by removing `count` replicas in one step"""
+        current_replicas = self._replicas(container_name)
+        if current_replicas <= self.min_replicas:
+            print(f"Already at min replicas ({self.min_replicas}) for {container_name}")
             return False
-    
+        return controller.scale_group(container_name, current_replicas - count, reason="manual scale down")
+
     def check_and_scale(self):
         """Check metrics and perform scaling if needed"""
-        stats = self.get_container_stats()
-        
-        for stat in stats:
-            container_name = stat["name"]
-            
-            # Skip if autoscaling not enabled for this container
-            if container_name not in self.scaling_rules:
-                continue
-            
-            if not self.scaling_rules[container_name].get("enabled", False):
-                continue
-            
-            cpu = stat["cpu"]
-            memory = stat["memory"]
-            
-            print(f"📊 Checking {container_name}: CPU={cpu}%, Memory={memory}%")
-            
-            # Check if we need to scale up
-            if cpu > self.cpu_scale_up_threshold or memory > self.memory_scale_up_threshold:
-                print(f"⚠️  HIGH USAGE DETECTED: {container_name} - CPU: {cpu}%, Memory: {memory}%")
-                self.scale_up(container_name, stat["id"])
-            
-            # Check if we need to scale down
-            elif cpu < self.cpu_scale_down_threshold and memory < self.memory_scale_down_threshold:
-                current_replicas = self.scaling_rules[container_name].get("replicas", 1)
-                if current_replicas > self.min_replicas:
-                    print(f"ℹ️  LOW USAGE DETECTED: {container_name} - CPU: {cpu}%, Memory: {memory}%")
-                    self.scale_down(container_name)
-    
+        controller.reconcile_once()
+
     def start(self):
-        """Start autoscaler background thread"""
+        """Start autoscaling for the enabled containers"""
         if self.running:
             return
-        
+
         self.running = True
-        
-        def monitor_loop():
-            print("🚀 Auto-scaler started!")
-            while self.running:
-                try:
-                    self.check_and_scale()
-                except Exception as e:
-                    print(f"Error in autoscaler loop: {e}")
-                time.sleep(self.check_interval)
-        
-        self.thread = threading.Thread(target=monitor_loop, daemon=True)
-        self.thread.start()
-    
+        for container_name, rule in self.scaling_rules.items():
+            group = controller.replica_groups.get(container_name)
+            if group:
+                group.enabled = rule.get("enabled", False)
+                controller.save_group(group)
+        if not controller.running:
+            controller.start()
+        print("🚀 Auto-scaler started!")
+
     def stop(self):
-        """Stop autoscaler"""
+        """Stop autoscaling for our containers (other replica groups keep scaling)"""
         self.running = False
+        for container_name in self.scaling_rules:
+            group = controller.replica_groups.get(container_name)
+            if group:
+                group.enabled = False
+                controller.save_group(group)
         print("🛑 Auto-scaler stopped")
-    
+
     def enable_for_container(self, container_name: str):
         """Enable autoscaling for a container"""
-        if container_name not in self.scaling_rules:
-            self.scaling_rules[container_name] = {"enabled": True, "replicas": 1}
-        else:
-            self.scaling_rules[container_name]["enabled"] = True
+        group = controller.replica_groups.get(container_name)
+        if group is None:
+            try:
+                group = controller.adopt_container(container_name, container_name, self._policy(container_name))
+            except Exception as e:
+                print(f"Error enabling autoscaling for {container_name}: {e}")
+                return
+        group.enabled = self.running
+        controller.save_group(group)
+        self.scaling_rules[container_name] = {"enabled": True}
         print(f"✅ Autoscaling enabled for {container_name}")
-    
+
     def disable_for_container(self, container_name: str):
         """Disable autoscaling for a container"""
         if container_name in self.scaling_rules:
             self.scaling_rules[container_name]["enabled"] = False
+            group = controller.replica_groups.get(container_name)
+            if group:
+                group.enabled = False
+                controller.save_group(group)
         print(f"⛔ Autoscaling disabled for {container_name}")
-    
+
     def get_status(self) -> Dict:
         """Get current autoscaler status"""
         return {
@@ -268,7 +249,16 @@ class AutoScaler:
                 "max_replicas": self.max_replicas
             },
             "check_interval": self.check_interval,
-            "managed_containers": self.scaling_rules,
+            "policy": {
+                "type": self.policy_type,
+                "target_cpu_utilization": self.target_cpu_utilization,
+                "max_scale_up_step": self.max_scale_up_step,
+                "max_scale_down_step": self.max_scale_down_step
+            },
+            "managed_containers": {
+                name: {**rule, "replicas": self._replicas(name)}
+                for name, rule in self.scaling_rules.items()
+            },
             "history": self.scaling_history[-10:]
         }
 
@@ -59,5 +59,13 @@ def update_autoscaler_config(config: dict):
         autoscaler.max_replicas = int(config["max_replicas"])
     if "check_interval" in config:
         autoscaler.check_interval = int(config["check_interval"])
+    if "policy_type" in config:
+        autoscaler.policy_type = str(config["policy_type"])
+    if "target_cpu_utilization" in config:
+        autoscaler.target_cpu_utilization = float(config["target_cpu_utilization"])
+    if "max_scale_up_step" in config:
+        autoscaler.max_scale_up_step = int(config["max_scale_up_step"]) if config["max_scale_up_step"] else None
+    if "max_scale_down_step" in config:
+        autoscaler.max_scale_down_step = int(config["max_scale_down_step"]) if config["max_scale_down_step"] else None
     
     return {"message": "Configuration updated successfully", "config": autoscaler.get_status()}
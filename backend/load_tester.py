@@ -1,6 +1,6 @@
 import asyncio
 import time
-import psutil
+from app.host_sampler import host_sampler
 from datetime import datetime
 from typing import Optional, Dict, List
 from pydantic import BaseModel, validator
@@ -82,12 +82,11 @@ async def monitor_resources(test_id: str, stop_event: asyncio.Event):
     """Monitor CPU and memory usage during test"""
     while not stop_event.is_set():
         try:
-            cpu = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory().percent
+            host = host_sampler.latest()
             
-            if test_id in test_results:
-                test_results[test_id].cpu_usage.append(cpu)
-                test_results[test_id].memory_usage.append(memory)
+            if host and test_id in test_results:
+                test_results[test_id].cpu_usage.append(host.cpu_percent)
+                test_results[test_id].memory_usage.append(host.mem_percent)
         except:
             pass
         
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from services.autoscaler_service import autoscaler_service
+from services.rule_table import rule_table
 
 router = APIRouter(prefix="/api/autoscaling", tags=["autoscaling"])
 
@@ -42,3 +43,14 @@ async def get_history():
     """Get scaling history"""
     history = autoscaler_service.scaling_history
     return {"success": True, "data": history}
+
+@router.get("/rules")
+async def get_rules():
+    """Get the per-container rule table and its recent scaling actions"""
+    return {"success": True, "data": rule_table.get_status()}
+
+@router.post("/rules/reload")
+async def reload_rules():
+    """Reload the rule table from the database right away"""
+    rule_table.reload(force=True)
+    return {"success": True, "message": "Rules reloaded", "data": rule_table.get_status()}
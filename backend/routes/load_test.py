@@ -6,7 +6,7 @@ from datetime import datetime
 import httpx
 import asyncio
 import time
-import psutil
+from app.host_sampler import host_sampler
 from database import get_db
 from models import LoadTest
 
@@ -119,6 +119,8 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
         successful_requests = 0
         failed_requests = 0
         response_times = []
+        # One entry per batch: the resource and response time series of the test
+        samples = []
         
         # Calculate batch distribution
         batch_size = min(concurrency, total_requests)
@@ -135,10 +137,10 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
                 if elapsed >= test_duration:
                     break
                 
-                # Monitor CPU and Memory
-                cpu_percent = psutil.cpu_percent(interval=0.1)
-                memory = psutil.virtual_memory()
-                memory_percent = memory.percent
+                # Monitor CPU and Memory (read from the shared host sampler, never blocks)
+                host = host_sampler.latest()
+                cpu_readings = [host.cpu_percent] if host else []
+                memory_readings = [host.mem_percent] if host else []
                 
                 # Update progress
                 progress = min((requests_sent / total_requests) * 100, 100)
@@ -147,8 +149,8 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
                     "requests_sent": requests_sent,
                     "successful": successful_requests,
                     "failed": failed_requests,
-                    "cpu_usage": active_tests[test_id]["cpu_usage"][-20:] + [cpu_percent],  # Keep last 20 readings
-                    "memory_usage": active_tests[test_id]["memory_usage"][-20:] + [memory_percent]
+                    "cpu_usage": active_tests[test_id]["cpu_usage"][-20:] + cpu_readings,  # Keep last 20 readings
+                    "memory_usage": active_tests[test_id]["memory_usage"][-20:] + memory_readings
                 })
                 
                 # Send batch
@@ -161,6 +163,7 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
                         tasks.append(send_request(client, request.target_url, response_times))
                         requests_sent += 1
                 
+                timed = len(response_times)
                 results = await asyncio.gather(*tasks, return_exceptions=True)
                 
                 for result in results:
@@ -169,6 +172,18 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
                     else:
                         successful_requests += 1
                 
+                batch_times = response_times[timed:]
+                samples.append({
+                    "timestamp": round(time.time(), 3),
+                    "elapsed": round(time.time() - start_time, 3),
+                    "cpu_usage": cpu_readings[0] if cpu_readings else None,
+                    "memory_usage": memory_readings[0] if memory_readings else None,
+                    "requests_sent": requests_sent,
+                    "successful": successful_requests,
+                    "failed": failed_requests,
+                    "avg_response_time": round(sum(batch_times) / len(batch_times), 3) if batch_times else None
+                })
+                
                 # Wait before next batch
                 if requests_sent < total_requests:
                     elapsed_after_batch = time.time() - start_time
@@ -185,10 +200,6 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
         max_response_time = max(response_times) if response_times else 0
         requests_per_second = requests_sent / actual_duration if actual_duration > 0 else 0
         
-        # Final CPU/Memory reading
-        final_cpu = psutil.cpu_percent(interval=0.1)
-        final_memory = psutil.virtual_memory().percent
-        
         results = {
             "total_requests_sent": requests_sent,
             "successful_requests": successful_requests,
@@ -202,7 +213,8 @@ async def run_load_test_with_monitoring(test_id: int, request: LoadTestRequest):
             "avg_cpu_usage": round(sum(active_tests[test_id]["cpu_usage"]) / len(active_tests[test_id]["cpu_usage"]), 2) if active_tests[test_id]["cpu_usage"] else 0,
             "avg_memory_usage": round(sum(active_tests[test_id]["memory_usage"]) / len(active_tests[test_id]["memory_usage"]), 2) if active_tests[test_id]["memory_usage"] else 0,
             "peak_cpu_usage": round(max(active_tests[test_id]["cpu_usage"]), 2) if active_tests[test_id]["cpu_usage"] else 0,
-            "peak_memory_usage": round(max(active_tests[test_id]["memory_usage"]), 2) if active_tests[test_id]["memory_usage"] else 0
+            "peak_memory_usage": round(max(active_tests[test_id]["memory_usage"]), 2) if active_tests[test_id]["memory_usage"] else 0,
+            "samples": samples
         }
         
         # Update database
@@ -256,7 +268,8 @@ async def get_load_test_history(db: Session = Depends(get_db)):
         "concurrency": test.concurrency,
         "duration": test.duration,
         "status": test.status,
-        "results": test.results,
+        # The per-batch samples are only returned for a single test
+        "results": {k: v for k, v in test.results.items() if k != "samples"} if isinstance(test.results, dict) else test.results,
         "created_at": test.created_at.isoformat() if test.created_at else None
     } for test in tests]
 
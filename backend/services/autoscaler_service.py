@@ -1,16 +1,19 @@
-import subprocess
 import time
-import threading
-from typing import Dict, Optional
+from typing import Dict
 from datetime import datetime
 from database.models import AutoScalingRule
 from database.connection import db_session
 from services.docker_metrics_cli import docker_metrics_service
+from services.rule_table import rule_table, RULE_GROUP_PREFIX
+from app.autoscaler import autoscaler as controller, ScalingPolicy
+
+# Replica group of the unified controller that this service drives
+STUDENT_GROUP = 'student-global'
 
 class AutoScalerService:
+    """Global student auto-scaler, backed by the unified controller in app.autoscaler"""
     def __init__(self):
         self.running = False
-        self.thread = None
         self.config = {
             'cpuScaleUp': 70,
             'cpuScaleDown': 20,
@@ -22,11 +25,13 @@ class AutoScalerService:
         }
         self.scaling_history = []
         self._load_config_from_db()  # Load config from database on startup
+        controller.listeners.append(self._on_scaling_event)
         
     def update_config(self, new_config: Dict):
         """Update auto-scaling configuration and save to database"""
         self.config.update(new_config)
         self._save_config_to_db()  # Save to database
+        self._sync_policy()
         print(f"✅ Auto-scaler config updated: {self.config}")
         
     def add_scaling_event(self, event_type: str, from_count: int, to_count: int, reason: str):
@@ -47,180 +52,100 @@ class AutoScalerService:
         print(f"📊 Scaling event: {event['action']} - {reason}")
         return event
         
-    def scale_up_container(self, base_container_id: str) -> Dict:
-        """Create a new replica of the base container"""
-        try:
-            # Get base container info
-            inspect_cmd = ['docker', 'inspect', '--format', '{{json .}}', base_container_id]
-            result = subprocess.run(inspect_cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                return {'success': False, 'message': f'Failed to inspect container: {result.stderr}'}
-            
-            import json
-            container_info = json.loads(result.stdout)
-            
-            # Extract configuration
-            image = container_info['Config']['Image']
-            labels = container_info['Config']['Labels']
-            
-            # Generate new container name
-            base_name = container_info['Name'].lstrip('/')
-            new_name = f"{base_name}-replica-{int(time.time())}"
-            
-            # Create new container with same config
-            create_cmd = [
-                'docker', 'run', '-d',
-                '--name', new_name,
-                '--label', 'deployed_by=student',
-                '--label', f'user_id={labels.get("user_id", "student")}',
-                '--label', f'user_name={labels.get("user_name", "Student")}',
-                '--label', 'replica=true',
-                '--label', f'base_container={base_container_id}',
-                '--restart', 'unless-stopped',
-                image
-            ]
-            
-            result = subprocess.run(create_cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                return {'success': False, 'message': f'Failed to create replica: {result.stderr}'}
-            
-            new_container_id = result.stdout.strip()
-            print(f"✅ Created replica: {new_name} ({new_container_id[:12]})")
-            
-            return {
-                'success': True,
-                'containerId': new_container_id[:12],
-                'containerName': new_name,
-                'message': 'Replica created successfully'
-            }
-            
-        except Exception as e:
-            return {'success': False, 'message': str(e)}
-            
-    def scale_down_container(self) -> Dict:
-        """Remove the newest replica container"""
-        try:
-            # Get all student containers
-            containers = docker_metrics_service.get_student_containers()
-            
-            # Filter for replicas
-            replicas = [c for c in containers if c.get('labels', {}).get('replica') == 'true']
-            
-            if not replicas:
-                return {'success': False, 'message': 'No replicas to remove'}
-            
-            # Sort by creation time (newest first)
-            replicas.sort(key=lambda x: x.get('created', ''), reverse=True)
-            container_to_remove = replicas[0]
-            
-            # Stop and remove the container
-            stop_cmd = ['docker', 'stop', container_to_remove['fullId']]
-            subprocess.run(stop_cmd, capture_output=True, timeout=30)
-            
-            remove_cmd = ['docker', 'rm', container_to_remove['fullId']]
-            result = subprocess.run(remove_cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                return {'success': False, 'message': f'Failed to remove container: {result.stderr}'}
-            
-            print(f"✅ Removed replica: {container_to_remove['name']}")
-            
-            return {
-                'success': True,
-                'containerId': container_to_remove['id'],
-                'containerName': container_to_remove['name'],
-                'message': 'Replica removed successfully'
-            }
-            
-        except Exception as e:
-            return {'success': False, 'message': str(e)}
-            
+    def _policy(self) -> ScalingPolicy:
+        """Scaling policy of the student group built from the current config"""
+        config = self.config
+        return ScalingPolicy(
+            name=STUDENT_GROUP,
+            min_replicas=config['minReplicas'],
+            max_replicas=config['maxReplicas'],
+            cpu_scale_up_threshold=config['cpuScaleUp'],
+            cpu_scale_down_threshold=config['cpuScaleDown'],
+            cooldown_seconds=0,
+            evaluation_interval=config['checkInterval'],
+            memory_scale_up_threshold=config['memScaleUp'],
+            memory_scale_down_threshold=config['memScaleDown']
+        )
+
+    def _sync_policy(self):
+        group = controller.replica_groups.get(STUDENT_GROUP)
+        if group:
+            last_scale_time = group.policy.last_scale_time
+            group.policy = self._policy()
+            group.policy.last_scale_time = last_scale_time
+            controller.save_group(group)
+
+    def _on_scaling_event(self, event: Dict):
+        """Mirror controller events of the student group and the rule containers into the history"""
+        if event["action"] not in ("scale_up", "scale_down"):
+            return
+        if event["group"] != STUDENT_GROUP and not event["group"].startswith(RULE_GROUP_PREFIX):
+            return
+        replicas = event.get("replicas", 0)
+        if event["action"] == "scale_up":
+            self.add_scaling_event('up', replicas - 1, replicas, event["details"])
+        else:
+            self.add_scaling_event('down', replicas + 1, replicas, event["details"])
+
+    def _ensure_group(self) -> bool:
+        """Adopt the first running student container as the scaled group"""
+        if STUDENT_GROUP in controller.replica_groups:
+            return True
+        containers = docker_metrics_service.get_student_containers()
+        base_container = next((c for c in containers if c['status'] == 'running'), None)
+        if base_container is None:
+            return False
+        controller.adopt_container(STUDENT_GROUP, base_container['fullId'], self._policy())
+        return True
+
     def check_and_scale(self):
         """Check metrics and perform scaling if needed"""
         try:
-            # Get current metrics
-            metrics = docker_metrics_service.get_aggregated_metrics()
-            
-            avg_cpu = metrics.get('avgCpu', 0)
-            avg_memory = metrics.get('avgMemory', 0)
-            current_replicas = metrics.get('runningContainers', 0)
-            
-            config = self.config
-            
-            # Check if we need to scale up
-            if (avg_cpu >= config['cpuScaleUp'] or avg_memory >= config['memScaleUp']):
-                if current_replicas < config['maxReplicas']:
-                    print(f"🔺 Scale UP triggered: CPU={avg_cpu}%, Memory={avg_memory}%, Replicas={current_replicas}")
-                    
-                    # Get base container (first non-replica or any container)
-                    containers = metrics.get('containers', [])
-                    base_container = next((c for c in containers if c['status'] == 'running'), None)
-                    
-                    if base_container:
-                        result = self.scale_up_container(base_container['fullId'])
-                        if result['success']:
-                            reason = f"CPU: {avg_cpu}%, Memory: {avg_memory}%"
-                            self.add_scaling_event('up', current_replicas, current_replicas + 1, reason)
-                        else:
-                            print(f"❌ Scale up failed: {result['message']}")
-                else:
-                    print(f"⚠️ Already at max replicas ({config['maxReplicas']})")
-                    
-            # Check if we need to scale down
-            elif (avg_cpu <= config['cpuScaleDown'] and avg_memory <= config['memScaleDown']):
-                if current_replicas > config['minReplicas']:
-                    print(f"🔻 Scale DOWN triggered: CPU={avg_cpu}%, Memory={avg_memory}%, Replicas={current_replicas}")
-                    
-                    result = self.scale_down_container()
-                    if result['success']:
-                        reason = f"CPU: {avg_cpu}%, Memory: {avg_memory}%"
-                        self.add_scaling_event('down', current_replicas, current_replicas - 1, reason)
-                    else:
-                        print(f"❌ Scale down failed: {result['message']}")
-                else:
-                    print(f"⚠️ Already at min replicas ({config['minReplicas']})")
-            else:
-                print(f"✓ Metrics within range: CPU={avg_cpu}%, Memory={avg_memory}%, Replicas={current_replicas}")
-                
+            controller.reconcile_once()
+            rule_table.evaluate()
         except Exception as e:
             print(f"❌ Error in check_and_scale: {e}")
-            
-    def run(self):
-        """Main auto-scaling loop"""
-        print(f"🚀 Auto-scaler started with config: {self.config}")
-        self.add_scaling_event('info', 0, 0, 'Auto-scaler started')
-        
-        while self.running:
-            self.check_and_scale()
-            time.sleep(self.config['checkInterval'])
-            
-        print("🛑 Auto-scaler stopped")
-        self.add_scaling_event('info', 0, 0, 'Auto-scaler stopped')
-        
+
     def start(self) -> Dict:
         """Start the auto-scaler"""
         if self.running:
             return {'success': False, 'message': 'Auto-scaler already running'}
-        
+
+        try:
+            if not self._ensure_group():
+                return {'success': False, 'message': 'No running student container to scale'}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
         self.running = True
-        self.thread = threading.Thread(target=self.run, daemon=True)
-        self.thread.start()
-        
+        self._sync_policy()
+        group = controller.replica_groups[STUDENT_GROUP]
+        group.enabled = True
+        controller.save_group(group)
+        if not controller.running:
+            controller.start()
+        rule_table.start()
+
+        print(f"🚀 Auto-scaler started with config: {self.config}")
+        self.add_scaling_event('info', 0, 0, 'Auto-scaler started')
         return {'success': True, 'message': 'Auto-scaler started', 'config': self.config}
-        
+
     def stop(self) -> Dict:
         """Stop the auto-scaler"""
         if not self.running:
             return {'success': False, 'message': 'Auto-scaler not running'}
-        
+
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
-            
+        group = controller.replica_groups.get(STUDENT_GROUP)
+        if group:
+            group.enabled = False
+            controller.save_group(group)
+        rule_table.stop()
+
+        print("🛑 Auto-scaler stopped")
+        self.add_scaling_event('info', 0, 0, 'Auto-scaler stopped')
         return {'success': True, 'message': 'Auto-scaler stopped'}
-        
+
     def get_status(self) -> Dict:
         """Get current auto-scaler status"""
         metrics = docker_metrics_service.get_aggregated_metrics()
@@ -234,7 +159,8 @@ class AutoScalerService:
                 'runningContainers': metrics.get('runningContainers', 0),
                 'totalContainers': metrics.get('totalContainers', 0)
             },
-            'history': self.scaling_history[:20]
+            'history': self.scaling_history[:20],
+            'rules': rule_table.get_status()
         }
 
 
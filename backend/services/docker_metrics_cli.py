@@ -2,6 +2,7 @@ import subprocess
 import json
 from datetime import datetime
 from typing import List, Dict, Optional
+from app.metrics import STATS_FORMAT, ContainerSample, format_size, parse_stats_output
 
 class DockerMetricsService:
     def __init__(self):
@@ -52,47 +53,39 @@ class DockerMetricsService:
             print(f"Error getting containers: {e}")
             return []
 
-    def get_all_metrics_bulk(self, container_ids: List[str]) -> Dict[str, Dict]:
+    def get_all_metrics_bulk(self, container_ids: List[str]) -> Dict[str, ContainerSample]:
         """Get metrics for multiple containers in ONE docker stats call - MUCH FASTER!"""
         if not self.connected or not container_ids:
             return {}
         
         try:
             # Get all metrics in a single command - 10x faster!
-            stats_cmd = ['docker', 'stats', '--no-stream', '--format', '{{json .}}'] + container_ids
+            stats_cmd = ['docker', 'stats', '--no-stream', '--format', STATS_FORMAT] + container_ids
             result = subprocess.run(stats_cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
                 return {}
             
-            metrics_map = {}
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    stats = json.loads(line)
-                    container_id = stats.get('Container', '')[:12]
-                    
-                    cpu_str = stats.get('CPUPerc', '0%').rstrip('%')
-                    cpu = float(cpu_str) if cpu_str else 0
-                    
-                    mem_str = stats.get('MemPerc', '0%').rstrip('%')
-                    memory = float(mem_str) if mem_str else 0
-                    
-                    metrics_map[container_id] = {
-                        'containerId': container_id,
-                        'running': True,
-                        'cpu': round(min(cpu, 100), 2),
-                        'memory': round(min(memory, 100), 2),
-                        'memoryUsage': stats.get('MemUsage', 'N/A'),
-                        'networkIO': stats.get('NetIO', '0B / 0B'),
-                        'blockIO': stats.get('BlockIO', 'N/A'),
-                        'timestamp': datetime.now().isoformat()
-                    }
-            
-            return metrics_map
+            # Parsed once into numeric samples keyed by short container ID
+            return parse_stats_output(result.stdout)
         except Exception as e:
             print(f"Error getting bulk metrics: {e}")
             return {}
 
+    @staticmethod
+    def to_payload(sample: ContainerSample) -> Dict:
+        """Serialize a sample into the API response shape used by the dashboards"""
+        return {
+            'containerId': sample.container_id,
+            'running': True,
+            'cpu': round(min(sample.cpu_percent, 100), 2),
+            'memory': round(min(sample.mem_percent, 100), 2),
+            'memoryUsage': f"{format_size(sample.mem_usage)} / {format_size(sample.mem_limit)}",
+            'networkIO': f"{format_size(sample.net_rx, binary=False)} / {format_size(sample.net_tx, binary=False)}",
+            'blockIO': f"{format_size(sample.block_read, binary=False)} / {format_size(sample.block_write, binary=False)}",
+            'timestamp': datetime.fromtimestamp(sample.timestamp).isoformat()
+        }
+
     def get_container_metrics(self, container_id: str) -> Dict:
         """Get metrics for a single container - used for individual requests"""
         if not self.connected:
@@ -113,14 +106,16 @@ class DockerMetricsService:
                 }
             
             # Get metrics using bulk method (still fast for single container)
-            metrics_map = self.get_all_metrics_bulk([container_id])
-            return metrics_map.get(container_id[:12], {
-                'containerId': container_id[:12],
-                'running': False,
-                'cpu': 0,
-                'memory': 0,
-                'error': 'Failed to get stats'
-            })
+            sample = self.get_all_metrics_bulk([container_id]).get(container_id[:12])
+            if sample is None:
+                return {
+                    'containerId': container_id[:12],
+                    'running': False,
+                    'cpu': 0,
+                    'memory': 0,
+                    'error': 'Failed to get stats'
+                }
+            return self.to_payload(sample)
         except Exception as e:
             print(f"Error getting metrics for {container_id}: {e}")
             return {
@@ -149,20 +144,20 @@ class DockerMetricsService:
         
         # OPTIMIZATION: Get all metrics in ONE docker stats call instead of N calls!
         running_ids = [c['fullId'] for c in running]
-        metrics_map = self.get_all_metrics_bulk(running_ids) if running_ids else {}
+        samples = self.get_all_metrics_bulk(running_ids) if running_ids else {}
         
-        # Calculate averages from the bulk metrics
-        valid_metrics = [m for m in metrics_map.values() if m.get('running')]
-        avg_cpu = sum(m['cpu'] for m in valid_metrics) / len(valid_metrics) if valid_metrics else 0
-        avg_memory = sum(m['memory'] for m in valid_metrics) / len(valid_metrics) if valid_metrics else 0
+        # Calculate averages from the raw sample values
+        valid = list(samples.values())
+        avg_cpu = sum(min(s.cpu_percent, 100) for s in valid) / len(valid) if valid else 0
+        avg_memory = sum(min(s.mem_percent, 100) for s in valid) / len(valid) if valid else 0
         
-        # Attach metrics to containers
+        # Attach metrics to containers, serializing each sample once
         containers_with_metrics = []
         for container in containers:
-            metric = metrics_map.get(container['id'], {'cpu': 0, 'memory': 0, 'running': False})
+            sample = samples.get(container['id'])
             containers_with_metrics.append({
                 **container,
-                'metrics': metric
+                'metrics': self.to_payload(sample) if sample else {'cpu': 0, 'memory': 0, 'running': False}
             })
         
         return {
@@ -0,0 +1,296 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from database.models import AutoScalingRule
+from database.connection import SessionLocal
+from app.autoscaler import autoscaler as controller, ScalingPolicy, MAX_SAMPLE_AGE
+from app.sampler import container_sampler
+
+# Row holding the global auto-scaler config (see AutoScalerService), not a container rule
+GLOBAL_RULE = '__global__'
+# Controller replica group of a rule container: "rule-<container name>"
+RULE_GROUP_PREFIX = 'rule-'
+# Seconds between evaluations of the whole table; each rule is only acted on every check_interval
+TICK_SECONDS = 5
+# Used where a rule leaves the column empty
+DEFAULT_CPU_SCALE_DOWN = 20.0
+DEFAULT_MEM_SCALE_DOWN = 25.0
+DEFAULT_CHECK_INTERVAL = 30
+# How long to wait before trying again to adopt a rule container that could not be found
+ADOPT_RETRY_SECONDS = 60
+
+
+def rule_group_name(container_name: str) -> str:
+    return f"{RULE_GROUP_PREFIX}{container_name}"
+
+
+class RuleTable:
+    """Every enabled AutoScalingRule, held as column arrays and evaluated for all containers at once.
+
+    The table reloads itself when the rule rows change, so edits apply without a restart.
+    """
+
+    def __init__(self, tick_seconds: float = TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Serializes ticks of the background loop and check_and_scale()
+        self._tick_lock = threading.Lock()
+        self._fingerprint = None
+        self.loaded_at: Optional[float] = None
+        # One entry per rule, in rule id order
+        self.rule_ids: List[int] = []
+        self.names: List[str] = []
+        self.min_replicas = np.zeros(0, dtype=np.int64)
+        self.max_replicas = np.zeros(0, dtype=np.int64)
+        self.cpu_up = np.zeros(0)
+        self.cpu_down = np.zeros(0)
+        self.mem_up = np.zeros(0)
+        self.mem_down = np.zeros(0)
+        self.interval = np.zeros(0)
+        self.next_due = np.zeros(0)
+        # Container name -> when its adoption may be tried again
+        self._adopt_after: Dict[str, float] = {}
+        self.actions: deque = deque(maxlen=100)
+
+    def _rule_filter(self):
+        return AutoScalingRule.container_name != GLOBAL_RULE
+
+    def _current_fingerprint(self, session) -> Tuple:
+        """Cheap summary of the rule rows that changes with every insert, update, delete or toggle"""
+        return tuple(session.query(
+            func.count(AutoScalingRule.id),
+            func.sum(AutoScalingRule.id),
+            func.max(AutoScalingRule.updated_at),
+            func.sum(AutoScalingRule.enabled)
+        ).filter(self._rule_filter()).one())
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the table from the database if the rules changed (or always with `force`)"""
+        session = SessionLocal()
+        try:
+            fingerprint = self._current_fingerprint(session)
+            if not force and fingerprint == self._fingerprint:
+                return False
+            rows = session.query(AutoScalingRule).filter(
+                self._rule_filter(), AutoScalingRule.enabled == True
+            ).order_by(AutoScalingRule.id).all()
+        finally:
+            session.close()
+
+        # The newest rule of a container wins
+        rules = {rule.container_name: rule for rule in rows}
+        rules = sorted(rules.values(), key=lambda rule: rule.id)
+        with self._lock:
+            previous_due = dict(zip(self.names, self.next_due.tolist()))
+            removed = set(self.names) - {rule.container_name for rule in rules}
+            self.rule_ids = [rule.id for rule in rules]
+            self.names = [rule.container_name for rule in rules]
+            # Rule groups have no load balancer to activate them again, so they never scale to zero
+            self.min_replicas = np.array([max(1, rule.min_replicas or 1) for rule in rules], dtype=np.int64)
+            self.max_replicas = np.maximum(
+                np.array([rule.max_replicas or 5 for rule in rules], dtype=np.int64), self.min_replicas
+            )
+            self.cpu_up = np.array([rule.cpu_threshold or 80.0 for rule in rules], dtype=float)
+            self.mem_up = np.array([rule.memory_threshold or 80.0 for rule in rules], dtype=float)
+            self.cpu_down = np.array([
+                DEFAULT_CPU_SCALE_DOWN if rule.cpu_scale_down is None else rule.cpu_scale_down for rule in rules
+            ], dtype=float)
+            self.mem_down = np.array([
+                DEFAULT_MEM_SCALE_DOWN if rule.memory_scale_down is None else rule.memory_scale_down for rule in rules
+            ], dtype=float)
+            self.interval = np.array([rule.check_interval or DEFAULT_CHECK_INTERVAL for rule in rules], dtype=float)
+            # Edited rules keep their place in the evaluation cycle
+            self.next_due = np.array([previous_due.get(name, 0.0) for name in self.names], dtype=float)
+            self._adopt_after = {}
+            self._fingerprint = fingerprint
+            self.loaded_at = time.time()
+
+        self._sync_groups(removed)
+        print(f"📋 Auto-scaling rule table loaded: {len(self.names)} enabled rule(s)")
+        return True
+
+    def _policy(self, index: int) -> ScalingPolicy:
+        """Controller policy of a rule group: the rule table decides, the controller keeps min/max"""
+        return ScalingPolicy(
+            name=rule_group_name(self.names[index]),
+            min_replicas=int(self.min_replicas[index]),
+            max_replicas=int(self.max_replicas[index]),
+            cpu_scale_up_threshold=float(self.cpu_up[index]),
+            cpu_scale_down_threshold=float(self.cpu_down[index]),
+            cooldown_seconds=0,
+            policy_type="fixed",
+            memory_scale_up_threshold=float(self.mem_up[index]),
+            memory_scale_down_threshold=float(self.mem_down[index])
+        )
+
+    def _sync_groups(self, removed: set):
+        """Push the reloaded bounds to the rule groups and disable the groups of removed rules"""
+        for index, name in enumerate(self.names):
+            group = controller.replica_groups.get(rule_group_name(name))
+            if group is None:
+                continue
+            last_scale_time = group.policy.last_scale_time
+            group.policy = self._policy(index)
+            group.policy.last_scale_time = last_scale_time
+            group.enabled = True
+            controller.save_group(group)
+        for name in removed:
+            group = controller.replica_groups.get(rule_group_name(name))
+            if group is not None and group.enabled:
+                group.enabled = False
+                controller.save_group(group)
+                print(f"⏸️  Rule for '{name}' removed, its replica group is no longer scaled")
+
+    def _bind(self, now: float):
+        """Adopt each rule container without a replica group yet as the first replica of its group"""
+        for index, name in enumerate(self.names):
+            group_name = rule_group_name(name)
+            if group_name in controller.replica_groups or now < self._adopt_after.get(name, 0.0):
+                continue
+            try:
+                controller.adopt_container(group_name, name, self._policy(index))
+                print(f"✅ Container '{name}' is scaled by its auto-scaling rule")
+            except Exception as e:
+                self._adopt_after[name] = now + ADOPT_RETRY_SECONDS
+                print(f"⚠️  Cannot adopt container '{name}' for its auto-scaling rule: {e}")
+
+    def evaluate(self, now: Optional[float] = None) -> List[Dict]:
+        """One tick: reload if needed, then evaluate every rule against the latest metrics and apply the actions"""
+        with self._tick_lock:
+            return self._evaluate(now if now is not None else time.time())
+
+    def _evaluate(self, now: float) -> List[Dict]:
+        self.reload()
+        self._bind(now)
+
+        with self._lock:
+            names = list(self.names)
+            count = len(names)
+            if not count:
+                return []
+            # Metrics snapshot flattened to one entry per reporting replica, tagged with its rule
+            current = np.full(count, -1, dtype=np.int64)
+            replicas = []
+            for index, name in enumerate(names):
+                group = controller.replica_groups.get(rule_group_name(name))
+                if group is None or not group.enabled:
+                    continue
+                keys = [container_id[:12] for container_id in list(group.replicas)]
+                current[index] = len(keys)
+                replicas.extend((index, key) for key in keys)
+            samples = {key: container_sampler.latest(key) for _, key in replicas}
+            # Missing or stale samples are refreshed in one docker stats call, as the controller does
+            stale = [key for key, sample in samples.items() if sample is None or now - sample.timestamp > MAX_SAMPLE_AGE]
+            if stale:
+                samples.update(container_sampler.refresh(stale))
+            owners, cpu, mem = [], [], []
+            for index, key in replicas:
+                sample = samples.get(key)
+                if sample is None or now - sample.timestamp > MAX_SAMPLE_AGE:
+                    continue
+                owners.append(index)
+                cpu.append(sample.cpu_percent)
+                mem.append(sample.mem_percent)
+
+            owners = np.array(owners, dtype=np.intp)
+            reporting = np.bincount(owners, minlength=count)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg_cpu = np.bincount(owners, weights=np.array(cpu, dtype=float), minlength=count) / reporting
+                avg_mem = np.bincount(owners, weights=np.array(mem, dtype=float), minlength=count) / reporting
+
+            # Same rule as the threshold policy: either resource above its threshold adds a replica,
+            # both below theirs remove one
+            up = (avg_cpu > self.cpu_up) | (avg_mem > self.mem_up)
+            down = ~up & (avg_cpu < self.cpu_down) & (avg_mem < self.mem_down)
+            desired = np.clip(current + up.astype(np.int64) - down.astype(np.int64), self.min_replicas, self.max_replicas)
+            evaluated = (current >= 0) & (reporting > 0) & (now >= self.next_due)
+            self.next_due[evaluated] = now + self.interval[evaluated]
+            changed = np.flatnonzero(evaluated & (desired != current))
+
+            actions = []
+            for index in changed.tolist():
+                if up[index]:
+                    if avg_cpu[index] > self.cpu_up[index]:
+                        reason = f"CPU {avg_cpu[index]:.1f}% > {self.cpu_up[index]:g}%"
+                    else:
+                        reason = f"Memory {avg_mem[index]:.1f}% > {self.mem_up[index]:g}%"
+                elif down[index]:
+                    reason = f"CPU {avg_cpu[index]:.1f}% < {self.cpu_down[index]:g}%, memory {avg_mem[index]:.1f}% < {self.mem_down[index]:g}%"
+                else:
+                    reason = f"replica bounds {self.min_replicas[index]}-{self.max_replicas[index]}"
+                actions.append({
+                    'container': names[index],
+                    'group': rule_group_name(names[index]),
+                    'from': int(current[index]),
+                    'to': int(desired[index]),
+                    'reason': f"rule for {names[index]}: {reason}",
+                    'timestamp': now
+                })
+
+        if actions:
+            applied = set(controller.scale_groups({a['group']: (a['to'], a['reason']) for a in actions}))
+            actions = [action for action in actions if action['group'] in applied]
+            self.actions.extendleft(actions)
+        return actions
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.evaluate()
+            except Exception as e:
+                print(f"❌ Error evaluating auto-scaling rules: {e}")
+
+    def start(self):
+        """Evaluate the rule table every tick in the background"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def get_status(self) -> Dict:
+        """The rule table as loaded, with each rule's replica group and recent actions"""
+        now = time.time()
+        with self._lock:
+            rules = []
+            for index, name in enumerate(self.names):
+                group = controller.replica_groups.get(rule_group_name(name))
+                rules.append({
+                    'id': self.rule_ids[index],
+                    'containerName': name,
+                    'group': rule_group_name(name),
+                    'replicas': len(group.replicas) if group else None,
+                    'minReplicas': int(self.min_replicas[index]),
+                    'maxReplicas': int(self.max_replicas[index]),
+                    'cpuThreshold': float(self.cpu_up[index]),
+                    'memoryThreshold': float(self.mem_up[index]),
+                    'cpuScaleDown': float(self.cpu_down[index]),
+                    'memoryScaleDown': float(self.mem_down[index]),
+                    'checkInterval': float(self.interval[index]),
+                    'nextCheckIn': round(max(0.0, float(self.next_due[index]) - now), 1)
+                })
+        return {
+            'running': self.running,
+            'loadedAt': self.loaded_at,
+            'rules': rules,
+            'actions': list(self.actions)[:20]
+        }
+
+
+# Create singleton instance
+rule_table = RuleTable()
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# The app modules open their SQLite store on import: point it at a throwaway file first
+os.environ.setdefault('INTELLISCALESIM_DB', os.path.join(tempfile.mkdtemp(prefix='intelliscalesim-tests-'), 'metrics.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timezone
+
+from app.autoscaler import Autoscaler, GroupMetrics, ReplicaGroup, ScalingPolicy, decide, vertical_precedence
+
+
+def make_group(**policy):
+    policy.setdefault('min_replicas', 0)
+    policy.setdefault('max_replicas', 3)
+    return ReplicaGroup('web', 'nginx', 80, ScalingPolicy('web', **policy))
+
+
+def busy(cpu):
+    return GroupMetrics(avg_cpu=cpu, avg_mem=10.0, max_cpu=cpu, reporting=1, timestamp=time.time())
+
+
+def test_idle_group_scales_to_zero():
+    group = make_group(scale_to_zero_after_seconds=300)
+    desired, reason = decide(group, 1, GroupMetrics(), idle_seconds=400)
+    assert desired == 0
+    assert "scaled to zero" in reason
+
+
+def test_group_is_kept_until_idle_long_enough():
+    group = make_group(scale_to_zero_after_seconds=300)
+    assert decide(group, 1, GroupMetrics(), idle_seconds=30)[0] == 1
+    assert decide(group, 1, GroupMetrics())[0] == 1
+
+
+def test_group_at_zero_stays_at_zero_right_after_scaling_down():
+    # The scale-down just happened, so the group is not idle long enough to drop again,
+    # but it must not be brought back to one replica without a request either
+    group = make_group(scale_to_zero_after_seconds=300)
+    group.policy.last_scale_time = time.time()
+    assert decide(group, 0, GroupMetrics(), idle_seconds=30) == (0, "no metrics")
+    assert decide(group, 0, GroupMetrics(), idle_seconds=1000)[0] == 0
+
+
+def test_min_replicas_above_zero_still_repairs_empty_group():
+    group = make_group(min_replicas=2)
+    desired, reason = decide(group, 0, GroupMetrics(), idle_seconds=1000)
+    assert desired == 2
+    assert "clamped to [2, 3]" in reason
+
+
+def test_scale_to_zero_needs_min_replicas_zero():
+    group = make_group(min_replicas=1)
+    assert decide(group, 1, GroupMetrics(), idle_seconds=10_000)[0] == 1
+
+
+def test_active_group_scales_down_to_one_not_zero():
+    group = make_group(cooldown_seconds=0, scale_down_stabilization_seconds=0)
+    assert decide(group, 1, busy(95.0), idle_seconds=5)[0] == 2
+    assert decide(group, 2, busy(5.0), idle_seconds=5)[0] == 1
+    # The scale-down floor of an active group is one replica, not zero
+    assert decide(group, 1, busy(5.0), idle_seconds=5)[0] == 1
+
+
+def test_scheduled_prescale_wakes_group_at_zero():
+    now = time.time()
+    cron = time.strftime("%M %H * * *", time.localtime(now - 60))
+    group = make_group(scheduled_actions=[{"name": "lab", "cron": cron, "desired_replicas": 2}])
+    desired, reason = decide(group, 0, GroupMetrics(), now=now, idle_seconds=1000)
+    assert desired == 2
+    assert reason == "scheduled action 'lab'"
+
+
+def test_activate_wakes_group_at_zero(monkeypatch):
+    controller = Autoscaler()
+    group = make_group()
+    controller.replica_groups[group.name] = group
+    applied = []
+
+    def apply_plans(plans):
+        for plan in plans:
+            applied.append((plan.current, plan.desired))
+            plan.group.replicas.extend(f"{index:012d}" for index in range(plan.desired))
+
+    monkeypatch.setattr(controller, '_apply_plans', apply_plans)
+    monkeypatch.setattr(controller, '_apply_placement', lambda: None)
+    monkeypatch.setattr(controller, '_flush_dirty', lambda: None)
+    assert controller.activate('web')
+    assert applied == [(0, 1)]
+    # Already woken up: a second held request does not start another replica
+    assert controller.activate('web')
+    assert applied == [(0, 1)]
+
+
+def test_activate_refuses_disabled_or_unknown_group():
+    controller = Autoscaler()
+    group = make_group()
+    group.enabled = False
+    controller.replica_groups[group.name] = group
+    assert not controller.activate('web')
+    assert not controller.activate('missing')
+
+
+def test_horizontal_first_resizes_at_the_scheduled_max_of_the_tick():
+    group = make_group(min_replicas=1, max_replicas=10, vertical_mode="horizontal_first", scheduled_actions=[
+        {"name": "night", "cron": "0 22 * * *", "max_replicas": 3, "timezone": "UTC"},
+        {"name": "day", "cron": "0 8 * * *", "max_replicas": 10, "timezone": "UTC"},
+    ])
+    night = datetime(2026, 5, 4, 23, 0, tzinfo=timezone.utc).timestamp()
+    day = datetime(2026, 5, 4, 12, 0, tzinfo=timezone.utc).timestamp()
+    grow_cpu = group.cpu_quota * 2
+
+    # At the night's max of 3 no replica can be added, so the replicas grow instead
+    assert vertical_precedence(group, 3, 3, grow_cpu, None, night)
+    # By day there is room for more replicas, which come first
+    assert not vertical_precedence(group, 3, 3, grow_cpu, None, day)
@@ -0,0 +1,69 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.export import ExportError, export_stream
+from app.storage import engine, load_tests, metrics_store
+
+START = 1_700_000_000.0
+
+
+@pytest.fixture
+def recorded_tests():
+    metrics_store._ensure_tables()
+    samples = [
+        {"timestamp": START + 1, "elapsed": 1.0, "cpu_usage": 40.0, "memory_usage": 50.0,
+         "requests_sent": 10, "successful": 10, "failed": 0, "avg_response_time": 0.02},
+        {"timestamp": START + 2, "elapsed": 2.0, "cpu_usage": 80.0, "memory_usage": 55.0,
+         "requests_sent": 20, "successful": 19, "failed": 1, "avg_response_time": 0.05},
+    ]
+    with engine.begin() as conn:
+        conn.execute(delete(load_tests))
+        conn.execute(insert(load_tests), [
+            {"id": 1, "target_url": "http://localhost:8001", "total_requests": 20, "concurrency": 10,
+             "duration": 2, "status": "completed", "results": {"total_requests_sent": 20, "samples": samples},
+             "created_at": datetime.fromtimestamp(START, timezone.utc).replace(tzinfo=None)},
+            # Recorded before load tests kept samples
+            {"id": 2, "target_url": "http://localhost:8002", "total_requests": 5, "concurrency": 5,
+             "duration": 1, "status": "completed", "results": {"total_requests_sent": 5},
+             "created_at": datetime.fromtimestamp(START + 10, timezone.utc).replace(tzinfo=None)},
+        ])
+    yield
+    with engine.begin() as conn:
+        conn.execute(delete(load_tests))
+
+
+def read_csv(**selector):
+    export = export_stream("load_test_samples", "csv", **selector)
+    return list(csv.DictReader(io.StringIO("".join(export["body"]))))
+
+
+def test_load_test_samples_are_flattened_with_their_test_id(recorded_tests):
+    rows = read_csv()
+
+    assert [(row["test_id"], float(row["timestamp"])) for row in rows] == [("1", START + 1), ("1", START + 2)]
+    assert rows[1]["cpu_usage"] == "80.0"
+    assert rows[1]["failed"] == "1"
+    assert rows[1]["avg_response_time"] == "0.05"
+
+
+def test_load_test_samples_are_limited_to_the_time_range(recorded_tests):
+    # The test started before the range, its second sample falls inside it
+    rows = read_csv(since=START + 1.5, until=START + 5)
+
+    assert [float(row["timestamp"]) for row in rows] == [START + 2]
+
+
+def test_load_test_summaries_keep_one_row_per_test(recorded_tests):
+    export = export_stream("load_tests", "csv")
+    rows = list(csv.DictReader(io.StringIO("".join(export["body"]))))
+
+    assert [(row["id"], row["total_requests_sent"]) for row in rows] == [("1", "20"), ("2", "5")]
+
+
+def test_load_test_samples_cannot_be_filtered_by_group():
+    with pytest.raises(ExportError):
+        export_stream("load_test_samples", "csv", group="web")
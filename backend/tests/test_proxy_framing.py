@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.proxy import body_framing, iter_chunks, parse_head, read_request_body, wants_keep_alive
+
+
+def feed(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def collect(data: bytes):
+    async def run():
+        return [part async for part in iter_chunks(feed(data))]
+    return asyncio.run(run())
+
+
+def test_parse_head_splits_first_line_and_headers():
+    first, headers = parse_head(b"GET /a?b=1 HTTP/1.1\r\nHost: example\r\nX-Thing:  spaced value \r\n\r\n")
+    assert first == b"GET /a?b=1 HTTP/1.1"
+    assert headers == [(b"Host", b"example"), (b"X-Thing", b"spaced value")]
+
+
+def test_parse_head_keeps_colons_in_values_and_repeated_headers():
+    _, headers = parse_head(b"HTTP/1.1 200 OK\r\nLocation: http://h:8080/x\r\nSet-Cookie: a=1\r\nSet-Cookie: b=2\r\n\r\n")
+    assert headers == [(b"Location", b"http://h:8080/x"), (b"Set-Cookie", b"a=1"), (b"Set-Cookie", b"b=2")]
+
+
+def test_parse_head_without_headers():
+    assert parse_head(b"GET / HTTP/1.0\r\n\r\n") == (b"GET / HTTP/1.0", [])
+
+
+@pytest.mark.parametrize("method,status,headers,framing", [
+    (b"HEAD", 200, [(b"Content-Length", b"10")], "none"),
+    (b"GET", 204, [], "none"),
+    (b"GET", 304, [(b"Content-Length", b"10")], "none"),
+    (b"GET", 101, [], "none"),
+    (b"GET", 200, [(b"Transfer-Encoding", b"gzip, Chunked")], "chunked"),
+    (b"GET", 200, [(b"content-length", b"0")], "length"),
+    (b"POST", 500, [], "eof"),
+])
+def test_body_framing(method, status, headers, framing):
+    assert body_framing(method, status, headers) == framing
+
+
+def test_chunked_wins_over_content_length():
+    headers = [(b"Content-Length", b"5"), (b"Transfer-Encoding", b"chunked")]
+    assert body_framing(b"GET", 200, headers) == "chunked"
+
+
+def test_keep_alive_defaults_per_version():
+    assert wants_keep_alive(b"HTTP/1.1", [])
+    assert not wants_keep_alive(b"HTTP/1.1", [(b"Connection", b"close")])
+    assert not wants_keep_alive(b"HTTP/1.0", [])
+    assert wants_keep_alive(b"HTTP/1.0", [(b"Connection", b"Keep-Alive")])
+
+
+def test_iter_chunks_yields_framing_and_stops_after_trailers():
+    body = b"5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\nX-Trailer: yes\r\n\r\n"
+    parts = collect(body + b"GET /next HTTP/1.1\r\n")
+    assert parts == [b"5\r\nhello\r\n", b"6;ext=1\r\n world\r\n", b"0\r\nX-Trailer: yes\r\n\r\n"]
+    assert b"".join(parts) == body
+
+
+def test_iter_chunks_hex_sizes():
+    data = b"a" * 26
+    parts = collect(b"1A\r\n" + data + b"\r\n0\r\n\r\n")
+    assert parts == [b"1A\r\n" + data + b"\r\n", b"0\r\n\r\n"]
+
+
+def test_iter_chunks_truncated_body_raises():
+    with pytest.raises(asyncio.IncompleteReadError):
+        collect(b"10\r\nshort")
+
+
+def test_read_request_body_by_length_and_chunks():
+    async def run(data, headers):
+        return await read_request_body(feed(data), headers)
+    assert asyncio.run(run(b"abcdef", [(b"Content-Length", b"3")])) == b"abc"
+    assert asyncio.run(run(b"", [])) == b""
+    chunked = b"3\r\nabc\r\n0\r\n\r\n"
+    assert asyncio.run(run(chunked, [(b"Transfer-Encoding", b"chunked")])) == chunked
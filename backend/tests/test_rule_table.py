@@ -0,0 +1,163 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.autoscaler import Autoscaler, ReplicaGroup
+from app.metrics import ContainerSample
+from database.models import AutoScalingRule, Base
+import services.rule_table as rule_table_module
+from services.rule_table import DEFAULT_CHECK_INTERVAL, RuleTable
+
+
+class FakeSampler:
+    """Sampler cache plus refresh(), keyed by short container ID"""
+
+    def __init__(self):
+        self.cached = {}
+        self.fresh = {}
+        self.refreshed = []
+
+    def latest(self, key):
+        return self.cached.get(key)
+
+    def refresh(self, keys):
+        self.refreshed.append(sorted(keys))
+        return {key: self.fresh[key] for key in keys if key in self.fresh}
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rules.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    controller = Autoscaler()
+    applied = []
+    sampler = FakeSampler()
+
+    def adopt(group_name, container_name, policy):
+        group = ReplicaGroup(group_name, "img", 80, policy, load_balancer="none")
+        group.replicas = [container_id(container_name, 1)]
+        controller.replica_groups[group_name] = group
+        return group
+
+    def scale_groups(targets):
+        applied.append(dict(targets))
+        return list(targets)
+
+    monkeypatch.setattr(rule_table_module, "SessionLocal", Session)
+    monkeypatch.setattr(rule_table_module, "controller", controller)
+    monkeypatch.setattr(rule_table_module, "container_sampler", sampler)
+    monkeypatch.setattr(controller, "adopt_container", adopt)
+    monkeypatch.setattr(controller, "scale_groups", scale_groups)
+    monkeypatch.setattr(controller, "save_group", lambda group: None)
+    return Session, controller, sampler, applied
+
+
+def container_id(name, index):
+    return f"{name}{index}".ljust(12, "0") + "f" * 52
+
+
+def add_rules(Session, *rules):
+    session = Session()
+    session.add_all([AutoScalingRule(user_id="u", **rule) for rule in rules])
+    session.commit()
+    session.close()
+
+
+def sample(name, index, cpu, mem, age=0.0):
+    key = container_id(name, index)[:12]
+    return key, ContainerSample(key, cpu_percent=cpu, mem_percent=mem, timestamp=time.time() - age)
+
+
+def test_rules_are_evaluated_together(env):
+    Session, controller, sampler, applied = env
+    add_rules(
+        Session,
+        {"container_name": "__global__"},
+        {"container_name": "hot", "cpu_threshold": 70, "max_replicas": 3},
+        {"container_name": "mem", "cpu_threshold": 70, "memory_threshold": 60},
+        {"container_name": "calm", "cpu_scale_down": 30, "memory_scale_down": 30, "min_replicas": 0},
+        {"container_name": "off", "enabled": False},
+    )
+    table = RuleTable()
+    table.reload()
+    table._bind(time.time())
+    assert table.names == ["hot", "mem", "calm"]
+    sampler.cached = dict([sample("hot", 1, 90, 10), sample("mem", 1, 10, 75), sample("calm", 1, 5, 5)])
+
+    actions = table._evaluate(time.time())
+
+    assert {a["container"]: (a["from"], a["to"]) for a in actions} == {"hot": (1, 2), "mem": (1, 2)}
+    assert len(applied) == 1  # one batch for all rules
+    assert applied[0]["rule-hot"][1] == "rule for hot: CPU 90.0% > 70%"
+    assert applied[0]["rule-mem"][1] == "rule for mem: Memory 75.0% > 60%"
+    assert "rule-off" not in controller.replica_groups
+    # min_replicas=0 still keeps the idle container running
+    assert controller.replica_groups["rule-calm"].policy.min_replicas == 1
+
+
+def test_rule_waits_for_its_check_interval_and_respects_bounds(env):
+    Session, controller, sampler, applied = env
+    add_rules(Session, {"container_name": "web", "cpu_threshold": 50, "max_replicas": 2, "check_interval": 60})
+    table = RuleTable()
+    table.reload()
+    table._bind(time.time())
+    group = controller.replica_groups["rule-web"]
+    sampler.cached = dict([sample("web", 1, 80, 10)])
+
+    now = time.time()
+    assert [a["to"] for a in table._evaluate(now)] == [2]
+    group.replicas.append(container_id("web", 2))
+    sampler.cached.update([sample("web", 2, 80, 10)])
+    assert table._evaluate(now + 30) == []
+    # Due again, but already at max_replicas
+    assert table._evaluate(now + 61) == []
+    assert len(applied) == 1
+
+
+def test_stale_samples_are_refreshed_in_one_batch(env):
+    Session, controller, sampler, applied = env
+    add_rules(Session, {"container_name": "a", "cpu_threshold": 50}, {"container_name": "b", "cpu_threshold": 50})
+    table = RuleTable()
+    table.reload()
+    table._bind(time.time())
+    stale_key, stale = sample("a", 1, 99, 10, age=3600)
+    sampler.cached = {stale_key: stale}
+    sampler.fresh = dict([sample("a", 1, 80, 10)])
+
+    actions = table._evaluate(time.time())
+
+    assert sampler.refreshed == [sorted([container_id("a", 1)[:12], container_id("b", 1)[:12]])]
+    # "b" has no sample at all and is left alone
+    assert [a["container"] for a in actions] == ["a"]
+
+
+def test_rule_edits_hot_reload(env):
+    Session, controller, sampler, applied = env
+    add_rules(Session, {"container_name": "web", "cpu_threshold": 90, "min_replicas": 0})
+    table = RuleTable()
+    assert table.reload()
+    assert not table.reload()
+    assert table.min_replicas.tolist() == [1]
+    table._bind(time.time())
+    now = time.time()
+    sampler.cached = dict([sample("web", 1, 80, 10)])
+    assert table._evaluate(now) == []
+
+    session = Session()
+    rule = session.query(AutoScalingRule).one()
+    rule.cpu_threshold = 70
+    session.commit()
+    actions = table._evaluate(now + DEFAULT_CHECK_INTERVAL)
+    assert table.cpu_up.tolist() == [70.0]
+    assert [a["to"] for a in actions] == [2]
+    assert controller.replica_groups["rule-web"].policy.cpu_scale_up_threshold == 70.0
+
+    session.delete(rule)
+    session.commit()
+    session.close()
+    assert table._evaluate(time.time()) == []
+    assert table.names == []
+    assert not controller.replica_groups["rule-web"].enabled
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.schedules import CronExpression, check_bounds, compile_actions, due_prescale, scheduled_bounds
+
+UTC = timezone.utc
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def at(*args, tz=UTC, fold=0) -> float:
+    return datetime(*args, tzinfo=tz, fold=fold).timestamp()
+
+
+def local(timestamp: float, tz=UTC) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz)
+
+
+def test_next_after_is_strictly_after():
+    cron = CronExpression("0 9 * * *")
+    assert cron.next_after(at(2026, 5, 4, 9, 0), UTC) == at(2026, 5, 5, 9, 0)
+    assert cron.next_after(at(2026, 5, 4, 8, 59, 30), UTC) == at(2026, 5, 4, 9, 0)
+
+
+def test_previous_includes_the_reference_minute():
+    cron = CronExpression("*/20 8-17 * * *")
+    assert cron.previous(at(2026, 5, 4, 9, 40), UTC) == at(2026, 5, 4, 9, 40)
+    assert cron.previous(at(2026, 5, 4, 9, 39), UTC) == at(2026, 5, 4, 9, 20)
+    assert cron.previous(at(2026, 5, 4, 7, 0), UTC) == at(2026, 5, 3, 17, 40)
+
+
+def test_weekday_ranges_and_names():
+    # 2026-05-08 is a Friday
+    cron = CronExpression("50 9 * * mon-fri")
+    assert local(cron.next_after(at(2026, 5, 8, 10, 0), UTC)) == datetime(2026, 5, 11, 9, 50, tzinfo=UTC)
+    assert CronExpression("0 0 * * 7").weekdays == CronExpression("0 0 * * sun").weekdays == {0}
+
+
+def test_day_of_month_and_weekday_match_either_when_both_restricted():
+    # "on the 1st and on every Monday"; 2026-06-01 is a Monday, 2026-06-08 the next one
+    cron = CronExpression("0 12 1 * mon")
+    after_first = cron.next_after(at(2026, 6, 1, 12, 0), UTC)
+    assert local(after_first) == datetime(2026, 6, 8, 12, 0, tzinfo=UTC)
+    assert local(cron.next_after(at(2026, 6, 29, 13, 0), UTC)) == datetime(2026, 7, 1, 12, 0, tzinfo=UTC)
+
+
+def test_day_of_month_alone_ignores_weekday():
+    cron = CronExpression("0 12 13 * *")
+    assert local(cron.next_after(at(2026, 6, 1), UTC)) == datetime(2026, 6, 13, 12, 0, tzinfo=UTC)
+
+
+def test_february_29_is_found_years_ahead():
+    cron = CronExpression("0 0 29 2 *")
+    assert local(cron.next_after(at(2026, 3, 1), UTC)) == datetime(2028, 2, 29, tzinfo=UTC)
+
+
+def test_spring_forward_gap_fires_once_after_the_gap():
+    cron = CronExpression("30 2 * * *")
+    fire = cron.next_after(at(2026, 3, 8, 0, 0, tz=NEW_YORK), NEW_YORK)
+    # 02:30 does not exist on 2026-03-08; it fires at 03:30 EDT
+    assert local(fire, NEW_YORK).isoformat() == "2026-03-08T03:30:00-04:00"
+    # previous() never returns an instant after the reference time
+    reference = at(2026, 3, 8, 3, 10, tz=NEW_YORK)
+    assert cron.previous(reference, NEW_YORK) <= reference
+    assert local(cron.previous(reference, NEW_YORK), NEW_YORK).date().isoformat() == "2026-03-07"
+
+
+def test_fall_back_repeated_hour_fires_once():
+    cron = CronExpression("30 1 * * *")
+    first = cron.next_after(at(2026, 11, 1, 0, 0, tz=NEW_YORK), NEW_YORK)
+    assert local(first, NEW_YORK).isoformat() == "2026-11-01T01:30:00-04:00"
+    assert local(cron.next_after(first, NEW_YORK), NEW_YORK).isoformat() == "2026-11-02T01:30:00-05:00"
+
+
+def test_next_after_inside_the_repeated_hour_moves_forward():
+    cron = CronExpression("*/15 * * * *")
+    reference = at(2026, 11, 1, 1, 20, tz=NEW_YORK, fold=1)  # 01:20 EST, the second pass
+    fire = cron.next_after(reference, NEW_YORK)
+    assert fire > reference
+    assert local(fire, NEW_YORK).isoformat() == "2026-11-01T02:00:00-05:00"
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "*/0 * * * *", "x * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_bounds_follow_the_action_that_fired_last():
+    actions = compile_actions([
+        {"name": "lab", "cron": "50 9 * * *", "min_replicas": 6, "timezone": "UTC"},
+        {"name": "after-lab", "cron": "0 12 * * *", "min_replicas": 1, "timezone": "UTC"},
+    ])
+    assert scheduled_bounds(actions, at(2026, 5, 4, 10, 0), 2, 10) == (6, 10, ["lab"])
+    assert scheduled_bounds(actions, at(2026, 5, 4, 13, 0), 2, 10) == (1, 10, ["after-lab"])
+
+
+def test_conflicting_bounds_follow_the_bound_set_last():
+    actions = compile_actions([
+        {"name": "shrink", "cron": "0 8 * * *", "max_replicas": 3, "timezone": "UTC"},
+        {"name": "peak", "cron": "0 9 * * *", "min_replicas": 6, "timezone": "UTC"},
+    ])
+    assert scheduled_bounds(actions, at(2026, 5, 4, 10, 0), 2, 10) == (6, 6, ["peak"])
+    # Before peak fires, the min of the previous day's peak is older than the max
+    assert scheduled_bounds(actions, at(2026, 5, 4, 8, 30), 2, 10) == (3, 3, ["shrink"])
+
+
+def test_check_bounds_rejects_pairs_that_can_cross():
+    with pytest.raises(ValueError, match="'peak' is above max_replicas=3 of scheduled action 'shrink'"):
+        check_bounds(compile_actions([
+            {"name": "shrink", "cron": "0 8 * * *", "max_replicas": 3},
+            {"name": "peak", "cron": "0 9 * * *", "min_replicas": 6},
+        ]), 2, 10)
+    with pytest.raises(ValueError, match="of the policy is above max_replicas=2"):
+        check_bounds(compile_actions([{"name": "night", "cron": "0 22 * * *", "max_replicas": 2}]), 3, 10)
+    with pytest.raises(ValueError, match="min_replicas=8 .* max_replicas=5 of the policy"):
+        check_bounds(compile_actions([{"name": "peak", "cron": "0 9 * * *", "min_replicas": 8}]), 1, 5)
+
+
+def test_check_bounds_accepts_actions_that_set_both_bounds():
+    check_bounds(compile_actions([
+        {"name": "day", "cron": "0 8 * * *", "min_replicas": 5, "max_replicas": 10},
+        {"name": "night", "cron": "0 22 * * *", "min_replicas": 0, "max_replicas": 2},
+    ]), 1, 10)
+
+
+def test_prescale_applies_once_within_grace():
+    actions = compile_actions([{"name": "warm", "cron": "0 9 * * *", "desired_replicas": 4, "timezone": "UTC"}])
+    applied = {}
+    due = due_prescale(actions, at(2026, 5, 4, 9, 2), applied)
+    assert due is not None and due[0].name == "warm"
+    applied["warm"] = due[1]
+    assert due_prescale(actions, at(2026, 5, 4, 9, 3), applied) is None
+    assert due_prescale(actions, at(2026, 5, 4, 9, 30), {}) is None
+
+
+def test_action_names_must_be_unique():
+    with pytest.raises(ValueError):
+        compile_actions([{"name": "a", "cron": "0 9 * * *", "min_replicas": 1}, {"name": "a", "cron": "0 10 * * *", "min_replicas": 2}])
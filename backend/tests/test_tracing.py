@@ -0,0 +1,45 @@
+from sqlalchemy import select
+
+from app.autoscaler import Autoscaler
+from app.storage import engine, metrics_store, scaling_events, scaling_traces
+from app.tracing import ScalingTrace
+
+
+def event_rows(group):
+    with engine.connect() as conn:
+        return conn.execute(select(scaling_events).where(scaling_events.c.replica_group == group)).all()
+
+
+def test_failed_action_stores_its_timings_with_the_event():
+    controller = Autoscaler()
+    trace = ScalingTrace("traced-failed", "scale_up", 100.0, 101.0)
+    trace.mark("admitted", 101.5)
+    trace.finish("failed")
+    controller._log_scaling_event("traced-failed", "scale_up_failed", "Error: boom", timings=trace.timings)
+
+    [row] = event_rows("traced-failed")
+    assert row.trace_id == trace.timings["trace_id"]
+    assert row.timings["status"] == "failed"
+    assert row.timings["durations"] == {"decided": 1.0, "admitted": 0.5}
+
+
+def test_event_of_an_unfinished_action_joins_its_finished_trace():
+    controller = Autoscaler()
+    trace = ScalingTrace("traced-up", "scale_up", 100.0, 101.0)
+    trace.mark("running", 103.0)
+    controller._log_scaling_event("traced-up", "scale_up", "Added replica", timings=trace.timings)
+    trace.mark("healthy", 104.0)
+    trace.finish()
+
+    [event] = event_rows("traced-up")
+    assert event.timings["status"] == "in_progress"
+    with engine.connect() as conn:
+        [traced] = conn.execute(select(scaling_traces).where(scaling_traces.c.trace_id == event.trace_id)).all()
+    assert traced.phases["healthy"] == 104.0
+
+
+def test_events_without_an_action_have_no_timings():
+    metrics_store.record_event("traced-none", "schedule_updated", "0 scheduled actions: none")
+
+    [row] = event_rows("traced-none")
+    assert row.trace_id is None and row.timings is None